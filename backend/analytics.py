@@ -0,0 +1,159 @@
+"""
+Carga de treino para o painel: fadiga (ATL), condicionamento (CTL), forma
+(TSB) e monotonia semanal, no modelo impulso-resposta de Banister.
+
+A série do usuário é lida uma única vez dos rollups diários e vira arrays
+do NumPy com um elemento por dia; todas as métricas são calculadas sobre
+esses arrays de forma vetorizada, então dez anos de histórico custam poucos
+milissegundos.
+"""
+import datetime
+import math
+from dataclasses import dataclass
+from typing import Iterable
+
+import numpy as np
+
+from workout_types import WorkoutType
+
+# Constantes de tempo (dias) das médias exponenciais
+ATL_DAYS = 7
+CTL_DAYS = 42
+
+# Sem frequência cardíaca ou potência, a carga de um treino é estimada pela
+# duração ponderada pela intensidade típica do esporte (sRPE simplificado)
+INTENSITY = {
+    WorkoutType.RUNNING: 1.0,
+    WorkoutType.CYCLING: 0.75,
+    WorkoutType.SWIMMING: 0.9,
+    WorkoutType.WEIGHTLIFTING: 0.6,
+    WorkoutType.STAIRS: 0.9,
+}
+_INTENSITY_BY_CODE = np.array([INTENSITY[workout_type] for workout_type in WorkoutType])
+_TYPE_CODES = {workout_type: code for code, workout_type in enumerate(WorkoutType)}
+
+# Metros de subida que equivalem a um minuto de esforço
+ELEVATION_M_PER_LOAD = 10
+
+# Tamanho dos blocos da média exponencial vetorizada (ver ewma)
+_EWMA_BLOCK = 256
+
+
+@dataclass
+class DailySeries:
+    """Totais do usuário por dia, de first_day em diante (um elemento por dia)."""
+    first_day: datetime.date
+    duration_minutes: np.ndarray
+    distance_km: np.ndarray
+    elevation_m: np.ndarray
+    load: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.load)
+
+    def day(self, index: int) -> datetime.date:
+        return self.first_day + datetime.timedelta(days=index)
+
+
+def load_series(rows: Iterable, last_day: datetime.date) -> DailySeries:
+    """
+    Monta a série diária até `last_day` a partir de linhas (day, workout_type,
+    duration_minutes, distance_km, elevation_level) dos rollups.
+    """
+    rows = list(rows)
+    if not rows:
+        empty = np.zeros(0)
+        return DailySeries(last_day, empty, empty, empty, empty)
+
+    days, types, durations, distances, elevations = zip(*rows)
+    # Ordinais inteiros: bem mais baratos de converter que datas em datetime64
+    days = np.fromiter((day.toordinal() for day in days), dtype=np.int64, count=len(rows))
+    first_day = int(days.min())
+    indexes = days - first_day
+    length = max(last_day.toordinal() - first_day + 1, 0)
+    inside = indexes < length
+    indexes = indexes[inside]
+
+    durations = np.array(durations, dtype=np.float64)[inside]
+    elevations = np.array(elevations, dtype=np.float64)[inside]
+    intensity = _INTENSITY_BY_CODE[np.array([_TYPE_CODES[t] for t in types], dtype=np.int64)[inside]]
+    loads = durations * intensity + elevations / ELEVATION_M_PER_LOAD
+
+    def per_day(values: np.ndarray) -> np.ndarray:
+        return np.bincount(indexes, weights=values, minlength=length)
+
+    return DailySeries(
+        first_day=datetime.date.fromordinal(first_day),
+        duration_minutes=per_day(durations),
+        distance_km=per_day(np.array(distances, dtype=np.float64)[inside]),
+        elevation_m=per_day(elevations),
+        load=per_day(loads),
+    )
+
+
+def window(values: np.ndarray, series: DailySeries, start: datetime.date, end: datetime.date) -> np.ndarray:
+    """
+    Recorte de um array diário da série entre start e end (inclusivos). Dias
+    fora da série (antes do primeiro treino) valem zero.
+    """
+    offset = start.toordinal() - series.first_day.toordinal()
+    result = np.zeros(end.toordinal() - start.toordinal() + 1)
+    low, high = max(offset, 0), min(offset + len(result), len(values))
+    if low < high:
+        result[low - offset:high - offset] = values[low:high]
+    return result
+
+
+def ewma(values: np.ndarray, time_constant: float) -> np.ndarray:
+    """
+    Média exponencial y[t] = y[t-1] + (x[t] - y[t-1]) / time_constant, com
+    y[-1] = 0, sem laço por dia. Dentro de um bloco, y é uma soma acumulada
+    ponderada por potências do fator de decaimento; os blocos limitam essas
+    potências (evitando overflow) e passam o último valor adiante.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    result = np.empty_like(values)
+    gain = 1.0 / time_constant
+    decay = 1.0 - gain
+    steps = np.arange(_EWMA_BLOCK + 1)
+    powers = decay ** steps
+    inverse_powers = decay ** -steps[:-1]
+    state = 0.0
+    for start in range(0, len(values), _EWMA_BLOCK):
+        block = values[start:start + _EWMA_BLOCK]
+        size = len(block)
+        result[start:start + size] = (
+            powers[1:size + 1] * state + gain * powers[:size] * np.cumsum(block * inverse_powers[:size])
+        )
+        state = result[start + size - 1]
+    return result
+
+
+def training_load(series: DailySeries) -> dict[str, np.ndarray]:
+    """
+    Métricas diárias:
+    - atl/ctl: médias exponenciais da carga em ATL_DAYS/CTL_DAYS dias;
+    - tsb: forma do dia, CTL - ATL ao fim do dia anterior.
+    """
+    atl = ewma(series.load, ATL_DAYS)
+    ctl = ewma(series.load, CTL_DAYS)
+    tsb = np.concatenate(([0.0], (ctl - atl)[:-1])) if len(series) else np.zeros(0)
+    return {"load": series.load, "atl": atl, "ctl": ctl, "tsb": tsb}
+
+
+def weekly_load(series: DailySeries) -> dict[str, np.ndarray]:
+    """
+    Métricas por semana (segunda a domingo), com a monotonia de Foster:
+    média diária da carga / desvio-padrão diário na semana, e o strain
+    (carga semanal x monotonia). Semanas sem variação têm monotonia NaN.
+    """
+    # Completa a série com zeros até começar numa segunda e terminar num domingo
+    lead = series.first_day.weekday()
+    trail = -(lead + len(series)) % 7
+    daily = np.concatenate((np.zeros(lead), series.load, np.zeros(trail))).reshape(-1, 7)
+    load = daily.sum(axis=1)
+    deviation = daily.std(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        monotony = np.where(deviation > 0, daily.mean(axis=1) / deviation, math.nan)
+    week_starts = np.datetime64(series.first_day, "D") - lead + 7 * np.arange(len(load))
+    return {"week_start": week_starts, "load": load, "monotony": monotony, "strain": load * monotony}
@@ -0,0 +1,109 @@
+"""
+Requisições condicionais (ETag / If-None-Match / If-Modified-Since).
+
+Cada resposta de leitura é associada a validadores baratos da coleção de onde
+vem (o instante da última alteração e um contador de linhas). Se o cliente
+envia o ETag ou a data que já conhece e nada mudou, a resposta é um 304 sem
+corpo e o endpoint não precisa montar nem serializar os dados.
+"""
+import datetime
+import hashlib
+from dataclasses import dataclass
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional
+
+from fastapi import Request, Response, status
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import models
+
+
+@dataclass(frozen=True)
+class Validator:
+    """Versão de uma coleção: instante da última alteração e número de linhas."""
+    last_modified: Optional[datetime.datetime]
+    row_count: int
+
+
+async def workouts_validator(db: AsyncSession, user_id: int) -> Validator:
+    """
+    Validador dos treinos de um usuário. Inclui os excluídos (tombstones):
+    a exclusão atualiza updated_at e a contagem cobre linhas removidas de fato.
+    Lido pelo índice (owner_id, updated_at, id).
+    """
+    result = await db.execute(
+        select(func.max(models.Workout.updated_at), func.count())
+        .filter(models.Workout.owner_id == user_id)
+    )
+    last_modified, row_count = result.one()
+    return Validator(last_modified, row_count)
+
+
+def user_validator(db_user: models.User) -> Validator:
+    """Validador de um único usuário, a partir da linha já carregada."""
+    return Validator(db_user.updated_at, 1)
+
+
+def _http_date(value: datetime.datetime) -> str:
+    return format_datetime(value, usegmt=True)
+
+
+def _next_second(value: datetime.datetime) -> datetime.datetime:
+    """
+    Instante (naive, em UTC) arredondado para cima até o segundo inteiro: a
+    data HTTP não tem frações, e truncar faria uma escrita posterior no mesmo
+    segundo parecer anterior ao If-Modified-Since do cliente.
+    """
+    value = value.replace(tzinfo=datetime.timezone.utc)
+    if value.microsecond:
+        value = value.replace(microsecond=0) + datetime.timedelta(seconds=1)
+    return value
+
+
+def _not_modified_since(request: Request, last_modified: Optional[datetime.datetime]) -> bool:
+    header = request.headers.get("if-modified-since")
+    if not header or last_modified is None:
+        return False
+    try:
+        since = parsedate_to_datetime(header)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        return False
+    return last_modified <= since
+
+
+def evaluate(request: Request, response: Response, subject: str, *validators: Validator) -> Optional[Response]:
+    """
+    Calcula o ETag (validadores + URL + `subject`, normalmente o usuário) e o
+    Last-Modified da resposta. Se a requisição condicional confere, retorna a
+    resposta 304 a ser devolvida pelo endpoint; caso contrário, grava os
+    cabeçalhos em `response` e retorna None.
+    """
+    seed = [subject, request.url.path, str(sorted(request.query_params.multi_items()))]
+    for validator in validators:
+        last_modified = validator.last_modified.isoformat() if validator.last_modified else "-"
+        seed.append(f"{last_modified}/{validator.row_count}")
+    etag = '"' + hashlib.sha1("|".join(seed).encode()).hexdigest()[:20] + '"'
+
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache", "Vary": "Authorization"}
+    modified_dates = [validator.last_modified for validator in validators if validator.last_modified]
+    last_modified = _next_second(max(modified_dates)) if modified_dates else None
+    # Só anuncia um segundo já encerrado: enquanto ele corre, uma nova escrita
+    # teria o mesmo Last-Modified e só seria percebida pelo ETag
+    if last_modified is not None and last_modified <= datetime.datetime.now(datetime.timezone.utc):
+        headers["Last-Modified"] = _http_date(last_modified)
+
+    # If-None-Match tem precedência sobre If-Modified-Since (RFC 9110)
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        not_modified = etag in tags or "*" in tags
+    else:
+        not_modified = _not_modified_since(request, last_modified)
+
+    if not_modified:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+    return None
@@ -1,11 +1,12 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-import crud, models, schemas
+import crud, schemas
 from config import settings
-from database import SessionLocal
+from database import AsyncSessionLocal, SessionLocal
+from principal_cache import principal_cache
 
 # Define o esquema de autenticação.
 # tokenUrl aponta para o nosso endpoint de login.
@@ -13,7 +14,8 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/login/token")
 
 def get_db():
     """
-    Dependência para obter uma sessão do banco de dados.
+    Dependência para obter uma sessão síncrona do banco de dados.
+    Mantida para scripts e testes; os endpoints usam get_async_db.
     """
     db = SessionLocal()
     try:
@@ -21,9 +23,17 @@ def get_db():
     finally:
         db.close()
 
-def get_current_user(db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)):
+async def get_async_db():
     """
-    Decodifica o token, valida e retorna o usuário correspondente.
+    Dependência para obter uma sessão assíncrona do banco de dados.
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
+
+async def get_current_user(db: AsyncSession = Depends(get_async_db), token: str = Depends(oauth2_scheme)):
+    """
+    Decodifica o token, valida e retorna um snapshot do usuário correspondente.
+    O snapshot vem do cache de principais quando possível, sem ir ao banco.
     """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -40,13 +50,20 @@ def get_current_user(db: Session = Depends(get_db), token: str = Depends(oauth2_
     except JWTError:
         raise credentials_exception
     
+    cached_user = principal_cache.get(token_data.email)
+    if cached_user is not None:
+        return cached_user
+
     # Busca o usuário no banco de dados
-    user = crud.get_user_by_email(db, email=token_data.email)
+    generation = principal_cache.generation
+    user = await crud.get_user_by_email(db, email=token_data.email)
     if user is None:
         raise credentials_exception
-    return user
+    snapshot = schemas.AuthenticatedUser.model_validate(user)
+    principal_cache.set(token_data.email, snapshot, generation)
+    return snapshot
 
-def get_current_active_user(current_user: models.User = Depends(get_current_user)):
+async def get_current_active_user(current_user: schemas.AuthenticatedUser = Depends(get_current_user)):
     """
     Dependência que verifica se o usuário obtido do token está ativo.
     """
@@ -54,7 +71,7 @@ def get_current_active_user(current_user: models.User = Depends(get_current_user
         raise HTTPException(status_code=400, detail="Inactive user")
     return current_user
 
-def get_current_superuser(current_user: models.User = Depends(get_current_active_user)):
+async def get_current_superuser(current_user: schemas.AuthenticatedUser = Depends(get_current_active_user)):
     """
     Dependência que verifica se o usuário atual é um superusuário.
     """
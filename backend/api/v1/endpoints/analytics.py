@@ -0,0 +1,90 @@
+import datetime
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from pydantic import TypeAdapter
+
+import analytics, crud, schemas
+from .. import conditional
+from ..deps import get_current_active_user, get_async_db
+from ..responses import fast_json_response
+
+router = APIRouter()
+
+TRAINING_LOAD_ADAPTER = TypeAdapter(schemas.TrainingLoad)
+
+# Janela padrão e máxima da resposta, em dias
+DEFAULT_WINDOW_DAYS = 180
+MAX_WINDOW_DAYS = 3660
+
+
+def _rounded(values) -> list:
+    """Lista de floats com duas casas; NaN vira None."""
+    return [None if value != value else value for value in values.round(2).tolist()]
+
+
+@router.get("/load", response_model=schemas.TrainingLoad)
+async def read_training_load(
+    request: Request,
+    response: Response,
+    start: Optional[datetime.date] = Query(None, description="Primeiro dia (inclusivo). Padrão: 180 dias antes de end."),
+    end: Optional[datetime.date] = Query(None, description="Último dia (inclusivo). Padrão: hoje (UTC)."),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: schemas.AuthenticatedUser = Depends(get_current_active_user)
+):
+    """
+    Endpoint de carga de treino: carga diária, fadiga (ATL), condicionamento
+    (CTL) e forma (TSB), e carga/monotonia por semana. As médias são calculadas
+    sobre todo o histórico e só a janela pedida é devolvida.
+    Suporta requisições condicionais (ETag/Last-Modified).
+    """
+    default_end = end is None
+    end = end or datetime.datetime.now(datetime.timezone.utc).date()
+    start = start or end - datetime.timedelta(days=DEFAULT_WINDOW_DAYS - 1)
+    if start > end:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="start deve ser anterior ou igual a end.")
+    if (end - start).days >= MAX_WINDOW_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"A janela pode ter no máximo {MAX_WINDOW_DAYS} dias.",
+        )
+
+    validators = [await conditional.workouts_validator(db, current_user.id)]
+    if default_end:
+        # O fim padrão muda a cada dia (as médias decaem mesmo sem treinos
+        # novos): a resposta é no mínimo do início do dia, para que um
+        # If-Modified-Since de ontem não receba 304 (naive em UTC, como updated_at)
+        validators.append(conditional.Validator(datetime.datetime.combine(end, datetime.time.min), 0))
+    not_modified = conditional.evaluate(request, response, f"user:{current_user.id}:{end}", *validators)
+    if not_modified:
+        return not_modified
+
+    series = analytics.load_series(await crud.get_daily_rollups(db, user_id=current_user.id, end=end), end)
+    daily = {
+        name: _rounded(analytics.window(values, series, start, end))
+        for name, values in analytics.training_load(series).items()
+    }
+    weekly = analytics.weekly_load(series)
+    # Semanas que tocam a janela (a primeira pode começar antes de start)
+    first_week = start - datetime.timedelta(days=start.weekday())
+    week_starts = weekly["week_start"].astype(datetime.date).tolist()
+    in_window = [first_week <= week_start <= end for week_start in week_starts]
+    weeks = zip(
+        week_starts, _rounded(weekly["load"]), _rounded(weekly["monotony"]), _rounded(weekly["strain"]), in_window
+    )
+
+    days = [start + datetime.timedelta(days=offset) for offset in range(len(daily["load"]))]
+    return fast_json_response(TRAINING_LOAD_ADAPTER, {
+        "start": start,
+        "end": end,
+        "atl_days": analytics.ATL_DAYS,
+        "ctl_days": analytics.CTL_DAYS,
+        "days": [
+            {"day": day, "load": load, "atl": atl, "ctl": ctl, "tsb": tsb}
+            for day, load, atl, ctl, tsb in zip(days, daily["load"], daily["atl"], daily["ctl"], daily["tsb"])
+        ],
+        "weeks": [
+            {"week_start": week_start, "load": load, "monotony": monotony, "strain": strain}
+            for week_start, load, monotony, strain, keep in weeks if keep
+        ],
+    }, response)
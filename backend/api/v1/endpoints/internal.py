@@ -0,0 +1,37 @@
+import os
+from fastapi import APIRouter, Depends
+
+import schemas
+from ..deps import get_current_superuser
+from database import async_engine, engine
+from pool_metrics import async_pool_metrics, sync_pool_metrics
+from principal_cache import principal_cache
+from security import password_hasher
+
+router = APIRouter()
+
+@router.get("/pool")
+async def read_pool_stats(current_user: schemas.AuthenticatedUser = Depends(get_current_superuser)):
+    """
+    Endpoint interno com as estatísticas dos pools de conexão deste worker.
+    Cada processo do uvicorn tem o próprio pool; o pid identifica o worker.
+    """
+    return {
+        "pid": os.getpid(),
+        "async": async_pool_metrics.snapshot(async_engine.sync_engine.pool),
+        "sync": sync_pool_metrics.snapshot(engine.pool),
+    }
+
+@router.get("/principal-cache")
+async def read_principal_cache_stats(current_user: schemas.AuthenticatedUser = Depends(get_current_superuser)):
+    """
+    Endpoint interno com os contadores do cache de usuários autenticados deste worker.
+    """
+    return {"pid": os.getpid(), **principal_cache.stats()}
+
+@router.get("/password-hasher")
+async def read_password_hasher_stats(current_user: schemas.AuthenticatedUser = Depends(get_current_superuser)):
+    """
+    Endpoint interno com a ocupação do pool de hashing de senhas deste worker.
+    """
+    return {"pid": os.getpid(), **password_hasher.stats()}
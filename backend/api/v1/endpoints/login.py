@@ -1,23 +1,23 @@
 from datetime import timedelta
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 import crud, schemas
 from security import create_access_token
 from config import settings
-from .users import get_db 
+from ..deps import get_async_db
 
 router = APIRouter()
 
 @router.post("/token", response_model=schemas.Token)
-def login_for_access_token(db: Session = Depends(get_db), form_data: OAuth2PasswordRequestForm = Depends()):
+async def login_for_access_token(db: AsyncSession = Depends(get_async_db), form_data: OAuth2PasswordRequestForm = Depends()):
     """
     Endpoint de login. Recebe e-mail (no campo username) e senha.
     Retorna um token de acesso.
     """
     # 1. Autentica o usuário
-    user = crud.authenticate_user(db, email=form_data.username, password=form_data.password)
+    user = await crud.authenticate_user(db, email=form_data.username, password=form_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
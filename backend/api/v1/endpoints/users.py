@@ -1,38 +1,89 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from typing import Optional, Union
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
 
 import crud, models, schemas
-from api.v1.deps import get_db, get_current_active_user
+from api.v1 import conditional
+from api.v1.deps import get_async_db, get_current_active_user
+from config import settings
+from pagination import decode_cursor, encode_cursor
+from principal_cache import principal_cache
 
 
 router = APIRouter()
 
+# Resposta de leitura: usuário enxuto ou, com include=workouts, com os treinos recentes.
+# A ordem importa: sem a lista de treinos, o schema enxuto é o escolhido.
+UserResponse = Union[schemas.User, schemas.UserWithWorkouts]
+
+INCLUDE_QUERY = Query(
+    None,
+    description="Expansões opcionais separadas por vírgula. Suportado: workouts "
+    f"(até {settings.USER_WORKOUTS_INCLUDE_LIMIT} treinos mais recentes por usuário).",
+)
+
+def _includes_workouts(include: Optional[str]) -> bool:
+    if not include:
+        return False
+    expansions = {item.strip() for item in include.split(",")}
+    unknown = expansions - {"workouts"}
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unsupported include: {', '.join(sorted(unknown))}")
+    return True
+
+async def _serialize_users(db: AsyncSession, users: list[models.User], include: Optional[str]):
+    """
+    Converte os usuários para o schema de resposta. Os treinos só são
+    consultados (em lote, com limite) quando pedidos via include=workouts.
+    """
+    if _includes_workouts(include):
+        await crud.load_recent_workouts(db, users, settings.USER_WORKOUTS_INCLUDE_LIMIT)
+        return [schemas.UserWithWorkouts.model_validate(user) for user in users]
+    return [schemas.User.model_validate(user) for user in users]
+
+async def _get_current_db_user(db: AsyncSession, current_user: schemas.AuthenticatedUser) -> models.User:
+    """
+    A linha do usuário autenticado. O snapshot pode vir do cache de principais
+    depois que a linha foi excluída (ex.: em outro worker); nesse caso ele é
+    descartado do cache e a requisição é recusada como não autenticada.
+    """
+    db_user = await crud.get_user(db, user_id=current_user.id)
+    if db_user is None:
+        await principal_cache.invalidate(current_user.email)
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return db_user
+
 # --- Endpoints ---
 
 # A criação de usuário continua pública, pois qualquer um pode se registrar
 @router.post("/", response_model=schemas.User, status_code=status.HTTP_201_CREATED)
-def create_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
+async def create_user(user: schemas.UserCreate, db: AsyncSession = Depends(get_async_db)):
     """
     Endpoint para criar um novo usuário.
     - user: Corpo da requisição, validado pelo schema UserCreate.
     - db: Sessão do banco de dados injetada pela dependência get_db.
     """
-    db_user = crud.get_user_by_email(db, email=user.email)
+    db_user = await crud.get_user_by_email(db, email=user.email)
     if db_user:
         raise HTTPException(status_code=400, detail="Email already registered")
-    return crud.create_user(db=db, user=user)
+    return await crud.create_user(db=db, user=user)
 
 # Endpoint protegido: Apenas usuários logados podem listar outros usuários.
-@router.get("/", response_model=List[schemas.User])
-def read_users(
-    skip: int = 0, 
-    limit: int = 100, 
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_active_user)
+@router.get("/", response_model=schemas.Page[UserResponse])
+async def read_users(
+    cursor: Optional[str] = None,
+    include: Optional[str] = INCLUDE_QUERY,
+    limit: int = Query(100, ge=1, le=500),
+    skip: int = Query(0, ge=0, deprecated=True, description="Use o cursor (next_cursor)."),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: schemas.AuthenticatedUser = Depends(get_current_active_user)
 ):
     """
-    Endpoint para listar usuários com paginação.
+    Endpoint para listar usuários, ordenados por ID, com paginação por cursor.
     """
     # Regra de autorização: Apenas superusuários podem listar todos os usuários.
     if not current_user.is_superuser:
@@ -40,16 +91,29 @@ def read_users(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not enough permissions to list all users"
         )
-    users = crud.get_users(db, skip=skip, limit=limit)
-    return users
+    after_id = None
+    if cursor:
+        try:
+            (after_id,) = decode_cursor(cursor, int)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    # Busca um item a mais para saber se existe uma próxima página
+    users = await crud.get_users(db, limit=limit + 1, after_id=after_id, skip=skip)
+    next_cursor = None
+    if len(users) > limit:
+        users = users[:limit]
+        next_cursor = encode_cursor(users[-1].id)
+    return {"items": await _serialize_users(db, users, include), "next_cursor": next_cursor}
 
 
 # Endpoint protegido com autorização: Usuário só pode ver a si mesmo.
-@router.get("/{user_id}", response_model=schemas.User)
-def read_user(
+@router.get("/{user_id}", response_model=UserResponse)
+async def read_user(
     user_id: int, 
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_active_user) # 2. Protege a rota
+    include: Optional[str] = INCLUDE_QUERY,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: schemas.AuthenticatedUser = Depends(get_current_active_user) # 2. Protege a rota
 ):
     """
     Endpoint para buscar um usuário pelo seu ID.
@@ -57,18 +121,19 @@ def read_user(
     if user_id != current_user.id and not current_user.is_superuser:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not enough permissions")
     
-    db_user = crud.get_user(db, user_id=user_id)
+    db_user = await crud.get_user(db, user_id=user_id)
     if db_user is None:
         raise HTTPException(status_code=404, detail="User not found")
-    return db_user
+    (user_out,) = await _serialize_users(db, [db_user], include)
+    return user_out
 
 # Endpoint protegido com autorização: Usuário só pode atualizar a si mesmo.
 @router.put("/{user_id}", response_model=schemas.User)
-def update_user(
+async def update_user(
     user_id: int, 
     user_in: schemas.UserUpdate, 
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_active_user) # 2. Protege a rota
+    db: AsyncSession = Depends(get_async_db),
+    current_user: schemas.AuthenticatedUser = Depends(get_current_active_user) # 2. Protege a rota
 ):
     """
     Endpoint para atualizar um usuário.
@@ -76,7 +141,7 @@ def update_user(
     if user_id != current_user.id and not current_user.is_superuser:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not enough permissions")
 
-    db_user = crud.get_user(db, user_id=user_id)
+    db_user = await crud.get_user(db, user_id=user_id)
     if db_user is None:
         raise HTTPException(status_code=404, detail="User not found")
     
@@ -85,19 +150,18 @@ def update_user(
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Cannot assign superuser role")
 
     if user_in.email:
-        existing_user = crud.get_user_by_email(db, email=user_in.email)
+        existing_user = await crud.get_user_by_email(db, email=user_in.email)
         if existing_user and existing_user.id != user_id:
             raise HTTPException(status_code=400, detail="Email already in use")
             
-    updated_user = crud.update_user(db=db, db_user=db_user, user_in=user_in)
-    return updated_user
+    return await crud.update_user(db=db, db_user=db_user, user_in=user_in)
 
 # Endpoint protegido com autorização: Usuário só pode deletar a si mesmo.
 @router.delete("/{user_id}", response_model=schemas.User)
-def delete_user(
+async def delete_user(
     user_id: int, 
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_active_user) # 2. Protege a rota
+    db: AsyncSession = Depends(get_async_db),
+    current_user: schemas.AuthenticatedUser = Depends(get_current_active_user) # 2. Protege a rota
 ):
     """
     Endpoint para deletar um usuário.
@@ -105,30 +169,45 @@ def delete_user(
     if user_id != current_user.id and not current_user.is_superuser:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not enough permissions")
 
-    db_user = crud.get_user(db, user_id=user_id)
+    db_user = await crud.get_user(db, user_id=user_id)
     if db_user is None:
         raise HTTPException(status_code=404, detail="User not found")
     
-    crud.delete_user(db=db, user_id=user_id)
+    await crud.delete_user(db=db, user_id=user_id)
     return db_user
 
-@router.get("/me/", response_model=schemas.User)
-def read_user_me(current_user: models.User = Depends(get_current_active_user)):
+@router.get("/me/", response_model=UserResponse)
+async def read_user_me(
+    request: Request,
+    response: Response,
+    include: Optional[str] = INCLUDE_QUERY,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: schemas.AuthenticatedUser = Depends(get_current_active_user)
+):
     """
     Endpoint para obter os dados do usuário logado.
+    Suporta requisições condicionais (ETag/Last-Modified).
     """
-    return current_user
+    db_user = await _get_current_db_user(db, current_user)
+    validators = [conditional.user_validator(db_user)]
+    if _includes_workouts(include):
+        validators.append(await conditional.workouts_validator(db, current_user.id))
+    not_modified = conditional.evaluate(request, response, f"user:{current_user.id}", *validators)
+    if not_modified:
+        return not_modified
+    (user_out,) = await _serialize_users(db, [db_user], include)
+    return user_out
 
 @router.put("/me/profile", response_model=schemas.User)
-def update_user_profile(
+async def update_user_profile(
     profile_in: schemas.ProfileUpdate,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_active_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: schemas.AuthenticatedUser = Depends(get_current_active_user)
 ):
     """
     Endpoint para o usuário preencher/atualizar seu perfil inicial.
     """
     # Converte o schema para um dicionário para usar na função de update
     user_in = schemas.UserUpdate(**profile_in.model_dump())
-    updated_user = crud.update_user(db=db, db_user=current_user, user_in=user_in)
-    return updated_user
\ No newline at end of file
+    db_user = await _get_current_db_user(db, current_user)
+    return await crud.update_user(db=db, db_user=db_user, user_in=user_in)
\ No newline at end of file
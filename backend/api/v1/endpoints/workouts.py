@@ -1,99 +1,443 @@
-from typing import List, Any
-from fastapi import APIRouter, Depends, HTTPException, status, Response
-from sqlalchemy.orm import Session
-from pydantic import ValidationError
+import asyncio
+import datetime
+import os
+import tempfile
+from typing import Literal, Optional
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from fastapi import APIRouter, Depends, File, Form, HTTPException, Query, Request, UploadFile, status, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from pydantic import TypeAdapter, ValidationError
 
-import crud, models, schemas
-from ..deps import get_current_active_user, get_db
-from workout_types import WorkoutType
+import crud, schemas
+from .. import conditional, export
+from ..deps import get_current_active_user, get_async_db
+from ..responses import fast_json_response, rows_as_dicts
+from ..track_cache import track_responses
+from config import settings
+from import_jobs import import_jobs
+from pagination import decode_cursor, encode_cursor
+from track_codec import TRACK_FIELDS, decode_track
+from track_import import SUPPORTED_EXTENSIONS
+from track_simplify import TRACK_LEVELS, encode_track_levels
+from workout_types import WORKOUT_TYPE_BITS, WorkoutType
 
 router = APIRouter()
 
-# Mapeia o tipo de treino para o schema de detalhes correspondente
-DETAILS_SCHEMA_MAP = {
-    WorkoutType.RUNNING: schemas.RunningDetails,
-    WorkoutType.CYCLING: schemas.CyclingDetails,
-    WorkoutType.SWIMMING: schemas.SwimmingDetails,
-    WorkoutType.WEIGHTLIFTING: schemas.WeightliftingDetails,
-    WorkoutType.STAIRS: schemas.StairsDetails,
-}
+# Adapters das listagens, construídos uma única vez (ver fast_json_response)
+WORKOUT_PAGE_ADAPTER = TypeAdapter(schemas.Page[schemas.Workout])
+WORKOUT_CHANGES_ADAPTER = TypeAdapter(schemas.WorkoutChanges)
+WORKOUT_TRACK_ADAPTER = TypeAdapter(schemas.WorkoutTrack)
 
-@router.post("/", response_model=schemas.Workout, status_code=status.HTTP_201_CREATED)
-def create_workout(
-    workout_in: schemas.WorkoutCreate,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_active_user)
-):
+def validate_details(workout_type: WorkoutType, details: dict) -> dict:
     """
-    Endpoint para criar um novo treino.
-    Valida os 'details' com base no 'workout_type'.
+    Valida o dicionário de detalhes com o schema Pydantic do tipo de treino.
+    Usado só quando o tipo não vem no corpo (atualização sem workout_type);
+    nos demais casos a união discriminada de schemas já validou os detalhes.
+    Retorna os detalhes normalizados ou levanta HTTPException (400/422).
     """
-    details_schema = DETAILS_SCHEMA_MAP.get(workout_in.workout_type)
+    details_schema = schemas.DETAILS_SCHEMA_MAP.get(workout_type)
     if not details_schema:
         raise HTTPException(status_code=400, detail="Tipo de treino inválido.")
-    
     try:
-        # Valida o dicionário de detalhes com o schema Pydantic correto
-        validated_details = details_schema.model_validate(workout_in.details or {})
-        workout_in.details = validated_details.model_dump()
+        return details_schema.model_validate(details).model_dump()
     except ValidationError as e:
         raise HTTPException(status_code=422, detail=e.errors())
 
-    return crud.create_user_workout(db=db, workout=workout_in, user_id=current_user.id)
+# Fusos horários conhecidos pelo Postgres, lidos na primeira validação
+_server_time_zones: Optional[frozenset[str]] = None
+
+async def parse_time_zone(db: AsyncSession, tz: str) -> ZoneInfo:
+    """
+    Converte o nome IANA do fuso horário, ou levanta HTTPException (400).
+    O nome também precisa existir no Postgres, que agrupa os treinos por dia
+    nesse fuso: a base tzdata do Python pode ter nomes (ex.: posix/UTC,
+    localtime) que a do servidor não tem.
+    """
+    global _server_time_zones
+    try:
+        zone = ZoneInfo(tz)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid time zone")
+    if _server_time_zones is None:
+        _server_time_zones = await crud.get_time_zone_names(db)
+    if tz not in _server_time_zones:
+        raise HTTPException(status_code=400, detail="Invalid time zone")
+    return zone
+
+@router.post("/", response_model=schemas.Workout, status_code=status.HTTP_201_CREATED)
+async def create_workout(
+    workout_in: schemas.WorkoutCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: schemas.AuthenticatedUser = Depends(get_current_active_user)
+):
+    """
+    Endpoint para criar um novo treino.
+    Os 'details' já chegam validados pelo schema do 'workout_type'.
+    """
+    return await crud.create_user_workout(db=db, workout=workout_in, user_id=current_user.id)
+
+@router.post("/batch", response_model=schemas.WorkoutBatchResponse)
+async def batch_workouts(
+    batch_in: schemas.WorkoutBatchRequest,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: schemas.AuthenticatedUser = Depends(get_current_active_user)
+):
+    """
+    Endpoint para aplicar várias operações (create/update/delete) de uma vez,
+    usado pela sincronização offline do app. Tudo é gravado em uma única
+    transação; operações inválidas ou de treinos inexistentes são reportadas
+    no resultado do item e não impedem as demais.
+    """
+    operations = batch_in.operations
+    results = [
+        schemas.WorkoutBatchResult(index=index, op=operation.op, client_id=operation.client_id, id=operation.id, status="invalid")
+        for index, operation in enumerate(operations)
+    ]
+    # Uma única consulta confirma o dono e traz o estado atual dos treinos referenciados
+    existing = await crud.get_owned_workouts(
+        db, current_user.id, [operation.id for operation in operations if operation.id is not None], for_update=True
+    )
+
+    creates, create_indexes, updates, delete_ids = [], [], [], []
+    for index, operation in enumerate(operations):
+        result = results[index]
+        try:
+            if operation.op == "create":
+                workout_in = schemas.WORKOUT_CREATE_ADAPTER.validate_python(operation.data or {})
+                creates.append(workout_in.model_dump())
+                create_indexes.append(index)
+                continue
+
+            if operation.id is None:
+                result.errors = "id is required for update and delete"
+                continue
+            # Um treino já excluído neste lote também não pode mais ser alterado
+            if operation.id not in existing or operation.id in delete_ids:
+                result.status = "not_found"
+                continue
+
+            if operation.op == "update":
+                workout_in = schemas.WORKOUT_UPDATE_ADAPTER.validate_python(operation.data or {})
+                if workout_in.workout_type is None and workout_in.details is not None:
+                    workout_in.details = validate_details(existing[operation.id].workout_type, workout_in.details)
+                update_data = workout_in.model_dump(exclude_unset=True)
+                if update_data:
+                    updates.append({**update_data, "id": operation.id})
+                result.status = "updated"
+            else:
+                delete_ids.append(operation.id)
+                result.status = "deleted"
+        except ValidationError as e:
+            result.errors = e.errors(include_url=False, include_context=False)
+        except HTTPException as e:
+            result.errors = e.detail
+
+    created_ids = await crud.apply_workout_batch(
+        db, user_id=current_user.id, creates=creates, updates=updates, delete_ids=delete_ids, existing=existing
+    )
+    for index, workout_id in zip(create_indexes, created_ids):
+        results[index].id = workout_id
+        results[index].status = "created"
+    return {"results": results}
+
+@router.get("/", response_model=schemas.Page[schemas.Workout])
+async def read_workouts(
+    request: Request,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=500),
+    skip: int = Query(0, ge=0, deprecated=True, description="Use o cursor (next_cursor)."),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: schemas.AuthenticatedUser = Depends(get_current_active_user)
+):
+    """
+    Endpoint para listar os treinos do usuário logado, ordenados por data.
+    Para a próxima página, envie o next_cursor da resposta no parâmetro cursor.
+    Suporta requisições condicionais (ETag/Last-Modified).
+    """
+    after = None
+    if cursor:
+        try:
+            after = decode_cursor(cursor, datetime.datetime, int)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    validator = await conditional.workouts_validator(db, current_user.id)
+    not_modified = conditional.evaluate(request, response, f"user:{current_user.id}", validator)
+    if not_modified:
+        return not_modified
+
+    # Busca um item a mais para saber se existe uma próxima página
+    workouts = await crud.get_workouts_by_user(
+        db, user_id=current_user.id, limit=limit + 1, after=after, skip=skip
+    )
+    next_cursor = None
+    if len(workouts) > limit:
+        workouts = workouts[:limit]
+        next_cursor = encode_cursor(workouts[-1].workout_date, workouts[-1].id)
+    return fast_json_response(
+        WORKOUT_PAGE_ADAPTER, {"items": rows_as_dicts(workouts), "next_cursor": next_cursor}, response
+    )
+
+@router.get("/changes", response_model=schemas.WorkoutChanges)
+async def read_workout_changes(
+    since: Optional[str] = Query(None, description="next_token da sincronização anterior; omita na primeira."),
+    limit: int = Query(500, ge=1, le=1000),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: schemas.AuthenticatedUser = Depends(get_current_active_user)
+):
+    """
+    Endpoint de sincronização incremental: retorna apenas os treinos criados,
+    alterados ou excluídos desde o token do cliente, em páginas.
+    """
+    after = None
+    if since:
+        try:
+            after = decode_cursor(since, datetime.datetime, int)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid sync token")
+
+    # Busca um item a mais para saber se existe uma próxima página
+    changes = await crud.get_workout_changes(
+        db, user_id=current_user.id, limit=limit + 1, after=after, include_deleted=after is not None
+    )
+    has_more = len(changes) > limit
+    changes = changes[:limit]
+
+    token_key = (changes[-1].updated_at, changes[-1].id) if changes else after
+    if not has_more:
+        # Alterações recentes podem ainda estar em transações abertas com um
+        # updated_at menor; o token recua até o horizonte seguro e elas (e
+        # algumas já enviadas, o que é inofensivo) vêm na próxima sincronização.
+        now = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+        horizon = (now - datetime.timedelta(seconds=settings.WORKOUT_SYNC_SAFETY_WINDOW_SECONDS), 0)
+        if token_key is None or token_key > horizon:
+            token_key = horizon
+
+    return fast_json_response(WORKOUT_CHANGES_ADAPTER, {
+        "items": rows_as_dicts([workout for workout in changes if workout.deleted_at is None]),
+        "deleted_ids": [workout.id for workout in changes if workout.deleted_at is not None],
+        "next_token": encode_cursor(*token_key),
+        "has_more": has_more,
+    })
+
+@router.get("/stats", response_model=schemas.WorkoutStats)
+async def read_workout_stats(
+    request: Request,
+    response: Response,
+    period: Literal["day", "week", "month"] = "week",
+    tz: str = Query("UTC", description="Fuso horário IANA, ex.: America/Sao_Paulo."),
+    start: Optional[datetime.date] = Query(None, description="Primeiro dia (inclusivo)."),
+    end: Optional[datetime.date] = Query(None, description="Último dia (inclusivo)."),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: schemas.AuthenticatedUser = Depends(get_current_active_user)
+):
+    """
+    Endpoint de estatísticas: totais de duração, distância, quantidade e pace
+    por período e tipo de treino, agregados no banco.
+    Suporta requisições condicionais (ETag/Last-Modified).
+    """
+    zone = await parse_time_zone(db, tz)
+    validator = await conditional.workouts_validator(db, current_user.id)
+    not_modified = conditional.evaluate(request, response, f"user:{current_user.id}", validator)
+    if not_modified:
+        return not_modified
+
+    # Os limites são meia-noite no fuso do usuário; o banco compara em UTC
+    start_at = datetime.datetime.combine(start, datetime.time.min, tzinfo=zone) if start else None
+    end_at = datetime.datetime.combine(end + datetime.timedelta(days=1), datetime.time.min, tzinfo=zone) if end else None
+    buckets = await crud.get_workout_stats(
+        db, user_id=current_user.id, period=period, tz=tz, start=start_at, end=end_at
+    )
+    return {"period": period, "tz": tz, "buckets": buckets}
+
+@router.get("/calendar", response_model=schemas.WorkoutCalendar)
+async def read_workout_calendar(
+    request: Request,
+    response: Response,
+    year: int = Query(..., ge=1900, le=2200),
+    month: int = Query(..., ge=1, le=12),
+    tz: str = Query("UTC", description="Fuso horário IANA, ex.: America/Sao_Paulo."),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: schemas.AuthenticatedUser = Depends(get_current_active_user)
+):
+    """
+    Endpoint do calendário: os tipos de treino de cada dia do mês, como
+    máscara de bits. Suporta requisições condicionais (ETag/Last-Modified).
+    """
+    zone = await parse_time_zone(db, tz)
+    validator = await conditional.workouts_validator(db, current_user.id)
+    not_modified = conditional.evaluate(request, response, f"user:{current_user.id}", validator)
+    if not_modified:
+        return not_modified
+
+    start = datetime.datetime(year, month, 1, tzinfo=zone)
+    end = datetime.datetime(year + month // 12, month % 12 + 1, 1, tzinfo=zone)
+    days = {}
+    for day, workout_type in await crud.get_workout_calendar(db, user_id=current_user.id, start=start, end=end, tz=tz):
+        days[day] = days.get(day, 0) | WORKOUT_TYPE_BITS[workout_type]
+
+    return {"year": year, "month": month, "types": list(WORKOUT_TYPE_BITS), "days": dict(sorted(days.items()))}
+
+@router.get("/export")
+async def export_workouts(
+    export_format: Literal["ndjson", "csv"] = Query("ndjson", alias="format"),
+    gzip: bool = Query(False, description="Comprime o corpo (Content-Encoding: gzip)."),
+    current_user: schemas.AuthenticatedUser = Depends(get_current_active_user)
+):
+    """
+    Endpoint para exportar todo o histórico de treinos do usuário, em NDJSON
+    (um treino por linha, como em /workouts/) ou CSV. A resposta é enviada em
+    streaming, lida do banco em lotes, e serve para portabilidade e ETL.
+    """
+    body = export.export_workouts(current_user.id, export_format)
+    headers = {"Content-Disposition": f'attachment; filename="evorun-workouts.{export_format}"'}
+    if gzip:
+        body = export.gzip_chunks(body)
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(body, media_type=export.MEDIA_TYPES[export_format], headers=headers)
+
+async def save_upload(upload: UploadFile) -> str:
+    """
+    Copia o upload para um arquivo temporário próprio, que sobrevive ao fim da
+    requisição (o UploadFile é fechado quando a resposta é enviada).
+    Levanta HTTPException (413) acima de WORKOUT_IMPORT_MAX_BYTES.
+    """
+    size = 0
+    with tempfile.NamedTemporaryFile(prefix="evorun-import-", delete=False) as destination:
+        try:
+            while chunk := await upload.read(1024 * 1024):
+                size += len(chunk)
+                if size > settings.WORKOUT_IMPORT_MAX_BYTES:
+                    raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="File too large")
+                destination.write(chunk)
+        except BaseException:
+            destination.close()
+            os.unlink(destination.name)
+            raise
+    return destination.name
+
+@router.post("/import", response_model=schemas.WorkoutImportJob, status_code=status.HTTP_202_ACCEPTED)
+async def import_workouts(
+    file: UploadFile = File(..., description="Um arquivo .gpx ou .tcx, ou um .zip com vários deles."),
+    workout_type: Optional[WorkoutType] = Form(None, description="Substitui o esporte declarado nos arquivos."),
+    current_user: schemas.AuthenticatedUser = Depends(get_current_active_user)
+):
+    """
+    Endpoint para importar atividades de outros apps (GPX/TCX, um arquivo ou
+    um zip). A importação roda em segundo plano; o progresso é consultado em
+    GET /workouts/import/{job_id}. Atividades já existentes (mesma data/hora
+    de início) são ignoradas.
+    """
+    filename = os.path.basename(file.filename or "")
+    if filename.lower().endswith(".fit"):
+        raise HTTPException(status_code=400, detail="FIT files are not supported; export the activity as TCX or GPX")
+    if not filename.lower().endswith(SUPPORTED_EXTENSIONS + (".zip",)):
+        raise HTTPException(status_code=400, detail="Upload a .gpx, .tcx or .zip file")
+    path = await save_upload(file)
+    return import_jobs.create(current_user.id, path, filename, workout_type)
 
-@router.get("/", response_model=List[schemas.Workout])
-def read_workouts(
-    skip: int = 0,
-    limit: int = 100,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_active_user)
+@router.get("/import/{job_id}", response_model=schemas.WorkoutImportJob)
+async def read_import_job(
+    job_id: str,
+    current_user: schemas.AuthenticatedUser = Depends(get_current_active_user)
 ):
     """
-    Endpoint para listar todos os treinos do usuário logado.
+    Endpoint para acompanhar uma importação.
     """
-    workouts = crud.get_workouts_by_user(db, user_id=current_user.id, skip=skip, limit=limit)
-    return workouts
+    job = import_jobs.get(job_id, current_user.id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Import job not found")
+    return job
+
+def _track_body(workout_id: int, resolution: str, track) -> bytes:
+    """Serializa uma trilha decodificada (track_codec.Track) como schemas.WorkoutTrack."""
+    data = {"workout_id": workout_id, "resolution": resolution, "point_count": len(track)}
+    for name in TRACK_FIELDS:
+        values = getattr(track, name)
+        data[name] = values.tolist() if values is not None else None
+    return WORKOUT_TRACK_ADAPTER.dump_json(WORKOUT_TRACK_ADAPTER.validate_python(data))
+
+@router.get("/{workout_id}/track", response_model=schemas.WorkoutTrack)
+async def read_workout_track(
+    request: Request,
+    workout_id: int,
+    resolution: Literal["low", "medium", "high", "full"] = "medium",
+    db: AsyncSession = Depends(get_async_db),
+    current_user: schemas.AuthenticatedUser = Depends(get_current_active_user)
+):
+    """
+    Endpoint para obter a trilha GPS de um treino importado. As listagens de
+    treinos nunca incluem as trilhas; elas só são lidas aqui.
+    - resolution: low/medium/high são versões simplificadas, com no máximo
+      100/500/2000 pontos, calculadas na importação (para mapas e prévias);
+      full é a trilha completa.
+    Trilhas não mudam: a resposta fica em cache no servidor e pode ser
+    reaproveitada pelo cliente (ETag / If-None-Match).
+    """
+    db_workout = await crud.get_workout(db, workout_id=workout_id)
+    if not db_workout or db_workout.owner_id != current_user.id:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Workout not found")
+
+    headers = {"ETag": f'"track-{workout_id}-{resolution}"', "Cache-Control": "private, max-age=86400"}
+    if headers["ETag"] in request.headers.get("if-none-match", ""):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    cache_key = (workout_id, resolution)
+    body = track_responses.get(cache_key)
+    if body is None:
+        track = None
+        if resolution != "full":
+            db_level = await crud.get_workout_track_level(db, workout_id, TRACK_LEVELS[resolution])
+            track = decode_track(db_level) if db_level is not None else None
+        if track is None:
+            db_track = await crud.get_workout_track(db, workout_id=workout_id)
+            if db_track is None:
+                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Workout has no track")
+            track = decode_track(db_track)
+            if resolution != "full":
+                # Trilha gravada antes dos níveis de detalhe: calcula e guarda agora
+                levels = await asyncio.to_thread(encode_track_levels, track)
+                await crud.save_workout_track_levels(db, workout_id, levels)
+                track = decode_track(levels[TRACK_LEVELS[resolution]])
+        body = await asyncio.to_thread(_track_body, workout_id, resolution, track)
+        track_responses.set(cache_key, body)
+    return Response(content=body, media_type="application/json", headers=headers)
 
 @router.put("/{workout_id}", response_model=schemas.Workout)
-def update_workout(
+async def update_workout(
     workout_id: int,
     workout_in: schemas.WorkoutUpdate,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_active_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: schemas.AuthenticatedUser = Depends(get_current_active_user)
 ):
     """
     Endpoint para atualizar um treino existente.
     """
-    db_workout = crud.get_workout(db, workout_id=workout_id)
+    db_workout = await crud.get_workout(db, workout_id=workout_id, for_update=True)
     if not db_workout or db_workout.owner_id != current_user.id:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Workout not found")
 
-    if workout_in.details is not None:
-        workout_type_to_check = workout_in.workout_type or db_workout.workout_type
-        details_schema = DETAILS_SCHEMA_MAP.get(workout_type_to_check)
-        if not details_schema:
-            raise HTTPException(status_code=400, detail="Tipo de treino inválido.")
-        try:
-            validated_details = details_schema.model_validate(workout_in.details)
-            workout_in.details = validated_details.model_dump()
-        except ValidationError as e:
-            raise HTTPException(status_code=422, detail=e.errors())
+    # Com workout_type no corpo, os detalhes já foram validados pela união
+    if workout_in.workout_type is None and workout_in.details is not None:
+        workout_in.details = validate_details(db_workout.workout_type, workout_in.details)
 
-    updated_workout = crud.update_workout(db=db, db_workout=db_workout, workout_in=workout_in)
+    updated_workout = await crud.update_workout(db=db, db_workout=db_workout, workout_in=workout_in)
     return updated_workout
 
 @router.delete("/{workout_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_workout(
+async def delete_workout(
     workout_id: int,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_active_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: schemas.AuthenticatedUser = Depends(get_current_active_user)
 ):
     """
     Endpoint para excluir um treino existente.
     """
-    db_workout = crud.get_workout(db, workout_id=workout_id)
+    db_workout = await crud.get_workout(db, workout_id=workout_id, for_update=True)
     if not db_workout or db_workout.owner_id != current_user.id:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Workout not found")
     
-    crud.delete_workout(db=db, db_workout=db_workout)
+    await crud.delete_workout(db=db, db_workout=db_workout)
     return Response(status_code=status.HTTP_204_NO_CONTENT)
\ No newline at end of file
@@ -0,0 +1,76 @@
+"""
+Exportação do histórico de treinos (/workouts/export) em NDJSON ou CSV.
+
+O corpo é gerado aos poucos: as linhas vêm do banco em lotes por um cursor do
+lado do servidor, cada lote é codificado e enviado (opcionalmente comprimido
+em gzip) antes do próximo ser lido, então a memória não depende do tamanho
+do histórico.
+"""
+import csv
+import io
+import json
+import zlib
+from typing import AsyncIterator, Sequence
+
+from pydantic import TypeAdapter
+from sqlalchemy import Row
+
+import crud, schemas
+from config import settings
+from database import AsyncSessionLocal
+
+WORKOUT_ADAPTER = TypeAdapter(schemas.WorkoutExport)
+
+# Colunas do CSV, na ordem de WORKOUT_LIST_COLUMNS
+CSV_COLUMNS = [column.key for column in crud.WORKOUT_LIST_COLUMNS]
+
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv; charset=utf-8"}
+
+
+def encode_ndjson(rows: Sequence[Row]) -> bytes:
+    """Um objeto JSON (schemas.WorkoutExport) por linha."""
+    return b"".join(
+        WORKOUT_ADAPTER.dump_json(WORKOUT_ADAPTER.validate_python(row._asdict())) + b"\n" for row in rows
+    )
+
+
+def encode_csv(rows: Sequence[Row], header: bool = False) -> bytes:
+    """Linhas CSV; 'details' vai como JSON em uma única coluna."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(CSV_COLUMNS)
+    for row in rows:
+        writer.writerow([
+            row.id,
+            row.owner_id,
+            row.workout_type.value,
+            row.workout_date.isoformat() if row.workout_date else "",
+            row.duration_minutes,
+            row.distance_km,
+            json.dumps(row.details, separators=(",", ":")) if row.details is not None else None,
+        ])
+    return buffer.getvalue().encode()
+
+
+async def gzip_chunks(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """Comprime o fluxo em formato gzip, pedaço a pedaço."""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+    async for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+async def export_workouts(user_id: int, export_format: str) -> AsyncIterator[bytes]:
+    """
+    Gera o corpo da exportação. Usa uma sessão própria, independente da sessão
+    da requisição, aberta só enquanto a resposta é enviada e fechada também se
+    o cliente desconectar no meio.
+    """
+    if export_format == "csv":
+        yield encode_csv([], header=True)
+    async with AsyncSessionLocal() as db:
+        async for rows in crud.stream_user_workouts(db, user_id, settings.WORKOUT_EXPORT_BATCH_SIZE):
+            yield encode_ndjson(rows) if export_format == "ndjson" else encode_csv(rows)
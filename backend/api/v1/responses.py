@@ -0,0 +1,30 @@
+from typing import Any, Optional, Sequence
+
+from fastapi import Response
+from pydantic import TypeAdapter
+from sqlalchemy import Row
+
+
+def fast_json_response(adapter: TypeAdapter, data: Any, response: Optional[Response] = None) -> Response:
+    """
+    Valida `data` com um TypeAdapter pré-construído e serializa direto para
+    bytes no pydantic-core (Rust), sem o dicionário intermediário e o json da
+    biblioteca padrão do caminho normal do FastAPI.
+    - response: A resposta injetada no endpoint, cujos cabeçalhos (ex.: ETag)
+      são copiados, já que o FastAPI não os aplica a uma Response retornada.
+    """
+    body = adapter.dump_json(adapter.validate_python(data))
+    headers = dict(response.headers) if response is not None else None
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def rows_as_dicts(rows: Sequence[Row]) -> list[dict]:
+    """
+    Converte linhas de colunas (tuplas do SQLAlchemy) em dicionários, a entrada
+    mais barata para a validação: ler cada campo como atributo de Row
+    (from_attributes) custa mais que a própria conversão.
+    """
+    if not rows:
+        return []
+    keys = rows[0]._fields
+    return [dict(zip(keys, row)) for row in rows]
@@ -0,0 +1,41 @@
+"""
+Cache em processo das respostas de /workouts/{id}/track.
+
+As trilhas importadas não mudam depois de gravadas, então não há invalidação:
+as entradas saem apenas por LRU, quando o total em bytes passa do limite. O
+dono do treino é conferido a cada requisição, antes da consulta ao cache.
+"""
+from collections import OrderedDict
+from typing import Hashable, Optional
+
+from config import settings
+
+
+class ResponseCache:
+    """Cache LRU de corpos de resposta já serializados, limitado em bytes."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries: "OrderedDict[Hashable, bytes]" = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[bytes]:
+        body = self._entries.get(key)
+        if body is not None:
+            self._entries.move_to_end(key)
+        return body
+
+    def set(self, key: Hashable, body: bytes):
+        if len(body) > self.max_bytes:
+            return
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self.size -= len(previous)
+        self._entries[key] = body
+        self.size += len(body)
+        while self.size > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.size -= len(evicted)
+
+
+track_responses = ResponseCache(settings.TRACK_RESPONSE_CACHE_MAX_BYTES)
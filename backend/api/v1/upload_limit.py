@@ -0,0 +1,50 @@
+"""
+Limite de tamanho do corpo das requisições de upload.
+
+O corpo multipart é lido (e gravado em arquivos temporários) antes de o
+endpoint rodar, então um limite verificado só no endpoint chega depois de
+todo o upload. Este middleware recusa a requisição já pelo Content-Length e,
+sem ele (ou se ele mentir), interrompe a leitura assim que o limite é passado.
+"""
+from fastapi import HTTPException, status
+from fastapi.responses import JSONResponse
+from starlette.datastructures import Headers
+
+# Folga para os cabeçalhos das partes e os demais campos do formulário
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+
+class BodySizeLimitMiddleware:
+    """Middleware ASGI com o tamanho máximo do corpo (bytes) por caminho."""
+
+    def __init__(self, app, limits: dict[str, int]):
+        self.app = app
+        self.limits = limits
+
+    async def __call__(self, scope, receive, send):
+        limit = self.limits.get(scope["path"]) if scope["type"] == "http" else None
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+
+        content_length = Headers(scope=scope).get("content-length", "")
+        if content_length.isdigit() and int(content_length) > limit:
+            response = JSONResponse(
+                {"detail": "File too large"}, status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+            )
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    # O FastAPI repassa HTTPExceptions levantadas durante a leitura do corpo
+                    raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="File too large")
+            return message
+
+        await self.app(scope, limited_receive, send)
@@ -0,0 +1,61 @@
+"""
+Benchmark da vazão de login (verificação bcrypt) em função do número de núcleos.
+
+Executa, a partir da pasta backend:
+    python -m benchmarks.bench_login_throughput [--requests 200]
+
+Para cada tamanho de pool de processos, dispara verificações concorrentes pelo
+PasswordHashingService e mede quantas verificações por segundo são concluídas.
+A verificação da senha domina o custo de /api/v1/login/token.
+"""
+import argparse
+import asyncio
+import os
+import time
+
+from security import PasswordHashingService, get_password_hash, verify_password
+
+
+async def measure(workers: int, requests: int, hashed: str) -> float:
+    service = PasswordHashingService(max_workers=workers, max_pending=requests)
+    service.start()
+    # Aquece os processos (spawn + import) antes de medir
+    await asyncio.gather(*(service.verify("senha-correta", hashed) for _ in range(workers)))
+    started_at = time.perf_counter()
+    results = await asyncio.gather(*(service.verify("senha-correta", hashed) for _ in range(requests)))
+    elapsed = time.perf_counter() - started_at
+    service.shutdown()
+    assert all(results)
+    return requests / elapsed
+
+
+def worker_counts(max_workers: int):
+    count = 1
+    while count < max_workers:
+        yield count
+        count *= 2
+    yield max_workers
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    hashed = get_password_hash("senha-correta")
+    cpu_count = os.cpu_count() or 1
+
+    started_at = time.perf_counter()
+    for _ in range(20):
+        verify_password("senha-correta", hashed)
+    inline_rate = 20 / (time.perf_counter() - started_at)
+    print(f"{'processos':>10} {'logins/s':>10} {'speedup':>8}")
+    print(f"{'inline':>10} {inline_rate:>10.1f} {1.0:>8.2f}")
+
+    for workers in worker_counts(cpu_count):
+        rate = await measure(workers, args.requests, hashed)
+        print(f"{workers:>10} {rate:>10.1f} {rate / inline_rate:>8.2f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
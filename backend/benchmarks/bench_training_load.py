@@ -0,0 +1,94 @@
+"""
+Benchmark do cálculo de carga de treino (GET /api/v1/analytics/load).
+
+Executa, a partir da pasta backend:
+    python -m benchmarks.bench_training_load [--years 10] [--runs 50]
+
+Gera em memória os rollups diários de um atleta que treina quase todos os
+dias (às vezes duas modalidades no mesmo dia) e mede, sem o banco:
+- a montagem da série (analytics.load_series);
+- ATL/CTL/TSB e a carga/monotonia semanais, vetorizados;
+- as mesmas médias em um laço Python dia a dia, como referência.
+"""
+import argparse
+import datetime
+import random
+import statistics
+import time
+
+import numpy as np
+
+import analytics
+from workout_types import WorkoutType
+
+
+def synthetic_rows(years: int, seed: int = 42) -> tuple[list, datetime.date]:
+    """Linhas (day, workout_type, duration_minutes, distance_km, elevation_level) de `years` anos."""
+    rng = random.Random(seed)
+    last_day = datetime.date(2025, 12, 31)
+    first_day = last_day - datetime.timedelta(days=365 * years)
+    types = list(WorkoutType)
+    rows = []
+    day = first_day
+    while day <= last_day:
+        for _ in range(rng.choice((0, 1, 1, 1, 2))):
+            workout_type = rng.choice(types)
+            duration = rng.randint(20, 150)
+            rows.append((day, workout_type, duration, round(duration / rng.uniform(4, 7), 2), rng.randint(0, 800)))
+        day += datetime.timedelta(days=1)
+    return rows, last_day
+
+
+def loop_ewma(values, time_constant: float) -> list[float]:
+    result, state = [], 0.0
+    for value in values:
+        state += (value - state) / time_constant
+        result.append(state)
+    return result
+
+
+def timed(runs: int, call) -> list[float]:
+    call()  # aquecimento
+    durations = []
+    for _ in range(runs):
+        started_at = time.perf_counter()
+        call()
+        durations.append((time.perf_counter() - started_at) * 1000)
+    return sorted(durations)
+
+
+def report(label: str, durations: list[float]):
+    p95 = durations[int(len(durations) * 0.95) - 1]
+    print(f"{label:<28} mediana {statistics.median(durations):8.3f} ms   p95 {p95:8.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--years", type=int, default=10)
+    parser.add_argument("--runs", type=int, default=50)
+    args = parser.parse_args()
+
+    rows, last_day = synthetic_rows(args.years)
+    series = analytics.load_series(rows, last_day)
+    print(f"{len(rows)} rollups, {len(series)} dias\n")
+
+    metrics = analytics.training_load(series)
+    reference = loop_ewma(series.load.tolist(), analytics.CTL_DAYS)
+    assert np.allclose(metrics["ctl"], reference)
+
+    def compute():
+        analytics.training_load(series)
+        analytics.weekly_load(series)
+
+    def compute_loop():
+        load = series.load.tolist()
+        loop_ewma(load, analytics.ATL_DAYS)
+        loop_ewma(load, analytics.CTL_DAYS)
+
+    report("load_series", timed(args.runs, lambda: analytics.load_series(rows, last_day)))
+    report("métricas (vetorizado)", timed(args.runs, compute))
+    report("ATL/CTL (laço Python)", timed(args.runs, compute_loop))
+
+
+if __name__ == "__main__":
+    main()
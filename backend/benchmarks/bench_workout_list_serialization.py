@@ -0,0 +1,100 @@
+"""
+Microbenchmark da serialização de GET /api/v1/workouts/.
+
+Executa, a partir da pasta backend (com o banco em DATABASE_URL migrado):
+    python -m benchmarks.bench_workout_list_serialization [--page-size 500] [--runs 50]
+
+Compara, para uma página de treinos do usuário de benchmark (o mesmo de
+bench_workout_stats, criado se necessário):
+- caminho anterior: objetos ORM validados pelo response_model do FastAPI
+  (from_attributes) e codificados com o json da biblioteca padrão;
+- caminho rápido: tuplas de colunas, TypeAdapter pré-construído e dump_json
+  do pydantic-core.
+Mede a serialização isolada e a soma consulta + serialização.
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from sqlalchemy import select
+
+import crud, models
+from api.v1.endpoints.workouts import WORKOUT_PAGE_ADAPTER, read_workouts, router
+from api.v1.responses import fast_json_response, rows_as_dicts
+from benchmarks.bench_workout_stats import seed
+from database import AsyncSessionLocal
+
+# O response_model da rota, como o FastAPI o usa para validar a resposta
+RESPONSE_FIELD = next(route.response_field for route in router.routes if route.endpoint is read_workouts)
+
+
+async def fetch_orm(user_id: int, limit: int):
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(models.Workout)
+            .filter(models.Workout.owner_id == user_id, models.Workout.deleted_at.is_(None))
+            .order_by(models.Workout.workout_date, models.Workout.id)
+            .limit(limit)
+        )
+        return result.scalars().all()
+
+
+async def fetch_rows(user_id: int, limit: int):
+    async with AsyncSessionLocal() as db:
+        return await crud.get_workouts_by_user(db, user_id=user_id, limit=limit)
+
+
+async def serialize_default(workouts) -> bytes:
+    content = await serialize_response(field=RESPONSE_FIELD, response_content={"items": workouts, "next_cursor": None})
+    return JSONResponse(content).body
+
+
+async def serialize_fast(rows) -> bytes:
+    return fast_json_response(WORKOUT_PAGE_ADAPTER, {"items": rows_as_dicts(rows), "next_cursor": None}).body
+
+
+async def timed(runs: int, make_call) -> list[float]:
+    await make_call()  # aquecimento
+    durations = []
+    for _ in range(runs):
+        started_at = time.perf_counter()
+        await make_call()
+        durations.append((time.perf_counter() - started_at) * 1000)
+    return sorted(durations)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--page-size", type=int, default=500)
+    parser.add_argument("--runs", type=int, default=50)
+    args = parser.parse_args()
+
+    user_id = seed(max(args.page_size, 10000))
+    workouts = await fetch_orm(user_id, args.page_size)
+    rows = await fetch_rows(user_id, args.page_size)
+    assert json.loads(await serialize_default(workouts)) == json.loads(await serialize_fast(rows))
+
+    cases = [
+        ("serialização: anterior", lambda: serialize_default(workouts)),
+        ("serialização: rápida", lambda: serialize_fast(rows)),
+        ("consulta + serialização: anterior", lambda: _then(fetch_orm(user_id, args.page_size), serialize_default)),
+        ("consulta + serialização: rápida", lambda: _then(fetch_rows(user_id, args.page_size), serialize_fast)),
+    ]
+    print(f"página de {args.page_size} treinos, {args.runs} execuções")
+    print(f"{'cenário':<36} {'p50 ms':>8} {'p95 ms':>8}")
+    for name, make_call in cases:
+        durations = await timed(args.runs, make_call)
+        p95 = durations[min(len(durations) - 1, int(len(durations) * 0.95))]
+        print(f"{name:<36} {statistics.median(durations):>8.2f} {p95:>8.2f}")
+
+
+async def _then(fetch, serialize):
+    return await serialize(await fetch)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,110 @@
+"""
+Benchmark de /api/v1/workouts/stats para um usuário com muitos treinos.
+
+Executa, a partir da pasta backend (com o banco em DATABASE_URL migrado):
+    python -m benchmarks.bench_workout_stats [--workouts 10000] [--runs 30]
+
+Cria (uma única vez) o usuário bench-stats@evorun.local com o número pedido de
+treinos e compara a agregação no banco (crud.get_workout_stats) com a
+alternativa de carregar todos os treinos e agregar em Python.
+"""
+import argparse
+import asyncio
+import datetime
+import random
+import statistics
+import time
+from collections import defaultdict
+
+from sqlalchemy import func, insert, select
+
+import crud, models
+from database import AsyncSessionLocal, SessionLocal
+from workout_types import WorkoutType
+
+BENCH_EMAIL = "bench-stats@evorun.local"
+
+
+def seed(workouts: int) -> int:
+    """Garante que o usuário de benchmark exista com `workouts` treinos."""
+    with SessionLocal() as db:
+        user = db.query(models.User).filter(models.User.email == BENCH_EMAIL).first()
+        if user is None:
+            user = models.User(email=BENCH_EMAIL, hashed_password="!")
+            db.add(user)
+            db.commit()
+        existing = db.scalar(select(func.count()).where(models.Workout.owner_id == user.id))
+        missing = workouts - existing
+        if missing > 0:
+            rng = random.Random(42)
+            first_day = datetime.datetime(2015, 1, 1)
+            db.execute(insert(models.Workout), [
+                {
+                    "owner_id": user.id,
+                    "workout_type": rng.choice(list(WorkoutType)),
+                    "workout_date": first_day + datetime.timedelta(minutes=rng.randrange(10 * 365 * 24 * 60)),
+                    "duration_minutes": rng.randint(15, 120),
+                    "distance_km": round(rng.uniform(2, 40), 2),
+                    "details": {},
+                }
+                for _ in range(missing)
+            ])
+            db.commit()
+        return user.id
+
+
+async def aggregate_in_python(user_id: int) -> int:
+    """Alternativa sem GROUP BY: transfere todas as linhas e soma na aplicação."""
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(models.Workout.workout_date, models.Workout.workout_type,
+                   models.Workout.duration_minutes, models.Workout.distance_km)
+            .where(models.Workout.owner_id == user_id, models.Workout.deleted_at.is_(None))
+        )
+        totals = defaultdict(lambda: [0, 0, 0.0])
+        for workout_date, workout_type, duration, distance in result:
+            week = workout_date.date() - datetime.timedelta(days=workout_date.weekday())
+            bucket = totals[(week, workout_type)]
+            bucket[0] += 1
+            bucket[1] += duration or 0
+            bucket[2] += distance or 0.0
+        return len(totals)
+
+
+async def aggregate_in_database(user_id: int, period: str) -> int:
+    async with AsyncSessionLocal() as db:
+        return len(await crud.get_workout_stats(db, user_id=user_id, period=period))
+
+
+async def timed(runs: int, make_call) -> list[float]:
+    await make_call()  # aquecimento (conexão e plano de execução)
+    durations = []
+    for _ in range(runs):
+        started_at = time.perf_counter()
+        await make_call()
+        durations.append((time.perf_counter() - started_at) * 1000)
+    return durations
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workouts", type=int, default=10000)
+    parser.add_argument("--runs", type=int, default=30)
+    args = parser.parse_args()
+
+    user_id = seed(args.workouts)
+    print(f"usuário {BENCH_EMAIL}: {args.workouts} treinos, {args.runs} execuções")
+    print(f"{'cenário':<24} {'p50 ms':>8} {'p95 ms':>8} {'linhas':>7}")
+
+    cases = [(f"SQL period={period}", lambda period=period: aggregate_in_database(user_id, period))
+             for period in ("day", "week", "month")]
+    cases.append(("Python (week)", lambda: aggregate_in_python(user_id)))
+    for name, make_call in cases:
+        rows = await make_call()
+        durations = sorted(await timed(args.runs, make_call))
+        p95 = durations[min(len(durations) - 1, int(len(durations) * 0.95))]
+        print(f"{name:<24} {statistics.median(durations):>8.1f} {p95:>8.1f} {rows:>7}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
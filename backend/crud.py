@@ -1,54 +1,123 @@
-from sqlalchemy.orm import Session
+import datetime
+from collections import defaultdict
+from sqlalchemy import Date, Integer, and_, cast, column, extract, func, insert, select, table, tuple_, update
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+from sqlalchemy.orm.attributes import set_committed_value
 import models, schemas
-from security import get_password_hash
-from security import verify_password
+from principal_cache import principal_cache
+from rollups import WORKOUT_FIELDS, RollupDelta, workout_values
+from security import password_hasher
+
+# Colunas de schemas.Workout. As listagens selecionam só elas, como tuplas,
+# sem criar objetos ORM (identity map, estado de instância etc.).
+WORKOUT_LIST_COLUMNS = (
+    models.Workout.id,
+    models.Workout.owner_id,
+    models.Workout.workout_type,
+    models.Workout.workout_date,
+    models.Workout.duration_minutes,
+    models.Workout.distance_km,
+    models.Workout.details,
+)
 
 # --- Funções de Autenticação (Auth) ---
 
-def authenticate_user(db: Session, email: str, password: str):
+async def authenticate_user(db: AsyncSession, email: str, password: str):
     """
     Verifica se um usuário existe e se a senha está correta.
     """
-    user = get_user_by_email(db, email=email)
+    user = await get_user_by_email(db, email=email)
     if not user:
         return None # Usuário não encontrado
-    if not verify_password(password, user.hashed_password):
+    if not await password_hasher.verify(password, user.hashed_password):
         return None # Senha incorreta
     return user
 
 # --- Funções de Leitura (Read) ---
 
-def get_user(db: Session, user_id: int):
+async def get_user(db: AsyncSession, user_id: int):
     """
     Busca um único usuário pelo seu ID.
     - db: A sessão do banco de dados.
     - user_id: O ID do usuário a ser buscado.
     """
-    return db.query(models.User).filter(models.User.id == user_id).first()
+    result = await db.execute(select(models.User).filter(models.User.id == user_id))
+    return result.scalars().first()
 
 
-def get_user_by_email(db: Session, email: str):
+async def get_user_by_email(db: AsyncSession, email: str):
     """
     Busca um único usuário pelo seu e-mail.
     - db: A sessão do banco de dados.
     - email: O e-mail do usuário a ser buscado.
     """
-    return db.query(models.User).filter(models.User.email == email).first()
+    result = await db.execute(select(models.User).filter(models.User.email == email))
+    return result.scalars().first()
 
 
-def get_users(db: Session, skip: int = 0, limit: int = 100):
+async def get_users(db: AsyncSession, limit: int = 100, after_id: int | None = None, skip: int = 0):
     """
-    Busca uma lista de usuários com paginação.
+    Busca uma lista de usuários ordenada por ID, com paginação por cursor.
     - db: A sessão do banco de dados.
-    - skip: O número de registros a pular.
     - limit: O número máximo de registros a retornar.
+    - after_id: ID do último usuário da página anterior (cursor).
+    - skip: Offset legado, usado apenas quando não há cursor.
     """
-    return db.query(models.User).offset(skip).limit(limit).all()
+    query = select(models.User).order_by(models.User.id)
+    if after_id is not None:
+        query = query.filter(models.User.id > after_id)
+    elif skip:
+        query = query.offset(skip)
+    result = await db.execute(query.limit(limit))
+    return result.scalars().all()
+
+
+async def load_recent_workouts(db: AsyncSession, users: list[models.User], limit: int):
+    """
+    Carrega os `limit` treinos mais recentes de cada usuário em uma única
+    consulta (IN pelos IDs, como um selectinload, mas limitada por usuário)
+    e os atribui a `user.workouts` sem marcar o objeto como alterado.
+    - db: A sessão do banco de dados.
+    - users: Os usuários (obtidos do banco) que terão os treinos embutidos.
+    - limit: Número máximo de treinos por usuário.
+    """
+    if not users:
+        return users
+    # Numera os treinos de cada usuário, do mais recente para o mais antigo
+    ranked = (
+        select(
+            models.Workout,
+            func.row_number()
+            .over(
+                partition_by=models.Workout.owner_id,
+                order_by=(models.Workout.workout_date.desc(), models.Workout.id.desc()),
+            )
+            .label("position"),
+        )
+        .filter(models.Workout.owner_id.in_([user.id for user in users]), models.Workout.deleted_at.is_(None))
+        .subquery()
+    )
+    workout = aliased(models.Workout, ranked)
+    query = (
+        select(workout)
+        .filter(ranked.c.position <= limit)
+        .order_by(ranked.c.owner_id, ranked.c.position)
+    )
+    result = await db.execute(query)
+
+    workouts_by_owner = defaultdict(list)
+    for db_workout in result.scalars():
+        workouts_by_owner[db_workout.owner_id].append(db_workout)
+    for user in users:
+        set_committed_value(user, "workouts", workouts_by_owner[user.id])
+    return users
 
 
 # --- Funções de Criação (Create) ---
 
-def create_user(db: Session, user: schemas.UserCreate):
+async def create_user(db: AsyncSession, user: schemas.UserCreate):
     """
     Cria um novo usuário no banco de dados com senha hasheada.
     - db: A sessão do banco de dados.
@@ -56,27 +125,27 @@ def create_user(db: Session, user: schemas.UserCreate):
     """
 
     # Gera o hash da senha recebida no schema
-    hashed_password = get_password_hash(user.password)
-    
+    hashed_password = await password_hasher.hash(user.password)
+
     # Cria a instância do modelo com a senha hasheada
     db_user = models.User(
-        email=user.email, 
+        email=user.email,
         hashed_password=hashed_password
     )
-    
+
     # Adiciona a nova instância à sessão do banco de dados
     db.add(db_user)
     # Confirma (persiste) as mudanças no banco
-    db.commit()
+    await db.commit()
     # Atualiza a instância db_user com os dados do banco (como o ID gerado)
-    db.refresh(db_user)
-    
+    await db.refresh(db_user)
+
     return db_user
 
 
 # --- Funções de Atualização (Update) ---
 
-def update_user(db: Session, db_user: models.User, user_in: schemas.UserUpdate):
+async def update_user(db: AsyncSession, db_user: models.User, user_in: schemas.UserUpdate):
     """
     Atualiza um usuário no banco de dados.
     - db: A sessão do banco de dados.
@@ -85,10 +154,11 @@ def update_user(db: Session, db_user: models.User, user_in: schemas.UserUpdate):
     """
     # Converte o schema Pydantic para um dicionário, excluindo campos não definidos
     update_data = user_in.model_dump(exclude_unset=True)
+    previous_email = db_user.email
 
     # Se a senha estiver sendo atualizada, faz o hash da nova senha
     if "password" in update_data:
-        hashed_password = get_password_hash(update_data["password"])
+        hashed_password = await password_hasher.hash(update_data["password"])
         update_data["hashed_password"] = hashed_password
         del update_data["password"] # Remove a senha em texto puro
 
@@ -97,65 +167,409 @@ def update_user(db: Session, db_user: models.User, user_in: schemas.UserUpdate):
         setattr(db_user, field, value)
 
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
+
+    # O snapshot em cache é indexado pelo e-mail (o "sub" do token)
+    await principal_cache.invalidate(previous_email)
+    if db_user.email != previous_email:
+        await principal_cache.invalidate(db_user.email)
     return db_user
 
 
 # --- Funções de Remoção (Delete) ---
 
-def delete_user(db: Session, user_id: int):
+async def delete_user(db: AsyncSession, user_id: int):
     """
     Deleta um usuário do banco de dados.
     - db: A sessão do banco de dados.
     - user_id: O ID do usuário a ser deletado.
     """
-    db_user = db.query(models.User).filter(models.User.id == user_id).first()
+    db_user = await get_user(db, user_id=user_id)
     if db_user:
-        db.delete(db_user)
-        db.commit()
+        # O ORM desassocia os treinos do usuário removido; eles precisam estar
+        # carregados, pois lazy loads não são permitidos em uma AsyncSession.
+        await db.refresh(db_user, attribute_names=["workouts"])
+        await db.delete(db_user)
+        await db.commit()
+        await principal_cache.invalidate(db_user.email)
     return db_user
 
 # --- Funções CRUD para Workouts ---
 
-def create_user_workout(db: Session, workout: schemas.WorkoutCreate, user_id: int):
+async def create_user_workout(db: AsyncSession, workout: schemas.WorkoutCreate, user_id: int):
     """
     Cria um novo treino para um usuário específico.
+    Os rollups diários são atualizados na mesma transação.
     """
     db_workout = models.Workout(**workout.model_dump(), owner_id=user_id)
     db.add(db_workout)
-    db.commit()
-    db.refresh(db_workout)
+    # O flush aplica os defaults (ex.: workout_date) antes do cálculo do rollup
+    await db.flush()
+    delta = RollupDelta(user_id)
+    delta.add_workout(db_workout)
+    await delta.apply(db)
+    await db.commit()
+    await db.refresh(db_workout)
     return db_workout
 
-def get_workouts_by_user(db: Session, user_id: int, skip: int = 0, limit: int = 100):
+async def get_workouts_by_user(
+    db: AsyncSession,
+    user_id: int,
+    limit: int = 100,
+    after: tuple[datetime.datetime, int] | None = None,
+    skip: int = 0,
+):
     """
-    Busca todos os treinos de um usuário específico com paginação.
+    Busca os treinos de um usuário ordenados por (workout_date, id).
+    Retorna linhas com as colunas de WORKOUT_LIST_COLUMNS, não objetos ORM.
+    - after: Chave (workout_date, id) do último treino da página anterior (cursor).
+      A busca continua a partir dela pelo índice, sem percorrer as páginas anteriores.
+    - skip: Offset legado, usado apenas quando não há cursor.
     """
-    return db.query(models.Workout).filter(models.Workout.owner_id == user_id).offset(skip).limit(limit).all()
+    query = (
+        select(*WORKOUT_LIST_COLUMNS)
+        .filter(models.Workout.owner_id == user_id, models.Workout.deleted_at.is_(None))
+        .order_by(models.Workout.workout_date, models.Workout.id)
+    )
+    if after is not None:
+        query = query.filter(tuple_(models.Workout.workout_date, models.Workout.id) > tuple_(*after))
+    elif skip:
+        query = query.offset(skip)
+    result = await db.execute(query.limit(limit))
+    return result.all()
 
-def get_workout(db: Session, workout_id: int):
+async def stream_user_workouts(db: AsyncSession, user_id: int, batch_size: int = 1000):
     """
-    Busca um único treino pelo seu ID.
+    Percorre todos os treinos de um usuário, ordenados por (workout_date, id),
+    com um cursor do lado do servidor: produz listas de até `batch_size` linhas
+    (colunas de WORKOUT_LIST_COLUMNS) sem carregar o histórico inteiro.
     """
-    return db.query(models.Workout).filter(models.Workout.id == workout_id).first()
+    result = await db.stream(
+        select(*WORKOUT_LIST_COLUMNS)
+        .filter(models.Workout.owner_id == user_id, models.Workout.deleted_at.is_(None))
+        .order_by(models.Workout.workout_date, models.Workout.id)
+        .execution_options(yield_per=batch_size)
+    )
+    async for rows in result.partitions():
+        yield rows
 
-def update_workout(db: Session, db_workout: models.Workout, workout_in: schemas.WorkoutUpdate):
+async def get_workout_changes(
+    db: AsyncSession,
+    user_id: int,
+    limit: int = 500,
+    after: tuple[datetime.datetime, int] | None = None,
+    include_deleted: bool = True,
+):
+    """
+    Busca os treinos de um usuário alterados depois da chave `after`,
+    ordenados por (updated_at, id). Inclui os excluídos (tombstones), para que
+    o cliente remova suas cópias locais. Retorna linhas com as colunas de
+    WORKOUT_LIST_COLUMNS mais updated_at e deleted_at, não objetos ORM.
+    - after: Chave (updated_at, id) da última alteração já recebida pelo cliente.
+    - include_deleted: False na sincronização inicial, quando não há o que remover.
+    """
+    query = (
+        select(*WORKOUT_LIST_COLUMNS, models.Workout.updated_at, models.Workout.deleted_at)
+        .filter(models.Workout.owner_id == user_id)
+        .order_by(models.Workout.updated_at, models.Workout.id)
+    )
+    if after is not None:
+        query = query.filter(tuple_(models.Workout.updated_at, models.Workout.id) > tuple_(*after))
+    if not include_deleted:
+        query = query.filter(models.Workout.deleted_at.is_(None))
+    result = await db.execute(query.limit(limit))
+    return result.all()
+
+async def get_time_zone_names(db: AsyncSession) -> frozenset[str]:
+    """
+    Nomes de fuso horário conhecidos pelo Postgres (pg_timezone_names), os
+    únicos aceitos por AT TIME ZONE/timezone() nas agregações por dia.
+    """
+    result = await db.execute(select(column("name")).select_from(table("pg_timezone_names")))
+    return frozenset(result.scalars())
+
+
+async def get_workout_stats(
+    db: AsyncSession,
+    user_id: int,
+    period: str,
+    tz: str = "UTC",
+    start: datetime.datetime | None = None,
+    end: datetime.datetime | None = None,
+):
+    """
+    Agrega os treinos do usuário por período e tipo de treino, no próprio banco
+    (GROUP BY sobre date_trunc), sem carregar os treinos na aplicação.
+    - period: "day", "week" ou "month".
+    - tz: Fuso horário (IANA) que define onde começa cada dia/semana/mês.
+    - start/end: Intervalo [start, end) sobre workout_date.
+    """
+    workout = models.Workout
+    # workout_date é gravado em UTC sem fuso; converte para o horário local do usuário
+    local_date = func.timezone(tz, func.timezone("UTC", workout.workout_date))
+    period_start = cast(func.date_trunc(period, local_date), Date)
+
+    rows = (
+        select(period_start.label("period_start"), workout.workout_type, workout.duration_minutes, workout.distance_km)
+        .filter(workout.owner_id == user_id, workout.deleted_at.is_(None))
+    )
+    if start is not None:
+        rows = rows.filter(workout.workout_date >= start)
+    if end is not None:
+        rows = rows.filter(workout.workout_date < end)
+    rows = rows.subquery()
+
+    # O pace só considera treinos com distância e duração informadas
+    has_pace = and_(rows.c.distance_km > 0, rows.c.duration_minutes.is_not(None))
+    query = (
+        select(
+            rows.c.period_start,
+            rows.c.workout_type,
+            func.count().label("count"),
+            func.coalesce(func.sum(rows.c.duration_minutes), 0).label("total_duration_minutes"),
+            func.coalesce(func.sum(rows.c.distance_km), 0).label("total_distance_km"),
+            (
+                func.sum(rows.c.duration_minutes).filter(has_pace)
+                / func.nullif(func.sum(rows.c.distance_km).filter(has_pace), 0)
+            ).label("avg_pace_min_per_km"),
+        )
+        .group_by(rows.c.period_start, rows.c.workout_type)
+        .order_by(rows.c.period_start, rows.c.workout_type)
+    )
+    result = await db.execute(query)
+    return result.mappings().all()
+
+async def get_daily_rollups(db: AsyncSession, user_id: int, end: datetime.date):
+    """
+    Busca os totais diários (user_daily_rollups) de um usuário até `end`:
+    linhas (day, workout_type, duration_minutes, distance_km, elevation_level).
+    """
+    rollup = models.UserDailyRollup
+    result = await db.execute(
+        select(rollup.day, rollup.workout_type, rollup.duration_minutes, rollup.distance_km, rollup.elevation_level)
+        .filter(rollup.user_id == user_id, rollup.day <= end)
+    )
+    return result.all()
+
+async def get_workout_calendar(
+    db: AsyncSession,
+    user_id: int,
+    start: datetime.datetime,
+    end: datetime.datetime,
+    tz: str = "UTC",
+):
+    """
+    Retorna os pares distintos (dia do mês, tipo de treino) do usuário no
+    intervalo [start, end). Lê apenas colunas do índice ix_workouts_calendar
+    (index-only scan), sem visitar as linhas da tabela.
+    - tz: Fuso horário (IANA) em que o dia do mês é calculado.
+    """
+    workout = models.Workout
+    local_date = func.timezone(tz, func.timezone("UTC", workout.workout_date))
+    query = (
+        select(cast(extract("day", local_date), Integer).label("day"), workout.workout_type)
+        .filter(
+            workout.owner_id == user_id,
+            workout.deleted_at.is_(None),
+            workout.workout_date >= start,
+            workout.workout_date < end,
+        )
+        .distinct()
+    )
+    result = await db.execute(query)
+    return result.all()
+
+async def get_workout(db: AsyncSession, workout_id: int, for_update: bool = False):
+    """
+    Busca um único treino (não excluído) pelo seu ID.
+    - for_update: Trava a linha (SELECT ... FOR UPDATE) até o fim da transação.
+      Usado antes de alterar ou excluir o treino: a variação dos rollups é
+      calculada a partir do estado lido, e uma escrita concorrente do mesmo
+      treino (ex.: um DELETE repetido) precisa esperar e reler esse estado.
+    """
+    query = select(models.Workout).filter(models.Workout.id == workout_id, models.Workout.deleted_at.is_(None))
+    if for_update:
+        query = query.with_for_update().execution_options(populate_existing=True)
+    result = await db.execute(query)
+    return result.scalars().first()
+
+async def update_workout(db: AsyncSession, db_workout: models.Workout, workout_in: schemas.WorkoutUpdate):
     """
     Atualiza um treino com os dados fornecidos.
+    Os rollups diários recebem a diferença entre o treino antigo e o novo.
     """
+    delta = RollupDelta(db_workout.owner_id)
+    delta.add_workout(db_workout, sign=-1)
     update_data = workout_in.model_dump(exclude_unset=True)
     for key, value in update_data.items():
         setattr(db_workout, key, value)
+    delta.add_workout(db_workout)
     db.add(db_workout)
-    db.commit()
-    db.refresh(db_workout)
+    await delta.apply(db)
+    await db.commit()
+    await db.refresh(db_workout)
     return db_workout
 
-def delete_workout(db: Session, db_workout: models.Workout):
+async def delete_workout(db: AsyncSession, db_workout: models.Workout):
     """
-    Exclui um treino do banco de dados.
+    Exclui um treino logicamente: ele some das consultas, mas continua no
+    banco como tombstone para a sincronização incremental dos clientes.
     """
-    db.delete(db_workout)
-    db.commit()
+    delta = RollupDelta(db_workout.owner_id)
+    delta.add_workout(db_workout, sign=-1)
+    db_workout.deleted_at = datetime.datetime.now(datetime.timezone.utc)
+    db.add(db_workout)
+    await delta.apply(db)
+    await db.commit()
     return db_workout
+
+async def get_owned_workouts(db: AsyncSession, user_id: int, workout_ids: list[int], for_update: bool = False):
+    """
+    Retorna {id: treino} dos treinos da lista que pertencem ao usuário, em
+    uma única consulta. IDs inexistentes ou de outros usuários ficam de fora.
+    - for_update: Trava as linhas até o fim da transação (ver get_workout),
+      sempre na ordem dos IDs, para que dois lotes concorrentes não se travem
+      mutuamente.
+    """
+    if not workout_ids:
+        return {}
+    query = (
+        select(models.Workout)
+        .filter(
+            models.Workout.id.in_(workout_ids),
+            models.Workout.owner_id == user_id,
+            models.Workout.deleted_at.is_(None),
+        )
+    )
+    if for_update:
+        query = query.order_by(models.Workout.id).with_for_update().execution_options(populate_existing=True)
+    result = await db.execute(query)
+    return {db_workout.id: db_workout for db_workout in result.scalars()}
+
+async def get_existing_workout_dates(db: AsyncSession, user_id: int, dates: list[datetime.datetime]) -> set:
+    """
+    Quais das datas já têm um treino (não excluído) do usuário. Usado pela
+    importação para não duplicar atividades importadas mais de uma vez.
+    """
+    result = await db.execute(
+        select(models.Workout.workout_date)
+        .filter(models.Workout.owner_id == user_id, models.Workout.deleted_at.is_(None), models.Workout.workout_date.in_(dates))
+    )
+    return set(result.scalars())
+
+async def import_user_workouts(db: AsyncSession, user_id: int, workouts: list[dict], tracks: list[tuple | None]):
+    """
+    Grava treinos importados e suas trilhas em uma única transação.
+    - workouts: Valores dos treinos (formato de schemas.WorkoutCreate).
+    - tracks: Para cada treino, None quando não há trilha ou o par (colunas de
+      models.WorkoutTrack, {max_points: colunas de models.WorkoutTrackLevel}),
+      como produzidos por track_codec.encode_track e track_simplify.encode_track_levels.
+    Retorna os IDs gerados, na ordem de `workouts`.
+    """
+    delta = RollupDelta(user_id)
+    for values in workouts:
+        delta.add_values(values)
+    result = await db.execute(
+        insert(models.Workout).returning(models.Workout.id, sort_by_parameter_order=True),
+        [{**values, "owner_id": user_id} for values in workouts],
+    )
+    workout_ids = list(result.scalars())
+    track_rows, level_rows = [], []
+    for workout_id, track in zip(workout_ids, tracks):
+        if track is None:
+            continue
+        columns, levels = track
+        track_rows.append({**columns, "workout_id": workout_id})
+        level_rows.extend(
+            {**level_columns, "workout_id": workout_id, "max_points": max_points}
+            for max_points, level_columns in levels.items()
+        )
+    if track_rows:
+        await db.execute(insert(models.WorkoutTrack), track_rows)
+        await db.execute(insert(models.WorkoutTrackLevel), level_rows)
+    await delta.apply(db)
+    await db.commit()
+    return workout_ids
+
+async def get_workout_track(db: AsyncSession, workout_id: int):
+    """Busca a trilha de um treino (models.WorkoutTrack) ou None se ele não tiver."""
+    result = await db.execute(select(models.WorkoutTrack).filter(models.WorkoutTrack.workout_id == workout_id))
+    return result.scalars().first()
+
+async def get_workout_track_level(db: AsyncSession, workout_id: int, max_points: int):
+    """Busca um nível de detalhe da trilha (models.WorkoutTrackLevel) ou None."""
+    result = await db.execute(
+        select(models.WorkoutTrackLevel)
+        .filter(models.WorkoutTrackLevel.workout_id == workout_id, models.WorkoutTrackLevel.max_points == max_points)
+    )
+    return result.scalars().first()
+
+async def save_workout_track_levels(db: AsyncSession, workout_id: int, levels: dict[int, dict]):
+    """
+    Grava os níveis de detalhe de uma trilha que ainda não os tinha.
+    Níveis gravados ao mesmo tempo por outra requisição são mantidos.
+    """
+    await db.execute(
+        postgresql.insert(models.WorkoutTrackLevel).on_conflict_do_nothing(),
+        [{**columns, "workout_id": workout_id, "max_points": max_points} for max_points, columns in levels.items()],
+    )
+    await db.commit()
+
+async def apply_workout_batch(
+    db: AsyncSession,
+    user_id: int,
+    creates: list[dict],
+    updates: list[dict],
+    delete_ids: list[int],
+    existing: dict[int, models.Workout],
+):
+    """
+    Aplica um lote de operações de treino em uma única transação.
+    - creates: Valores dos novos treinos, inseridos com um INSERT multi-linha.
+    - updates: Valores a alterar, cada um com a chave primária 'id'
+      (o dono já deve ter sido verificado).
+    - delete_ids: IDs a excluir (logicamente); as exclusões são aplicadas por último.
+    - existing: Os treinos referenciados por updates e delete_ids, no estado
+      anterior ao lote e travados na transação (get_owned_workouts com
+      for_update), para o cálculo dos rollups.
+    Retorna os IDs gerados para `creates`, na mesma ordem.
+    """
+    # Variação dos rollups, simulando as operações na ordem em que são gravadas
+    delta = RollupDelta(user_id)
+    for values in creates:
+        delta.add_values(values)
+    current = {workout_id: workout_values(db_workout) for workout_id, db_workout in existing.items()}
+    for values in updates:
+        delta.add_values(current[values["id"]], sign=-1)
+        current[values["id"]] = {**current[values["id"]], **values}
+        delta.add_values(current[values["id"]])
+
+    created_ids = []
+    if creates:
+        result = await db.execute(
+            insert(models.Workout).returning(models.Workout.id, sort_by_parameter_order=True),
+            [{**values, "owner_id": user_id} for values in creates],
+        )
+        created_ids = list(result.scalars())
+    if updates:
+        # UPDATE em massa pela chave primária (executemany)
+        await db.execute(update(models.Workout), updates)
+    if delete_ids:
+        # Só treinos ainda não excluídos; a variação sai das linhas de fato excluídas
+        result = await db.execute(
+            update(models.Workout)
+            .filter(
+                models.Workout.id.in_(delete_ids),
+                models.Workout.owner_id == user_id,
+                models.Workout.deleted_at.is_(None),
+            )
+            .values(deleted_at=datetime.datetime.now(datetime.timezone.utc))
+            .returning(*(getattr(models.Workout, field) for field in WORKOUT_FIELDS))
+            .execution_options(synchronize_session=False)
+        )
+        for row in result.mappings():
+            delta.add_values(row, sign=-1)
+    await delta.apply(db)
+    await db.commit()
+    return created_ids
@@ -0,0 +1,212 @@
+"""
+Jobs de importação de atividades (POST /workouts/import).
+
+O arquivo enviado (um GPX/TCX ou um zip com centenas deles) é salvo em disco
+e processado em segundo plano, no próprio processo: os arquivos são lidos em
+lotes por uma thread (track_import) e cada lote é gravado, com as trilhas,
+por INSERTs multi-linha. O cliente acompanha o progresso consultando o job.
+
+Os jobs vivem na memória do worker que recebeu o upload. Com vários workers,
+a consulta do progresso precisa chegar ao mesmo worker (afinidade de sessão)
+ou o job será dado como inexistente.
+"""
+import asyncio
+import datetime
+import os
+import time
+import uuid
+import zipfile
+from dataclasses import dataclass, field
+from typing import Optional
+
+from pydantic import ValidationError
+
+import crud, schemas
+from config import settings
+from database import AsyncSessionLocal
+from track_codec import encode_track
+from track_import import TrackImportError, parse_activity
+from track_simplify import encode_track_levels
+from workout_types import WorkoutType
+
+
+def _utcnow() -> datetime.datetime:
+    return datetime.datetime.now(datetime.timezone.utc)
+
+
+def _as_stored(value: datetime.datetime) -> datetime.datetime:
+    """Data como o banco a devolve (UTC, sem tzinfo), para comparar com treinos existentes."""
+    if value.tzinfo is not None:
+        value = value.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    return value
+
+
+@dataclass
+class ImportJob:
+    """Estado de uma importação, exposto como schemas.WorkoutImportJob."""
+    id: str
+    user_id: int
+    filename: str
+    workout_type: Optional[WorkoutType] = None
+    status: str = "pending"
+    total_files: int = 0
+    processed_files: int = 0
+    created: int = 0
+    # Atividades que já existiam (mesmo usuário e mesma data/hora de início)
+    skipped: int = 0
+    errors: list = field(default_factory=list)
+    created_at: datetime.datetime = field(default_factory=_utcnow)
+    finished_at: Optional[datetime.datetime] = None
+    task: Optional[asyncio.Task] = field(default=None, repr=False)
+
+
+class ImportJobManager:
+    """Registro em memória dos jobs de importação deste worker."""
+
+    def __init__(self, max_concurrent_jobs: int, ttl_seconds: float, chunk_size: int):
+        self.ttl_seconds = ttl_seconds
+        self.chunk_size = chunk_size
+        self._jobs: dict[str, ImportJob] = {}
+        self._expires_at: dict[str, float] = {}
+        # Limita quantas importações disputam o event loop e o banco ao mesmo tempo
+        self._slots = asyncio.Semaphore(max_concurrent_jobs)
+
+    def create(self, user_id: int, path: str, filename: str, workout_type: Optional[WorkoutType] = None) -> ImportJob:
+        """Registra o job e agenda o processamento do arquivo salvo em `path`."""
+        self._prune()
+        job = ImportJob(id=uuid.uuid4().hex, user_id=user_id, filename=filename, workout_type=workout_type)
+        self._jobs[job.id] = job
+        job.task = asyncio.create_task(self._run(job, path))
+        return job
+
+    def get(self, job_id: str, user_id: int) -> Optional[ImportJob]:
+        """O job, se existir e pertencer ao usuário."""
+        job = self._jobs.get(job_id)
+        if job is None or job.user_id != user_id:
+            return None
+        return job
+
+    async def close(self):
+        """Interrompe os jobs em andamento (desligamento da aplicação)."""
+        tasks = [job.task for job in self._jobs.values() if job.task and not job.task.done()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _prune(self):
+        now = time.monotonic()
+        for job_id in [job_id for job_id, expires_at in self._expires_at.items() if expires_at < now]:
+            del self._jobs[job_id]
+            del self._expires_at[job_id]
+
+    async def _run(self, job: ImportJob, path: str):
+        try:
+            async with self._slots:
+                job.status = "running"
+                if job.filename.lower().endswith(".zip"):
+                    await self._import_zip(job, path)
+                else:
+                    job.total_files = 1
+                    await self._import_chunk(job, [(job.filename, lambda: open(path, "rb"))])
+                job.status = "completed"
+        except asyncio.CancelledError:
+            job.status = "failed"
+            job.errors.append({"file": job.filename, "error": "Importação interrompida."})
+            raise
+        except Exception as e:
+            job.status = "failed"
+            job.errors.append({"file": job.filename, "error": str(e) or type(e).__name__})
+        finally:
+            job.finished_at = _utcnow()
+            self._expires_at[job.id] = time.monotonic() + self.ttl_seconds
+            os.unlink(path)
+
+    async def _import_zip(self, job: ImportJob, path: str):
+        with zipfile.ZipFile(path) as archive:
+            members = [
+                member for member in archive.infolist()
+                if not member.is_dir() and not member.filename.startswith("__MACOSX/")
+            ]
+            if len(members) > settings.WORKOUT_IMPORT_MAX_FILES:
+                raise TrackImportError(f"O zip tem mais de {settings.WORKOUT_IMPORT_MAX_FILES} arquivos.")
+            # Tamanhos declarados no diretório do zip, verificados antes de abrir
+            # qualquer arquivo (a leitura de cada um para no tamanho declarado)
+            if sum(member.file_size for member in members) > settings.WORKOUT_IMPORT_MAX_UNCOMPRESSED_BYTES:
+                raise TrackImportError(
+                    f"O zip descomprimido tem mais de {settings.WORKOUT_IMPORT_MAX_UNCOMPRESSED_BYTES} bytes."
+                )
+            job.total_files = len(members)
+            too_large = [member for member in members if member.file_size > settings.WORKOUT_IMPORT_MAX_FILE_BYTES]
+            for member in too_large:
+                job.errors.append({
+                    "file": member.filename,
+                    "error": f"Arquivo com mais de {settings.WORKOUT_IMPORT_MAX_FILE_BYTES} bytes descomprimido.",
+                })
+            job.processed_files += len(too_large)
+            members = [member for member in members if member.file_size <= settings.WORKOUT_IMPORT_MAX_FILE_BYTES]
+            for start in range(0, len(members), self.chunk_size):
+                await self._import_chunk(job, [
+                    (member.filename, lambda member=member: archive.open(member))
+                    for member in members[start:start + self.chunk_size]
+                ])
+
+    async def _import_chunk(self, job: ImportJob, files: list):
+        """Lê um lote de arquivos (em uma thread) e grava os treinos válidos de uma vez."""
+        parsed = await asyncio.to_thread(_parse_files, files, job.workout_type)
+
+        workouts, tracks = [], []
+        for filename, result in parsed:
+            if isinstance(result, str):
+                job.errors.append({"file": filename, "error": result})
+                continue
+            values, track = result
+            try:
+                workouts.append(schemas.WORKOUT_CREATE_ADAPTER.validate_python(values).model_dump())
+                tracks.append(track)
+            except ValidationError as e:
+                message = "; ".join(f"{'.'.join(map(str, error['loc']))}: {error['msg']}" for error in e.errors())
+                job.errors.append({"file": filename, "error": message})
+
+        if workouts:
+            async with AsyncSessionLocal() as db:
+                existing = await crud.get_existing_workout_dates(
+                    db, job.user_id, [_as_stored(workout["workout_date"]) for workout in workouts]
+                )
+                creates, create_tracks = [], []
+                for workout, track in zip(workouts, tracks):
+                    workout_date = _as_stored(workout["workout_date"])
+                    if workout_date in existing:
+                        job.skipped += 1
+                        continue
+                    existing.add(workout_date)
+                    creates.append(workout)
+                    create_tracks.append(track)
+                if creates:
+                    await crud.import_user_workouts(db, user_id=job.user_id, workouts=creates, tracks=create_tracks)
+                    job.created += len(creates)
+        job.processed_files += len(files)
+
+
+def _parse_files(files: list, workout_type: Optional[WorkoutType]) -> list:
+    """
+    Lê cada arquivo de (nome, abrir). Retorna (nome, (valores do treino,
+    trilha codificada com seus níveis de detalhe, ou None)) ou (nome,
+    mensagem de erro) para os que não puderam ser lidos.
+    """
+    parsed = []
+    for filename, open_file in files:
+        try:
+            with open_file() as source:
+                values, track = parse_activity(filename, source, workout_type)
+            encoded = (encode_track(track), encode_track_levels(track)) if track is not None else None
+            parsed.append((filename, (values, encoded)))
+        except (TrackImportError, OSError, zipfile.BadZipFile) as e:
+            parsed.append((filename, str(e)))
+    return parsed
+
+
+import_jobs = ImportJobManager(
+    max_concurrent_jobs=settings.WORKOUT_IMPORT_MAX_CONCURRENT_JOBS,
+    ttl_seconds=settings.WORKOUT_IMPORT_JOB_TTL_SECONDS,
+    chunk_size=settings.WORKOUT_IMPORT_CHUNK_SIZE,
+)
@@ -1,11 +1,15 @@
 import asyncio
 import sys
 from contextlib import asynccontextmanager
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, status
+from fastapi.responses import JSONResponse
 # CORREÇÃO: As importações agora são relativas à nova estrutura
-from api.v1.endpoints import users, login, workouts
-from database import engine
-import models
+from api.v1.endpoints import users, login, workouts, analytics, internal
+from api.v1.upload_limit import MULTIPART_OVERHEAD_BYTES, BodySizeLimitMiddleware
+from config import settings
+from import_jobs import import_jobs
+from principal_cache import principal_cache
+from security import PasswordHasherBusy, password_hasher
 
 # Adiciona uma correção para um problema comum do asyncio no Windows
 if sys.platform == "win32":
@@ -13,10 +17,16 @@ if sys.platform == "win32":
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Código a ser executado durante a inicialização
+    # Código a ser executado durante a inicialização.
+    # O esquema do banco é gerenciado pelas migrações (alembic upgrade head),
+    # executadas no deploy, e não a cada boot dos workers.
     print("Iniciando a aplicação...")
-    models.Base.metadata.create_all(bind=engine)
+    await principal_cache.start()
+    password_hasher.start()
     yield
+    await import_jobs.close()
+    password_hasher.shutdown()
+    await principal_cache.close()
     # Código a ser executado durante o desligamento (se necessário)
     print("Aplicação encerrada.")
 
@@ -28,10 +38,27 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+# Rejeita rapidamente logins/cadastros quando o pool de hashing está saturado
+@app.exception_handler(PasswordHasherBusy)
+async def password_hasher_busy_handler(request: Request, exc: PasswordHasherBusy):
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Server busy, please retry"},
+        headers={"Retry-After": "1"},
+    )
+
+# Recusa uploads grandes demais antes de o corpo multipart ser lido por inteiro
+app.add_middleware(
+    BodySizeLimitMiddleware,
+    limits={"/api/v1/workouts/import": settings.WORKOUT_IMPORT_MAX_BYTES + MULTIPART_OVERHEAD_BYTES},
+)
+
 # Inclui os roteadores
 app.include_router(users.router, prefix="/api/v1/users", tags=["users"])
 app.include_router(login.router, prefix="/api/v1/login", tags=["login"])
 app.include_router(workouts.router, prefix="/api/v1/workouts", tags=["workouts"])
+app.include_router(analytics.router, prefix="/api/v1/analytics", tags=["analytics"])
+app.include_router(internal.router, prefix="/api/v1/internal", tags=["internal"])
 
 # Define um endpoint para a rota raiz ("/")
 @app.get("/")
@@ -0,0 +1,34 @@
+"""Índice (owner_id, workout_date) para as consultas de treinos por usuário.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-16 22:39:16.933326
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, Sequence[str], None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY não bloqueia escritas na tabela, mas não roda numa transação.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_workouts_owner_id_workout_date', 'workouts', ['owner_id', 'workout_date'],
+            unique=False, postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_workouts_owner_id_workout_date', table_name='workouts', postgresql_concurrently=True)
@@ -0,0 +1,43 @@
+"""Colunas updated_at e deleted_at em workouts para a sincronização incremental.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-16 23:12:40.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, Sequence[str], None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Os treinos existentes recebem o instante da migração (em UTC, como as
+    # demais datas). O default só serve para o preenchimento e é removido em seguida.
+    op.add_column('workouts', sa.Column(
+        'updated_at', sa.DateTime(), nullable=False, server_default=sa.text("timezone('utc', now())"),
+    ))
+    op.alter_column('workouts', 'updated_at', server_default=None)
+    op.add_column('workouts', sa.Column('deleted_at', sa.DateTime(), nullable=True))
+
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_workouts_owner_id_updated_at_id', 'workouts', ['owner_id', 'updated_at', 'id'],
+            unique=False, postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_workouts_owner_id_updated_at_id', table_name='workouts', postgresql_concurrently=True)
+    op.drop_column('workouts', 'deleted_at')
+    op.drop_column('workouts', 'updated_at')
@@ -0,0 +1,42 @@
+"""Tabela user_daily_rollups (totais diários por usuário e tipo de treino).
+
+Depois de aplicar, preencha-a com: python rebuild_rollups.py
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-16 22:48:04.659659
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, Sequence[str], None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('user_daily_rollups',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('workout_type', sa.Enum('running', 'cycling', 'swimming', 'weightlifting', 'stairs', name='workouttype', native_enum=False), nullable=False),
+    sa.Column('workout_count', sa.Integer(), nullable=False),
+    sa.Column('duration_minutes', sa.Integer(), nullable=False),
+    sa.Column('distance_km', sa.Float(), nullable=False),
+    sa.Column('elevation_level', sa.Integer(), nullable=False),
+    sa.Column('steps', sa.Integer(), nullable=False),
+    sa.Column('lifted_kg', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id', 'day', 'workout_type')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('user_daily_rollups')
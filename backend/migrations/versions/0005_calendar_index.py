@@ -0,0 +1,33 @@
+"""Índice parcial e de cobertura para o calendário mensal de treinos.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-16 22:49:46.489451
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, Sequence[str], None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_workouts_calendar', 'workouts', ['owner_id', 'workout_date', 'workout_type'],
+            unique=False, postgresql_where=sa.text('deleted_at IS NULL'), postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_workouts_calendar', table_name='workouts', postgresql_concurrently=True)
@@ -0,0 +1,42 @@
+"""Tabela workout_tracks (trilhas GPS em colunas binárias compactas).
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-16 23:03:11.676949
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, Sequence[str], None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('workout_tracks',
+    sa.Column('workout_id', sa.Integer(), nullable=False),
+    sa.Column('point_count', sa.Integer(), nullable=False),
+    sa.Column('latitudes', sa.LargeBinary(), nullable=False),
+    sa.Column('longitudes', sa.LargeBinary(), nullable=False),
+    sa.Column('elevations', sa.LargeBinary(), nullable=True),
+    sa.Column('times', sa.LargeBinary(), nullable=True),
+    sa.Column('heart_rates', sa.LargeBinary(), nullable=True),
+    sa.ForeignKeyConstraint(['workout_id'], ['workouts.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('workout_id')
+    )
+    # As colunas já chegam comprimidas (zlib): o TOAST as guarda fora da linha
+    # sem tentar comprimi-las de novo.
+    for column in ('latitudes', 'longitudes', 'elevations', 'times', 'heart_rates'):
+        op.execute(f'ALTER TABLE workout_tracks ALTER COLUMN {column} SET STORAGE EXTERNAL')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('workout_tracks')
@@ -0,0 +1,42 @@
+"""Tabela workout_track_levels (níveis de detalhe das trilhas GPS).
+
+As trilhas já gravadas recebem seus níveis na primeira leitura de
+/workouts/{id}/track.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-16 23:05:37.925879
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0007'
+down_revision: Union[str, Sequence[str], None] = '0006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('workout_track_levels',
+    sa.Column('workout_id', sa.Integer(), nullable=False),
+    sa.Column('max_points', sa.Integer(), nullable=False),
+    sa.Column('point_count', sa.Integer(), nullable=False),
+    sa.Column('latitudes', sa.LargeBinary(), nullable=False),
+    sa.Column('longitudes', sa.LargeBinary(), nullable=False),
+    sa.Column('elevations', sa.LargeBinary(), nullable=True),
+    sa.Column('times', sa.LargeBinary(), nullable=True),
+    sa.Column('heart_rates', sa.LargeBinary(), nullable=True),
+    sa.ForeignKeyConstraint(['workout_id'], ['workout_tracks.workout_id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('workout_id', 'max_points')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('workout_track_levels')
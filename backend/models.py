@@ -1,10 +1,25 @@
-from sqlalchemy import Boolean, Column, Integer, String, DateTime, ForeignKey, Float, Enum, JSON
+from sqlalchemy import Boolean, Column, Integer, String, Date, DateTime, ForeignKey, Float, Enum, JSON, Index, LargeBinary
 from sqlalchemy.orm import relationship
+from sqlalchemy.types import TypeDecorator
 import datetime
 
 from database import Base
 from workout_types import WorkoutType
 
+class UTCDateTime(TypeDecorator):
+    """
+    DateTime sem fuso horário que aceita datetimes "aware".
+    O asyncpg recusa datetimes com tzinfo em colunas TIMESTAMP; aqui eles são
+    convertidos para UTC e gravados sem o tzinfo, como o psycopg2 já fazia.
+    """
+    impl = DateTime
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is not None and value.tzinfo is not None:
+            value = value.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+        return value
+
 class User(Base):
     __tablename__ = "users"
 
@@ -20,8 +35,8 @@ class User(Base):
     height_cm = Column(Integer, nullable=True)
     training_days_per_week = Column(Integer, nullable=True)
 
-    created_at = Column(DateTime, default=lambda: datetime.datetime.now(datetime.timezone.utc))
-    updated_at = Column(DateTime, default=lambda: datetime.datetime.now(datetime.timezone.utc), onupdate=lambda: datetime.datetime.now(datetime.timezone.utc))
+    created_at = Column(UTCDateTime, default=lambda: datetime.datetime.now(datetime.timezone.utc))
+    updated_at = Column(UTCDateTime, default=lambda: datetime.datetime.now(datetime.timezone.utc), onupdate=lambda: datetime.datetime.now(datetime.timezone.utc))
 
     workouts = relationship("Workout", back_populates="owner")
     
@@ -43,12 +58,93 @@ class Workout(Base):
     distance_km = Column(Float, nullable=True)
     duration_minutes = Column(Integer, nullable=True)
     elevation_level = Column(Integer, nullable=True)
-    workout_date = Column(DateTime, default=lambda: datetime.datetime.now(datetime.timezone.utc))
+    workout_date = Column(UTCDateTime, default=lambda: datetime.datetime.now(datetime.timezone.utc))
+    # Usado pela sincronização incremental (/workouts/changes)
+    updated_at = Column(UTCDateTime, nullable=False, default=lambda: datetime.datetime.now(datetime.timezone.utc), onupdate=lambda: datetime.datetime.now(datetime.timezone.utc))
+    # Exclusão lógica: o registro fica como "tombstone" para os clientes removerem a cópia local
+    deleted_at = Column(UTCDateTime, nullable=True)
     
     owner_id = Column(Integer, ForeignKey("users.id"))
     owner = relationship("User", back_populates="workouts")
+    # A trilha nunca é carregada implicitamente: quem precisa dela a pede
+    # (selectinload ou crud.get_workout_track) e as listagens ficam leves.
+    track = relationship("WorkoutTrack", back_populates="workout", uselist=False, lazy="raise", passive_deletes=True)
+
+    __table_args__ = (
+        # Consultas por usuário ordenadas por data (listagem, calendário, cursor).
+        # Também atende buscas só por owner_id, já que é o prefixo do índice.
+        Index("ix_workouts_owner_id_workout_date", "owner_id", "workout_date"),
+        # Varredura das alterações de um usuário a partir do token de sincronização
+        Index("ix_workouts_owner_id_updated_at_id", "owner_id", "updated_at", "id"),
+        # Calendário: cobre a consulta (index-only scan) e ignora os excluídos
+        Index(
+            "ix_workouts_calendar", "owner_id", "workout_date", "workout_type",
+            postgresql_where=deleted_at.is_(None),
+        ),
+    )
 
     __mapper_args__ = {
         "confirm_deleted_rows": False,
     }
 
+
+class WorkoutTrack(Base):
+    """
+    Trilha GPS de um treino importado, uma coluna binária por grandeza
+    (delta + zlib, ver track_codec). Fica em uma tabela separada para que
+    workouts continue com linhas pequenas.
+    """
+    __tablename__ = "workout_tracks"
+
+    workout_id = Column(Integer, ForeignKey("workouts.id", ondelete="CASCADE"), primary_key=True)
+    point_count = Column(Integer, nullable=False)
+    latitudes = Column(LargeBinary, nullable=False)
+    longitudes = Column(LargeBinary, nullable=False)
+    elevations = Column(LargeBinary, nullable=True)
+    times = Column(LargeBinary, nullable=True)
+    heart_rates = Column(LargeBinary, nullable=True)
+
+    workout = relationship("Workout", back_populates="track")
+
+
+class WorkoutTrackLevel(Base):
+    """
+    Versão simplificada da trilha de um treino (ver track_simplify), com no
+    máximo `max_points` pontos, nas mesmas colunas de WorkoutTrack. É o que os
+    mapas leem, sem decodificar a trilha completa.
+    """
+    __tablename__ = "workout_track_levels"
+
+    workout_id = Column(Integer, ForeignKey("workout_tracks.workout_id", ondelete="CASCADE"), primary_key=True)
+    max_points = Column(Integer, primary_key=True)
+    point_count = Column(Integer, nullable=False)
+    latitudes = Column(LargeBinary, nullable=False)
+    longitudes = Column(LargeBinary, nullable=False)
+    elevations = Column(LargeBinary, nullable=True)
+    times = Column(LargeBinary, nullable=True)
+    heart_rates = Column(LargeBinary, nullable=True)
+
+
+class UserDailyRollup(Base):
+    """
+    Totais diários de cada usuário por tipo de treino, mantidos de forma
+    incremental pelas escritas em workouts (ver rollups.py). Permite ler os
+    totais do painel sem percorrer o histórico de treinos.
+    """
+    __tablename__ = "user_daily_rollups"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    # Dia (UTC) de workout_date
+    day = Column(Date, primary_key=True)
+    workout_type = Column(Enum(WorkoutType,
+                               native_enum=False,
+                               values_callable=lambda obj: [e.value for e in obj]),
+                          primary_key=True)
+
+    workout_count = Column(Integer, nullable=False, default=0)
+    duration_minutes = Column(Integer, nullable=False, default=0)
+    distance_km = Column(Float, nullable=False, default=0)
+    elevation_level = Column(Integer, nullable=False, default=0)
+    steps = Column(Integer, nullable=False, default=0)
+    # Volume levantado na musculação: séries x repetições x carga
+    lifted_kg = Column(Float, nullable=False, default=0)
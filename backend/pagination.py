@@ -0,0 +1,37 @@
+import base64
+import datetime
+import json
+
+
+def encode_cursor(*values) -> str:
+    """
+    Codifica a chave de ordenação do último item de uma página num cursor opaco.
+    Datas são serializadas em ISO 8601.
+    """
+    payload = [v.isoformat() if isinstance(v, datetime.datetime) else v for v in values]
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, *types) -> tuple:
+    """
+    Decodifica um cursor criado por encode_cursor, convertendo cada valor para
+    o tipo esperado. Lança ValueError se o cursor for inválido.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+    except (ValueError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
+    if not isinstance(payload, list) or len(payload) != len(types):
+        raise ValueError("Invalid cursor")
+    values = []
+    for value, expected_type in zip(payload, types):
+        if expected_type is datetime.datetime:
+            if not isinstance(value, str):
+                raise ValueError("Invalid cursor")
+            value = datetime.datetime.fromisoformat(value)
+        elif not isinstance(value, expected_type):
+            raise ValueError("Invalid cursor")
+        values.append(value)
+    return tuple(values)
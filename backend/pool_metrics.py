@@ -0,0 +1,114 @@
+import threading
+import time
+
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+# Limites superiores (em milissegundos) dos buckets do histograma de espera.
+WAIT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+
+class PoolMetrics:
+    """
+    Acumula métricas de checkout de um pool de conexões.
+
+    Cada processo (worker do uvicorn) tem o seu próprio pool, portanto os
+    números refletem apenas o processo que responde à requisição.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self.waiters = 0
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_sum_ms = 0.0
+        self.wait_max_ms = 0.0
+        self._bucket_counts = [0] * (len(WAIT_BUCKETS_MS) + 1)
+
+    def start_wait(self) -> float:
+        with self._lock:
+            self.waiters += 1
+        return time.perf_counter()
+
+    def end_wait(self, started_at: float, outcome: str):
+        """Registra o fim de uma espera; outcome é "ok", "timeout" ou "error"."""
+        elapsed_ms = (time.perf_counter() - started_at) * 1000
+        with self._lock:
+            self.waiters -= 1
+            if outcome == "timeout":
+                self.timeouts += 1
+            if outcome != "ok":
+                return
+            self.checkouts += 1
+            self.wait_sum_ms += elapsed_ms
+            self.wait_max_ms = max(self.wait_max_ms, elapsed_ms)
+            for index, upper_bound in enumerate(WAIT_BUCKETS_MS):
+                if elapsed_ms <= upper_bound:
+                    self._bucket_counts[index] += 1
+                    break
+            else:
+                self._bucket_counts[-1] += 1
+
+    def histogram(self) -> dict:
+        """Retorna o histograma cumulativo (estilo Prometheus) do tempo de espera."""
+        with self._lock:
+            counts = list(self._bucket_counts)
+        cumulative, buckets = 0, {}
+        for upper_bound, count in zip(WAIT_BUCKETS_MS, counts):
+            cumulative += count
+            buckets[f"le_{upper_bound}ms"] = cumulative
+        buckets["le_inf"] = cumulative + counts[-1]
+        return buckets
+
+    def snapshot(self, pool) -> dict:
+        """Combina o estado atual do pool com as métricas acumuladas."""
+        return {
+            "pool_size": pool.size(),
+            "checked_in": pool.checkedin(),
+            "checked_out": pool.checkedout(),
+            # overflow() é negativo enquanto o pool base ainda não foi preenchido
+            "overflow": max(pool.overflow(), 0),
+            "max_overflow": pool._max_overflow,
+            "waiters": self.waiters,
+            "checkouts": self.checkouts,
+            "timeouts": self.timeouts,
+            "wait_ms_sum": round(self.wait_sum_ms, 3),
+            "wait_ms_max": round(self.wait_max_ms, 3),
+            "wait_ms_histogram": self.histogram(),
+        }
+
+
+def instrumented_pool_class(pool_class, metrics: PoolMetrics):
+    """
+    Cria uma subclasse do pool que mede o tempo de espera de cada checkout.
+
+    As métricas ficam num atributo de classe para sobreviver a pool.recreate(),
+    que instancia uma nova cópia com self.__class__.
+    """
+
+    class InstrumentedPool(pool_class):
+        _metrics = metrics
+
+        def _do_get(self):
+            started_at = self._metrics.start_wait()
+            outcome = "error"
+            try:
+                connection = super()._do_get()
+                outcome = "ok"
+                return connection
+            except PoolTimeoutError:
+                outcome = "timeout"
+                raise
+            finally:
+                self._metrics.end_wait(started_at, outcome)
+
+    InstrumentedPool.__name__ = f"Instrumented{pool_class.__name__}"
+    return InstrumentedPool
+
+
+sync_pool_metrics = PoolMetrics("sync")
+async_pool_metrics = PoolMetrics("async")
+
+InstrumentedQueuePool = instrumented_pool_class(QueuePool, sync_pool_metrics)
+InstrumentedAsyncQueuePool = instrumented_pool_class(AsyncAdaptedQueuePool, async_pool_metrics)
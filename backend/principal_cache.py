@@ -0,0 +1,139 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Callable, Optional
+
+import schemas
+from config import settings
+
+
+class InvalidationBackend:
+    """
+    Backend de invalidação padrão: apenas o processo atual é notificado.
+
+    Com vários workers, cada um mantém seu próprio cache e uma alteração feita
+    em outro worker só é percebida quando a entrada expira (TTL).
+    """
+
+    async def start(self, on_invalidate: Callable[[str], None]):
+        self._on_invalidate = on_invalidate
+
+    async def publish(self, subject: str):
+        pass
+
+    async def close(self):
+        pass
+
+
+class RedisInvalidationBackend(InvalidationBackend):
+    """
+    Propaga invalidações entre workers através de um canal pub/sub do Redis.
+    Requer o pacote opcional "redis" (extra "shared-cache").
+    """
+    CHANNEL = "evorun:principal-invalidations"
+
+    def __init__(self, url: str):
+        try:
+            import redis.asyncio as redis_asyncio
+        except ImportError as e:
+            raise RuntimeError(
+                "PRINCIPAL_CACHE_REDIS_URL requer o pacote 'redis' instalado."
+            ) from e
+        self._client = redis_asyncio.from_url(url)
+        self._listener: Optional[asyncio.Task] = None
+
+    async def start(self, on_invalidate: Callable[[str], None]):
+        await super().start(on_invalidate)
+        pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+        await pubsub.subscribe(self.CHANNEL)
+        self._listener = asyncio.create_task(self._listen(pubsub))
+
+    async def _listen(self, pubsub):
+        async for message in pubsub.listen():
+            self._on_invalidate(message["data"].decode())
+
+    async def publish(self, subject: str):
+        await self._client.publish(self.CHANNEL, subject)
+
+    async def close(self):
+        if self._listener:
+            self._listener.cancel()
+        await self._client.aclose()
+
+
+class PrincipalCache:
+    """
+    Cache TTL/LRU em processo dos usuários autenticados, indexado pelo "sub"
+    do token (o e-mail). Evita uma consulta ao banco em cada requisição.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: float, backend: Optional[InvalidationBackend] = None):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.backend = backend or InvalidationBackend()
+        self._entries: "OrderedDict[str, tuple[float, schemas.AuthenticatedUser]]" = OrderedDict()
+        # Incrementado a cada invalidação. Uma leitura do banco iniciada antes
+        # de uma invalidação não pode repovoar o cache com dados antigos.
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, subject: str) -> Optional[schemas.AuthenticatedUser]:
+        entry = self._entries.get(subject)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del self._entries[subject]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(subject)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, subject: str, user: schemas.AuthenticatedUser, generation: int):
+        """Armazena o snapshot, a menos que tenha havido invalidação desde `generation`."""
+        if self.max_size <= 0 or generation != self.generation:
+            return
+        self._entries[subject] = (time.monotonic() + self.ttl_seconds, user)
+        self._entries.move_to_end(subject)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate_local(self, subject: str):
+        self.generation += 1
+        self._entries.pop(subject, None)
+
+    async def invalidate(self, subject: str):
+        """Remove o usuário deste worker e avisa os demais pelo backend."""
+        self.invalidate_local(subject)
+        await self.backend.publish(subject)
+
+    async def start(self):
+        await self.backend.start(self.invalidate_local)
+
+    async def close(self):
+        await self.backend.close()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+            "backend": type(self.backend).__name__,
+        }
+
+
+def _build_backend() -> InvalidationBackend:
+    if settings.PRINCIPAL_CACHE_REDIS_URL:
+        return RedisInvalidationBackend(settings.PRINCIPAL_CACHE_REDIS_URL)
+    return InvalidationBackend()
+
+
+principal_cache = PrincipalCache(
+    max_size=settings.PRINCIPAL_CACHE_MAX_SIZE,
+    ttl_seconds=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+    backend=_build_backend(),
+)
@@ -0,0 +1,48 @@
+"""
+Recalcula a tabela user_daily_rollups a partir de workouts.
+
+Usado para o preenchimento inicial (backfill) depois da migração que cria a
+tabela, ou para corrigir divergências. Em operação normal os rollups são
+mantidos de forma incremental pelas escritas em workouts.
+
+Uso, a partir da pasta backend:
+    python rebuild_rollups.py                 # todos os usuários
+    python rebuild_rollups.py --user-id 1 2   # apenas os usuários indicados
+"""
+import argparse
+
+from sqlalchemy import delete, insert, text
+
+import models
+from database import SessionLocal
+from rollups import MEASURES, rebuild_query
+
+
+def rebuild(user_ids: list[int] | None = None) -> int:
+    """Apaga e recalcula os rollups numa única transação. Retorna o número de linhas."""
+    table = models.UserDailyRollup.__table__
+    with SessionLocal() as db:
+        # Bloqueia as escritas incrementais (upserts) até o fim da reconstrução;
+        # as leituras continuam vendo os rollups antigos até o commit.
+        db.execute(text(f"LOCK TABLE {table.name} IN EXCLUSIVE MODE"))
+        cleanup = delete(table)
+        if user_ids:
+            cleanup = cleanup.where(table.c.user_id.in_(user_ids))
+        db.execute(cleanup)
+        result = db.execute(
+            insert(table).from_select(["user_id", "day", "workout_type", *MEASURES], rebuild_query(user_ids))
+        )
+        db.commit()
+        return result.rowcount
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--user-id", type=int, nargs="+", dest="user_ids")
+    args = parser.parse_args()
+    rows = rebuild(args.user_ids)
+    print(f"{rows} linhas de rollup recalculadas.")
+
+
+if __name__ == "__main__":
+    main()
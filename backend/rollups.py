@@ -0,0 +1,137 @@
+import datetime
+from collections import defaultdict
+
+from sqlalchemy import Date, cast, delete, func, select, tuple_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import models
+from workout_types import WorkoutType
+
+# Medidas somadas em user_daily_rollups
+MEASURES = ("workout_count", "duration_minutes", "distance_km", "elevation_level", "steps", "lifted_kg")
+
+# Atributos do treino usados no cálculo das medidas
+WORKOUT_FIELDS = ("workout_type", "workout_date", "duration_minutes", "distance_km", "elevation_level", "details")
+
+
+def _number(value):
+    """Valores ausentes ou não numéricos nos detalhes contam como zero."""
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return 0
+    return value
+
+
+def rollup_day(workout_date: datetime.datetime) -> datetime.date:
+    """Dia (UTC) em que o treino é contabilizado, como o banco o vê."""
+    if workout_date.tzinfo is not None:
+        workout_date = workout_date.astimezone(datetime.timezone.utc)
+    return workout_date.date()
+
+
+def workout_measures(workout_type, workout_date, duration_minutes, distance_km, elevation_level, details) -> dict:
+    """
+    Contribuição de um treino para as medidas do rollup.
+    Deve calcular o mesmo que rebuild_query, que faz a conta em SQL.
+    """
+    details = details or {}
+    if elevation_level is None:
+        elevation_level = _number(details.get("elevation_level"))
+    return {
+        "workout_count": 1,
+        "duration_minutes": duration_minutes or 0,
+        "distance_km": distance_km or 0.0,
+        "elevation_level": elevation_level,
+        "steps": _number(details.get("steps")),
+        "lifted_kg": _number(details.get("sets")) * _number(details.get("reps")) * _number(details.get("weight_kg")),
+    }
+
+
+class RollupDelta:
+    """
+    Acumula as variações dos rollups de um usuário causadas por escritas em
+    workouts e as grava de uma vez, na transação da própria escrita.
+    """
+
+    def __init__(self, user_id: int):
+        self.user_id = user_id
+        self._deltas = defaultdict(lambda: dict.fromkeys(MEASURES, 0))
+
+    def add(self, sign: int = 1, **workout):
+        """Soma (sign=1) ou subtrai (sign=-1) a contribuição de um treino."""
+        key = (rollup_day(workout["workout_date"]), WorkoutType(workout["workout_type"]))
+        totals = self._deltas[key]
+        for measure, value in workout_measures(**workout).items():
+            totals[measure] += sign * value
+
+    def add_workout(self, db_workout: models.Workout, sign: int = 1):
+        self.add(sign, **workout_values(db_workout))
+
+    def add_values(self, values: dict, sign: int = 1):
+        """Como add_workout, para um dicionário de valores (colunas ausentes valem None)."""
+        self.add(sign, **{field: values.get(field) for field in WORKOUT_FIELDS})
+
+    async def apply(self, db: AsyncSession):
+        """Aplica as variações com um único upsert (sem commit)."""
+        rows = [
+            {"user_id": self.user_id, "day": day, "workout_type": workout_type, **totals}
+            for (day, workout_type), totals in self._deltas.items()
+            if any(totals.values())
+        ]
+        if not rows:
+            return
+        table = models.UserDailyRollup.__table__
+        statement = insert(table)
+        statement = statement.on_conflict_do_update(
+            index_elements=[table.c.user_id, table.c.day, table.c.workout_type],
+            set_={measure: table.c[measure] + statement.excluded[measure] for measure in MEASURES},
+        )
+        await db.execute(statement, rows)
+
+        # Dias que ficaram sem treinos daquele tipo deixam de ter linha
+        decremented = [(row["day"], row["workout_type"]) for row in rows if row["workout_count"] < 0]
+        if decremented:
+            await db.execute(
+                delete(table).where(
+                    table.c.user_id == self.user_id,
+                    tuple_(table.c.day, table.c.workout_type).in_(decremented),
+                    table.c.workout_count <= 0,
+                )
+            )
+        self._deltas.clear()
+
+
+def workout_values(db_workout: models.Workout) -> dict:
+    """Atributos de um treino (ORM) usados no cálculo das medidas."""
+    return {field: getattr(db_workout, field) for field in WORKOUT_FIELDS}
+
+
+def rebuild_query(user_ids: list[int] | None = None):
+    """
+    SELECT que recalcula os rollups a partir de workouts, com as colunas na
+    ordem de user_daily_rollups. Espelha workout_measures.
+    """
+    workout = models.Workout
+    details = workout.details
+    query = (
+        select(
+            workout.owner_id,
+            cast(workout.workout_date, Date),
+            workout.workout_type,
+            func.count(),
+            func.coalesce(func.sum(workout.duration_minutes), 0),
+            func.coalesce(func.sum(workout.distance_km), 0),
+            func.coalesce(func.sum(func.coalesce(workout.elevation_level, details["elevation_level"].as_integer(), 0)), 0),
+            func.coalesce(func.sum(details["steps"].as_integer()), 0),
+            func.coalesce(func.sum(
+                func.coalesce(details["sets"].as_integer(), 0)
+                * func.coalesce(details["reps"].as_integer(), 0)
+                * func.coalesce(details["weight_kg"].as_float(), 0)
+            ), 0),
+        )
+        .where(workout.deleted_at.is_(None), workout.owner_id.is_not(None))
+        .group_by(workout.owner_id, cast(workout.workout_date, Date), workout.workout_type)
+    )
+    if user_ids:
+        query = query.where(workout.owner_id.in_(user_ids))
+    return query
@@ -1,9 +1,22 @@
 import datetime
-from typing import Optional, List, Dict, Any
-from pydantic import BaseModel, EmailStr, ConfigDict, field_validator
+from typing import Annotated, Optional, List, Dict, Any, Generic, Literal, TypeVar, Union
+from pydantic import BaseModel, EmailStr, ConfigDict, Discriminator, Field, Tag, TypeAdapter, field_validator
 
 from workout_types import WorkoutType
 
+T = TypeVar("T")
+
+# --- Schema de Paginação ---
+
+class Page(BaseModel, Generic[T]):
+    """
+    Página de resultados com paginação por cursor (keyset).
+    next_cursor é opaco e deve ser enviado de volta para obter a próxima página;
+    é None quando não há mais resultados.
+    """
+    items: List[T]
+    next_cursor: Optional[str] = None
+
 # --- Schemas de Detalhes Específicos por Esporte ---
 
 class RunningDetails(BaseModel):
@@ -51,30 +64,152 @@ class WorkoutBase(BaseModel):
             return v.lower()
         return v
 
-class WorkoutCreate(WorkoutBase):
-    """
-    Schema usado para criar um novo treino. Herda de WorkoutBase.
-    """
-    pass
+# Mapeia o tipo de treino para o schema de detalhes correspondente
+DETAILS_SCHEMA_MAP = {
+    WorkoutType.RUNNING: RunningDetails,
+    WorkoutType.CYCLING: CyclingDetails,
+    WorkoutType.SWIMMING: SwimmingDetails,
+    WorkoutType.WEIGHTLIFTING: WeightliftingDetails,
+    WorkoutType.STAIRS: StairsDetails,
+}
 
-class WorkoutUpdate(BaseModel):
+def workout_type_tag(value: Any) -> Optional[str]:
     """
-    Schema para a atualização de um treino. Todos os campos são opcionais.
+    Discriminador das uniões de WorkoutCreate/WorkoutUpdate: o workout_type
+    do dado de entrada, em minúsculas. None quando o campo está ausente.
     """
-    workout_type: Optional[WorkoutType] = None
+    if isinstance(value, dict):
+        workout_type = value.get("workout_type")
+    else:
+        workout_type = getattr(value, "workout_type", None)
+    if isinstance(workout_type, WorkoutType):
+        return workout_type.value
+    if isinstance(workout_type, str):
+        return workout_type.lower()
+    return None
+
+def _details_or_empty(v: Any):
+    # 'details': null equivale a não enviar detalhes
+    return {} if v is None else v
+
+_WORKOUT_TYPE_ERROR = "Input should be " + ", ".join(f"'{workout_type.value}'" for workout_type in WorkoutType)
+
+class _WorkoutCreateBase(BaseModel):
+    """Campos comuns das variantes de WorkoutCreate."""
+    workout_date: datetime.datetime
+    duration_minutes: Optional[int] = None
+    distance_km: Optional[float] = None
+
+    @field_validator('workout_type', mode='before', check_fields=False)
+    @classmethod
+    def lowercase_workout_type(cls, v: Any):
+        if isinstance(v, str):
+            return v.lower()
+        return v
+
+    @field_validator('details', mode='before', check_fields=False)
+    @classmethod
+    def empty_details(cls, v: Any):
+        return _details_or_empty(v)
+
+class RunningWorkoutCreate(_WorkoutCreateBase):
+    workout_type: Literal[WorkoutType.RUNNING]
+    details: RunningDetails = Field(default_factory=RunningDetails)
+
+class CyclingWorkoutCreate(_WorkoutCreateBase):
+    workout_type: Literal[WorkoutType.CYCLING]
+    details: CyclingDetails = Field(default_factory=CyclingDetails)
+
+class SwimmingWorkoutCreate(_WorkoutCreateBase):
+    workout_type: Literal[WorkoutType.SWIMMING]
+    details: SwimmingDetails = Field(default_factory=SwimmingDetails)
+
+class WeightliftingWorkoutCreate(_WorkoutCreateBase):
+    workout_type: Literal[WorkoutType.WEIGHTLIFTING]
+    # O default {} também é validado: os campos de musculação são obrigatórios
+    details: WeightliftingDetails = Field(default={}, validate_default=True)
+
+class StairsWorkoutCreate(_WorkoutCreateBase):
+    workout_type: Literal[WorkoutType.STAIRS]
+    details: StairsDetails = Field(default_factory=StairsDetails)
+
+# Schema usado para criar um novo treino: uma união discriminada por
+# workout_type, em que cada variante valida 'details' com o schema do tipo.
+# Os detalhes são validados uma única vez, já na leitura do corpo.
+WorkoutCreate = Annotated[
+    Union[
+        Annotated[RunningWorkoutCreate, Tag(WorkoutType.RUNNING.value)],
+        Annotated[CyclingWorkoutCreate, Tag(WorkoutType.CYCLING.value)],
+        Annotated[SwimmingWorkoutCreate, Tag(WorkoutType.SWIMMING.value)],
+        Annotated[WeightliftingWorkoutCreate, Tag(WorkoutType.WEIGHTLIFTING.value)],
+        Annotated[StairsWorkoutCreate, Tag(WorkoutType.STAIRS.value)],
+    ],
+    Discriminator(workout_type_tag, custom_error_type="invalid_workout_type", custom_error_message=_WORKOUT_TYPE_ERROR),
+]
+
+class _WorkoutUpdateBase(BaseModel):
+    """Campos comuns das variantes de WorkoutUpdate. Todos os campos são opcionais."""
     workout_date: Optional[datetime.datetime] = None
     duration_minutes: Optional[int] = None
     distance_km: Optional[float] = None
-    details: Optional[Dict[str, Any]] = None
 
-    # Adiciona o mesmo validador para garantir consistência na atualização.
-    @field_validator('workout_type', mode='before')
+    @field_validator('workout_type', mode='before', check_fields=False)
     @classmethod
     def lowercase_workout_type(cls, v: Any):
         if isinstance(v, str):
             return v.lower()
         return v
 
+class RunningWorkoutUpdate(_WorkoutUpdateBase):
+    workout_type: Literal[WorkoutType.RUNNING]
+    details: Optional[RunningDetails] = None
+
+class CyclingWorkoutUpdate(_WorkoutUpdateBase):
+    workout_type: Literal[WorkoutType.CYCLING]
+    details: Optional[CyclingDetails] = None
+
+class SwimmingWorkoutUpdate(_WorkoutUpdateBase):
+    workout_type: Literal[WorkoutType.SWIMMING]
+    details: Optional[SwimmingDetails] = None
+
+class WeightliftingWorkoutUpdate(_WorkoutUpdateBase):
+    workout_type: Literal[WorkoutType.WEIGHTLIFTING]
+    details: Optional[WeightliftingDetails] = None
+
+class StairsWorkoutUpdate(_WorkoutUpdateBase):
+    workout_type: Literal[WorkoutType.STAIRS]
+    details: Optional[StairsDetails] = None
+
+class UntypedWorkoutUpdate(_WorkoutUpdateBase):
+    """
+    Atualização sem workout_type: o tipo é o do treino salvo, conhecido só no
+    endpoint, que valida 'details' contra DETAILS_SCHEMA_MAP.
+    """
+    workout_type: None = None
+    details: Optional[Dict[str, Any]] = None
+
+# Schema para a atualização de um treino, discriminado como WorkoutCreate;
+# sem workout_type, cai na variante UntypedWorkoutUpdate.
+WorkoutUpdate = Annotated[
+    Union[
+        Annotated[RunningWorkoutUpdate, Tag(WorkoutType.RUNNING.value)],
+        Annotated[CyclingWorkoutUpdate, Tag(WorkoutType.CYCLING.value)],
+        Annotated[SwimmingWorkoutUpdate, Tag(WorkoutType.SWIMMING.value)],
+        Annotated[WeightliftingWorkoutUpdate, Tag(WorkoutType.WEIGHTLIFTING.value)],
+        Annotated[StairsWorkoutUpdate, Tag(WorkoutType.STAIRS.value)],
+        Annotated[UntypedWorkoutUpdate, Tag("untyped")],
+    ],
+    Discriminator(
+        lambda value: workout_type_tag(value) or "untyped",
+        custom_error_type="invalid_workout_type", custom_error_message=_WORKOUT_TYPE_ERROR,
+    ),
+]
+
+# Adapters construídos uma única vez, para validar itens fora do corpo da
+# requisição (lote, importação) sem recompilar o schema a cada chamada
+WORKOUT_CREATE_ADAPTER = TypeAdapter(WorkoutCreate)
+WORKOUT_UPDATE_ADAPTER = TypeAdapter(WorkoutUpdate)
+
 class Workout(WorkoutBase):
     """
     Schema para a leitura de um treino (o que a API retorna).
@@ -83,6 +218,149 @@ class Workout(WorkoutBase):
     owner_id: int
     model_config = ConfigDict(from_attributes=True, use_enum_values=True)
 
+class WorkoutExport(Workout):
+    """
+    Linha da exportação (NDJSON). Como Workout, mas aceita treinos sem data
+    (a coluna workout_date admite NULL), exportados com workout_date nulo.
+    """
+    workout_date: Optional[datetime.datetime] = None
+
+class WorkoutChanges(BaseModel):
+    """
+    Uma página da sincronização incremental. 'items' são os treinos criados
+    ou alterados e 'deleted_ids' os excluídos desde o token enviado.
+    next_token deve ser guardado pelo cliente e enviado como 'since' na
+    próxima chamada; enquanto has_more for verdadeiro, há mais páginas.
+    """
+    items: List[Workout]
+    deleted_ids: List[int]
+    next_token: str
+    has_more: bool
+
+class WorkoutStatsBucket(BaseModel):
+    """Totais de um tipo de treino em um período (dia, semana ou mês)."""
+    period_start: datetime.date
+    workout_type: WorkoutType
+    count: int
+    total_duration_minutes: int
+    total_distance_km: float
+    # Minutos por km, apenas dos treinos com distância e duração
+    avg_pace_min_per_km: Optional[float] = None
+    model_config = ConfigDict(use_enum_values=True)
+
+class WorkoutStats(BaseModel):
+    period: Literal["day", "week", "month"]
+    tz: str
+    buckets: List[WorkoutStatsBucket]
+
+class WorkoutCalendar(BaseModel):
+    """
+    Resumo de um mês para o calendário: para cada dia com treinos, uma máscara
+    de bits dos tipos realizados. O tipo na posição i de 'types' é o bit 1 << i.
+    """
+    year: int
+    month: int
+    types: List[WorkoutType]
+    days: Dict[int, int]
+    model_config = ConfigDict(use_enum_values=True)
+
+# --- Schemas de Operações em Lote (sincronização offline) ---
+
+class WorkoutBatchOperation(BaseModel):
+    """
+    Uma operação do lote. 'data' segue WorkoutCreate (create) ou WorkoutUpdate
+    (update); 'id' é o ID no servidor, obrigatório para update e delete.
+    'client_id' é devolvido no resultado para o cliente casar com o registro local.
+    """
+    op: Literal["create", "update", "delete"]
+    client_id: Optional[int | str] = None
+    id: Optional[int] = None
+    data: Optional[Dict[str, Any]] = None
+
+class WorkoutBatchRequest(BaseModel):
+    operations: List[WorkoutBatchOperation] = Field(..., min_length=1, max_length=1000)
+
+class WorkoutBatchResult(BaseModel):
+    """
+    Resultado de uma operação, na mesma ordem do pedido.
+    status 'invalid' traz os erros de validação em 'errors'; 'not_found'
+    indica um ID inexistente ou de outro usuário.
+    """
+    index: int
+    op: Literal["create", "update", "delete"]
+    client_id: Optional[int | str] = None
+    id: Optional[int] = None
+    status: Literal["created", "updated", "deleted", "not_found", "invalid"]
+    errors: Optional[Any] = None
+
+class WorkoutBatchResponse(BaseModel):
+    results: List[WorkoutBatchResult]
+
+class WorkoutTrack(BaseModel):
+    """
+    Trilha GPS de um treino em colunas: cada lista tem um valor por ponto.
+    times está em segundos desde a época (UTC). As grandezas que o arquivo
+    importado não tinha vêm como None. 'resolution' é o nível de detalhe
+    (número máximo de pontos em track_simplify.TRACK_LEVELS) ou 'full'.
+    """
+    workout_id: int
+    resolution: Literal["low", "medium", "high", "full"]
+    point_count: int
+    latitudes: List[float]
+    longitudes: List[float]
+    elevations: Optional[List[float]] = None
+    times: Optional[List[float]] = None
+    heart_rates: Optional[List[float]] = None
+
+# --- Schemas de Importação de Atividades ---
+
+class WorkoutImportFileError(BaseModel):
+    file: str
+    error: str
+
+class WorkoutImportJob(BaseModel):
+    """
+    Progresso de uma importação (GPX/TCX ou zip). status vai de 'pending' a
+    'running' e termina em 'completed' ou 'failed'; 'skipped' conta atividades
+    que já existiam e 'errors' os arquivos que não puderam ser importados.
+    """
+    id: str
+    filename: str
+    status: Literal["pending", "running", "completed", "failed"]
+    total_files: int
+    processed_files: int
+    created: int
+    skipped: int
+    errors: List[WorkoutImportFileError]
+    created_at: datetime.datetime
+    finished_at: Optional[datetime.datetime] = None
+    model_config = ConfigDict(from_attributes=True)
+
+# --- Schemas de Análise (carga de treino) ---
+
+class TrainingLoadDay(BaseModel):
+    """Carga do dia e as médias de fadiga (atl), condicionamento (ctl) e forma (tsb)."""
+    day: datetime.date
+    load: float
+    atl: float
+    ctl: float
+    tsb: float
+
+class TrainingLoadWeek(BaseModel):
+    """Carga de uma semana (segunda a domingo); sem variação, monotonia e strain são None."""
+    week_start: datetime.date
+    load: float
+    monotony: Optional[float] = None
+    strain: Optional[float] = None
+
+class TrainingLoad(BaseModel):
+    start: datetime.date
+    end: datetime.date
+    atl_days: int
+    ctl_days: int
+    days: List[TrainingLoadDay]
+    weeks: List[TrainingLoadWeek]
+
 # --- Schemas de User (sem alterações) ---
 
 class UserBase(BaseModel):
@@ -102,9 +380,16 @@ class User(UserBase):
     weight_kg: Optional[int] = None
     height_cm: Optional[int] = None
     training_days_per_week: Optional[int] = None
-    workouts: List[Workout] = [] 
     model_config = ConfigDict(from_attributes=True)
 
+class UserWithWorkouts(User):
+    """
+    Usuário com os treinos mais recentes embutidos (include=workouts).
+    A lista é limitada por settings.USER_WORKOUTS_INCLUDE_LIMIT; o histórico
+    completo é obtido pela paginação de /workouts/.
+    """
+    workouts: List[Workout] = []
+
 class UserUpdate(BaseModel):
     email: Optional[EmailStr] = None
     password: Optional[str] = None
@@ -116,6 +401,17 @@ class UserUpdate(BaseModel):
     height_cm: Optional[int] = None
     training_days_per_week: Optional[int] = None
 
+class AuthenticatedUser(BaseModel):
+    """
+    Snapshot leve do usuário autenticado, mantido no cache de principais.
+    Contém apenas o necessário para autorização nas dependências.
+    """
+    id: int
+    email: EmailStr
+    is_active: bool
+    is_superuser: bool
+    model_config = ConfigDict(from_attributes=True, frozen=True)
+
 # --- Schemas de Token e Perfil (sem alterações) ---
 
 class Token(BaseModel):
@@ -1,3 +1,7 @@
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta, timezone
 from typing import Optional
 from jose import jwt
@@ -32,6 +36,82 @@ def get_password_hash(password: str) -> str:
     """
     return pwd_context.hash(password)
 
+class PasswordHasherBusy(Exception):
+    """A fila do serviço de hashing está cheia; a requisição deve ser rejeitada."""
+
+
+class PasswordHashingService:
+    """
+    Executa o bcrypt em um pool de processos dedicado.
+
+    O hashing deixa de ocupar a thread da requisição e o event loop, e passa a
+    escalar pelos núcleos da máquina separadamente do tráfego da API. Quando há
+    mais de `max_pending` operações em andamento, novas chamadas falham
+    imediatamente com PasswordHasherBusy em vez de entrar numa fila sem fim.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, max_pending: int = 64):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_pending = max_pending
+        self._executor: Optional[ProcessPoolExecutor] = None
+        # Acessado apenas pelo event loop, portanto não precisa de lock.
+        self._pending = 0
+        self.completed = 0
+        self.rejected = 0
+
+    def start(self):
+        """Cria o pool de processos (o primeiro uso também o cria sob demanda)."""
+        if self._executor is None:
+            # "spawn" evita herdar, via fork, as threads e o event loop do servidor.
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._executor
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    async def _submit(self, fn, *args):
+        if self._pending >= self.max_pending:
+            self.rejected += 1
+            raise PasswordHasherBusy()
+        self._pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(self.start(), fn, *args)
+            self.completed += 1
+            return result
+        finally:
+            self._pending -= 1
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        """Versão assíncrona de verify_password, executada no pool de processos."""
+        return await self._submit(verify_password, plain_password, hashed_password)
+
+    async def hash(self, password: str) -> str:
+        """Versão assíncrona de get_password_hash, executada no pool de processos."""
+        return await self._submit(get_password_hash, password)
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.max_workers,
+            "max_pending": self.max_pending,
+            "pending": self._pending,
+            "completed": self.completed,
+            "rejected": self.rejected,
+        }
+
+
+# Instância compartilhada pela API. As funções síncronas acima continuam
+# disponíveis para scripts e testes.
+password_hasher = PasswordHashingService(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """
     Cria um novo token de acesso (JWT).
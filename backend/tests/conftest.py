@@ -0,0 +1,77 @@
+"""
+Fixtures compartilhadas pelos testes da API.
+
+Os testes rodam contra um Postgres dedicado, informado em TEST_DATABASE_URL
+(ex.: postgresql://postgres@localhost/evorun_test). O esquema public desse
+banco é recriado e migrado (alembic upgrade head) a cada execução; sem a
+variável, os testes que dependem do banco são ignorados (ver README.md).
+"""
+import os
+
+import pytest
+from sqlalchemy import event, text
+
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+if TEST_DATABASE_URL:
+    # Antes de qualquer import de config/database, que leem DATABASE_URL
+    os.environ["DATABASE_URL"] = TEST_DATABASE_URL
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def pytest_report_header(config):
+    if not TEST_DATABASE_URL:
+        return "TEST_DATABASE_URL não definida: os testes que usam o banco serão ignorados (ver README.md)"
+
+
+@pytest.fixture(scope="session")
+def client():
+    """TestClient da aplicação, com o banco de testes recriado e migrado."""
+    if not TEST_DATABASE_URL:
+        pytest.skip("TEST_DATABASE_URL não definida")
+    from alembic import command
+    from alembic.config import Config
+    from fastapi.testclient import TestClient
+
+    import database, main
+
+    with database.engine.begin() as connection:
+        connection.execute(text("DROP SCHEMA public CASCADE; CREATE SCHEMA public;"))
+    command.upgrade(Config(os.path.join(BACKEND_DIR, "alembic.ini")), "head")
+
+    with TestClient(main.app) as test_client:
+        yield test_client
+
+
+@pytest.fixture(scope="session")
+def sign_up(client):
+    """Cria um usuário e retorna (id, cabeçalhos de autenticação)."""
+    import database, models
+
+    def sign_up(email: str, password: str = "secret", superuser: bool = False):
+        response = client.post("/api/v1/users/", json={"email": email, "password": password})
+        assert response.status_code == 201, response.text
+        if superuser:
+            with database.SessionLocal() as db:
+                db.get(models.User, response.json()["id"]).is_superuser = True
+                db.commit()
+        token = client.post("/api/v1/login/token", data={"username": email, "password": password})
+        assert token.status_code == 200, token.text
+        return response.json()["id"], {"Authorization": f"Bearer {token.json()['access_token']}"}
+
+    return sign_up
+
+
+@pytest.fixture
+def queries():
+    """Lista das instruções SQL executadas pelos endpoints durante o teste."""
+    import database
+
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(database.async_engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    yield statements
+    event.remove(database.async_engine.sync_engine, "before_cursor_execute", before_cursor_execute)
@@ -0,0 +1,89 @@
+"""Carga de treino (analytics) comparada a implementações diretas, dia a dia."""
+import datetime
+import math
+import statistics
+
+import numpy as np
+import pytest
+
+import analytics
+from workout_types import WorkoutType
+
+
+def ewma_reference(values, time_constant):
+    result, state = [], 0.0
+    for value in values:
+        state += (value - state) / time_constant
+        result.append(state)
+    return result
+
+
+def sparse_loads(days: int, seed: int = 1) -> np.ndarray:
+    """Cargas com dias de descanso e lacunas longas (semanas sem treino)."""
+    rng = np.random.default_rng(seed)
+    loads = rng.uniform(20, 150, days) * (rng.random(days) < 0.5)
+    loads[days // 3:days // 3 + 40] = 0.0
+    return loads
+
+
+@pytest.mark.parametrize("days", [0, 1, 5, 255, 256, 257, 1000, 3700])
+@pytest.mark.parametrize("time_constant", [analytics.ATL_DAYS, analytics.CTL_DAYS])
+def test_ewma_matches_daily_recurrence(days, time_constant):
+    loads = sparse_loads(days)
+    np.testing.assert_allclose(analytics.ewma(loads, time_constant), ewma_reference(loads, time_constant), rtol=1e-9, atol=1e-9)
+
+
+def test_load_series_fills_gaps_and_sums_each_day():
+    day = datetime.date(2024, 1, 1)
+    rows = [
+        (day, WorkoutType.RUNNING, 60, 10.0, 0),
+        (day, WorkoutType.CYCLING, 40, 20.0, 100),
+        (day + datetime.timedelta(days=3), WorkoutType.WEIGHTLIFTING, 50, 0.0, 0),
+        (day + datetime.timedelta(days=30), WorkoutType.RUNNING, 30, 5.0, 0),  # depois de last_day
+    ]
+    series = analytics.load_series(rows, day + datetime.timedelta(days=4))
+
+    assert series.first_day == day and len(series) == 5
+    np.testing.assert_allclose(series.duration_minutes, [100, 0, 0, 50, 0])
+    np.testing.assert_allclose(series.distance_km, [30, 0, 0, 0, 0])
+    np.testing.assert_allclose(series.load, [60 + 40 * 0.75 + 100 / analytics.ELEVATION_M_PER_LOAD, 0, 0, 50 * 0.6, 0])
+
+
+def test_training_load_form_is_previous_day_balance():
+    series = analytics.DailySeries(datetime.date(2024, 1, 1), *([sparse_loads(100)] * 4))
+    metrics = analytics.training_load(series)
+    atl = ewma_reference(series.load, analytics.ATL_DAYS)
+    ctl = ewma_reference(series.load, analytics.CTL_DAYS)
+    expected_tsb = [0.0] + [ctl[index] - atl[index] for index in range(len(series) - 1)]
+    np.testing.assert_allclose(metrics["tsb"], expected_tsb, atol=1e-9)
+    np.testing.assert_allclose(metrics["atl"], atl, atol=1e-9)
+
+
+@pytest.mark.parametrize("first_day", [datetime.date(2024, 1, 1), datetime.date(2024, 1, 4), datetime.date(2024, 1, 7)])
+@pytest.mark.parametrize("days", [1, 6, 30])
+def test_weekly_load_matches_calendar_weeks(first_day, days):
+    loads = sparse_loads(days, seed=days)
+    loads[-1] = 80.0  # ao menos uma semana com variação
+    series = analytics.DailySeries(first_day, loads, loads, loads, loads)
+
+    weeks = {}
+    for index, load in enumerate(loads):
+        day = first_day + datetime.timedelta(days=index)
+        week = weeks.setdefault(day - datetime.timedelta(days=day.weekday()), [0.0] * 7)
+        week[day.weekday()] = load
+    weekly = analytics.weekly_load(series)
+
+    assert weekly["week_start"].astype(datetime.date).tolist() == sorted(weeks)
+    for position, week_start in enumerate(sorted(weeks)):
+        week = weeks[week_start]
+        deviation = statistics.pstdev(week)
+        monotony = statistics.fmean(week) / deviation if deviation > 0 else math.nan
+        assert weekly["load"][position] == pytest.approx(sum(week))
+        assert weekly["monotony"][position] == pytest.approx(monotony, nan_ok=True)
+        assert weekly["strain"][position] == pytest.approx(sum(week) * monotony, nan_ok=True)
+
+
+def test_window_pads_days_outside_the_series():
+    series = analytics.DailySeries(datetime.date(2024, 1, 10), *([np.array([1.0, 2.0, 3.0])] * 4))
+    values = analytics.window(series.load, series, datetime.date(2024, 1, 8), datetime.date(2024, 1, 14))
+    np.testing.assert_array_equal(values, [0, 0, 1, 2, 3, 0, 0])
@@ -0,0 +1,103 @@
+"""Requisições condicionais (api.v1.conditional), sem banco."""
+import datetime
+from email.utils import format_datetime
+
+from fastapi import Request, Response
+
+from api.v1.conditional import Validator, _next_second, evaluate
+
+UPDATED_AT = datetime.datetime(2024, 3, 1, 12, 30, 15, 250000)  # naive, em UTC, como no banco
+
+
+def make_request(path: str = "/api/v1/workouts/", query: str = "", **headers) -> Request:
+    return Request({
+        "type": "http",
+        "method": "GET",
+        "path": path,
+        "query_string": query.encode(),
+        "headers": [(name.replace("_", "-").encode(), value.encode()) for name, value in headers.items()],
+    })
+
+
+def http_date(value: datetime.datetime) -> str:
+    return format_datetime(value.replace(tzinfo=datetime.timezone.utc), usegmt=True)
+
+
+def first_response(*validators: Validator, subject: str = "user:1", **request_kwargs) -> Response:
+    response = Response()
+    assert evaluate(make_request(**request_kwargs), response, subject, *validators) is None
+    return response
+
+
+def test_next_second_rounds_up_fractions():
+    utc = datetime.timezone.utc
+    assert _next_second(datetime.datetime(2024, 3, 1, 12, 30, 15)) == datetime.datetime(2024, 3, 1, 12, 30, 15, tzinfo=utc)
+    assert _next_second(UPDATED_AT) == datetime.datetime(2024, 3, 1, 12, 30, 16, tzinfo=utc)
+    assert _next_second(datetime.datetime(2024, 12, 31, 23, 59, 59, 1)) == datetime.datetime(2025, 1, 1, tzinfo=utc)
+
+
+def test_headers_of_a_full_response():
+    response = first_response(Validator(UPDATED_AT, 3))
+    assert response.headers["etag"].startswith('"')
+    assert response.headers["cache-control"] == "private, no-cache"
+    assert response.headers["last-modified"] == "Fri, 01 Mar 2024 12:30:16 GMT"
+
+
+def test_matching_etag_returns_304():
+    validator = Validator(UPDATED_AT, 3)
+    etag = first_response(validator).headers["etag"]
+    for if_none_match in (etag, f"W/{etag}", f'"other", {etag}', "*"):
+        not_modified = evaluate(make_request(if_none_match=if_none_match), Response(), "user:1", validator)
+        assert not_modified is not None and not_modified.status_code == 304
+        assert not_modified.headers["etag"] == etag
+
+
+def test_etag_follows_validators_subject_and_query():
+    etag = first_response(Validator(UPDATED_AT, 3)).headers["etag"]
+    changed = [
+        first_response(Validator(UPDATED_AT, 2)),  # exclusão física: só a contagem muda
+        first_response(Validator(UPDATED_AT + datetime.timedelta(microseconds=1), 3)),
+        first_response(Validator(UPDATED_AT, 3), subject="user:2"),
+        first_response(Validator(UPDATED_AT, 3), query="limit=10"),
+        first_response(Validator(UPDATED_AT, 3), Validator(None, 0)),
+    ]
+    assert all(response.headers["etag"] != etag for response in changed)
+    # O cliente com o ETag antigo recebe a resposta nova
+    assert evaluate(make_request(if_none_match=etag), Response(), "user:1", Validator(UPDATED_AT, 2)) is None
+
+
+def test_if_none_match_takes_precedence_over_if_modified_since():
+    validator = Validator(UPDATED_AT, 3)
+    etag = first_response(validator).headers["etag"]
+    future = http_date(UPDATED_AT + datetime.timedelta(days=1))
+    past = http_date(UPDATED_AT - datetime.timedelta(days=1))
+    # ETag diferente: 200, mesmo com uma data que daria 304
+    assert evaluate(make_request(if_none_match='"other"', if_modified_since=future), Response(), "user:1", validator) is None
+    # ETag igual: 304, mesmo com uma data anterior à alteração
+    assert evaluate(make_request(if_none_match=etag, if_modified_since=past), Response(), "user:1", validator) is not None
+
+
+def test_if_modified_since_compares_whole_seconds():
+    validator = Validator(UPDATED_AT, 3)
+    last_modified = first_response(validator).headers["last-modified"]
+    not_modified = evaluate(make_request(if_modified_since=last_modified), Response(), "user:1", validator)
+    assert not_modified is not None and not_modified.status_code == 304
+    # Um Last-Modified truncado (12:30:15) é anterior à escrita das 12:30:15.25
+    truncated = http_date(UPDATED_AT.replace(microsecond=0))
+    assert evaluate(make_request(if_modified_since=truncated), Response(), "user:1", validator) is None
+    # Datas inválidas ou sem fuso são ignoradas
+    for invalid in ("yesterday", "Fri, 01 Mar 2024 12:30:16"):
+        assert evaluate(make_request(if_modified_since=invalid), Response(), "user:1", validator) is None
+
+
+def test_last_modified_uses_the_latest_validator():
+    older = Validator(UPDATED_AT - datetime.timedelta(hours=1), 1)
+    response = first_response(older, Validator(UPDATED_AT, 3), Validator(None, 0))
+    assert response.headers["last-modified"] == "Fri, 01 Mar 2024 12:30:16 GMT"
+
+
+def test_last_modified_omitted_while_its_second_is_running():
+    now = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+    response = first_response(Validator(now + datetime.timedelta(milliseconds=100), 1))
+    assert "last-modified" not in response.headers
+    assert "etag" in response.headers
@@ -0,0 +1,25 @@
+"""Validação do fuso horário (tz) das agregações por dia."""
+import pytest
+
+
+@pytest.fixture(scope="module")
+def headers(sign_up):
+    return sign_up("time-zones@example.com")[1]
+
+
+@pytest.mark.parametrize("path", ["/api/v1/workouts/stats", "/api/v1/workouts/calendar?year=2024&month=3"])
+@pytest.mark.parametrize(
+    ("tz", "expected_status"),
+    [
+        ("America/Sao_Paulo", 200),
+        ("UTC", 200),
+        ("Nowhere/City", 400),
+        # Aceitos pelo zoneinfo do Python, mas desconhecidos pelo Postgres
+        ("posix/UTC", 400),
+        ("localtime", 400),
+    ],
+)
+def test_time_zone_must_exist_in_the_database(client, headers, path, tz, expected_status):
+    separator = "&" if "?" in path else "?"
+    response = client.get(f"{path}{separator}tz={tz}", headers=headers)
+    assert response.status_code == expected_status, response.text
@@ -0,0 +1,25 @@
+"""Leitura de arquivos de atividade (track_import), sem banco."""
+import datetime
+import os
+
+import numpy as np
+
+from schemas import WorkoutType
+from track_import import parse_activity
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def test_tcx_heart_rate():
+    with open(os.path.join(FIXTURES, "activity.tcx"), "rb") as source:
+        values, track = parse_activity("activity.tcx", source)
+
+    assert values["workout_type"] == WorkoutType.CYCLING
+    assert values["workout_date"] == datetime.datetime(2024, 5, 1, 7, 0, tzinfo=datetime.timezone.utc)
+    assert values["duration_minutes"] == 2
+    assert values["distance_km"] == 0.6
+    assert track is not None
+    np.testing.assert_allclose(track.latitudes, [-23.55, -23.5525, -23.555])
+    np.testing.assert_allclose(track.elevations, [760.0, 765.0, 770.0])
+    # O ponto sem <HeartRateBpm> é interpolado entre os vizinhos
+    np.testing.assert_allclose(track.heart_rates, [120.0, 135.0, 150.0])
@@ -0,0 +1,90 @@
+"""Codificação (track_codec) e níveis de detalhe (track_simplify) das trilhas, sem banco."""
+import numpy as np
+import pytest
+
+from track_codec import SCALES, TRACK_FIELDS, Track, decode_array, decode_track, encode_array, encode_track
+from track_simplify import TRACK_LEVELS, importance_order, project, simplify_levels
+
+
+def make_track(points: int, seed: int = 3) -> Track:
+    """Trilha sinuosa, com subidas e descidas (deltas negativos em todas as grandezas)."""
+    rng = np.random.default_rng(seed)
+    steps = np.arange(points)
+    return Track(
+        latitudes=-23.55 + np.cumsum(rng.normal(0, 2e-5, points)),
+        longitudes=-46.63 + 1e-4 * np.sin(steps / 15) + np.cumsum(rng.normal(0, 2e-5, points)),
+        elevations=760 + 30 * np.sin(steps / 40),
+        times=1.7e9 + steps * 1.0,
+        heart_rates=140 + np.round(20 * np.sin(steps / 25)),
+    )
+
+
+def assert_same_track(decoded: Track, track: Track):
+    for name in TRACK_FIELDS:
+        expected = getattr(track, name)
+        if expected is None:
+            assert getattr(decoded, name) is None
+        else:
+            np.testing.assert_allclose(getattr(decoded, name), expected, rtol=0, atol=0.5 / SCALES[name])
+
+
+@pytest.mark.parametrize("values", [
+    [],
+    [12.5],
+    [3.0, -2.0, -2.0, 5.5, -100.0],
+    [0.0, 1e6, -1e6, 0.0],  # deltas que exigem inteiros de 64 bits na escala 10
+])
+def test_array_round_trip(values):
+    blob = encode_array(np.array(values), 10)
+    np.testing.assert_allclose(decode_array(blob, 10), values)
+
+
+@pytest.mark.parametrize("points", [0, 1, 2, 5000])
+def test_track_round_trip(points):
+    track = make_track(points)
+    columns = encode_track(track)
+    assert columns["point_count"] == points
+    assert_same_track(decode_track(columns), track)
+
+
+def test_optional_columns_stay_empty():
+    track = Track(latitudes=np.array([-23.5, -23.6]), longitudes=np.array([-46.6, -46.5]))
+    columns = encode_track(track)
+    assert columns["elevations"] is None and columns["heart_rates"] is None
+    assert_same_track(decode_track(columns), track)
+
+
+def test_decode_rejects_unknown_version():
+    blob = bytearray(encode_array(np.array([1.0, 2.0]), 1))
+    blob[0] = 99
+    with pytest.raises(ValueError):
+        decode_array(bytes(blob), 1)
+
+
+@pytest.mark.parametrize("points", [0, 1, 2, 3, 150, 5000])
+def test_levels_keep_endpoints_and_nest(points):
+    track = make_track(points)
+    x, y = project(track.latitudes, track.longitudes) if points else (np.zeros(0), np.zeros(0))
+    order = importance_order(x, y, max(TRACK_LEVELS.values()))
+    assert len(set(order.tolist())) == len(order)
+
+    previous = None
+    for max_points in sorted(TRACK_LEVELS.values()):
+        kept = set(np.sort(order[:max_points]).tolist())
+        assert len(kept) == min(points, max_points)
+        if points:
+            assert {0, points - 1} <= kept
+        if previous is not None:
+            assert previous <= kept  # cada nível contém o anterior, mais grosso
+        previous = kept
+
+
+def test_simplified_levels_take_points_from_the_track():
+    track = make_track(5000)
+    levels = simplify_levels(track)
+    assert set(levels) == set(TRACK_LEVELS.values())
+    for max_points, level in levels.items():
+        assert len(level) == max_points
+        assert np.all(np.diff(level.times) > 0)  # pontos na ordem original
+        assert level.latitudes[0] == track.latitudes[0] and level.latitudes[-1] == track.latitudes[-1]
+        assert np.isin(level.times, track.times).all()
@@ -0,0 +1,72 @@
+"""Limite do corpo dos uploads (api.v1.upload_limit), sem banco."""
+import asyncio
+
+from fastapi import FastAPI, File, UploadFile
+from fastapi.testclient import TestClient
+
+from api.v1.upload_limit import BodySizeLimitMiddleware
+
+LIMIT = 10_000
+
+
+def make_client(received: list) -> TestClient:
+    app = FastAPI()
+    app.add_middleware(BodySizeLimitMiddleware, limits={"/upload": LIMIT})
+
+    @app.post("/upload")
+    async def upload(file: UploadFile = File(...)):
+        received.append(len(await file.read()))
+        return {"size": received[-1]}
+
+    @app.post("/other")
+    async def other(file: UploadFile = File(...)):
+        return {"size": len(await file.read())}
+
+    return TestClient(app)
+
+
+def test_upload_within_the_limit():
+    received = []
+    response = make_client(received).post("/upload", files={"file": ("a.gpx", b"x" * 5_000)})
+    assert response.status_code == 200 and received == [5_000]
+
+
+def test_rejects_by_content_length_before_reading():
+    received = []
+    response = make_client(received).post(
+        "/upload", content=b"", headers={"Content-Length": str(LIMIT + 1), "Content-Type": "multipart/form-data; boundary=x"}
+    )
+    assert response.status_code == 413
+    assert received == []
+
+
+def test_stops_reading_a_chunked_body_past_the_limit():
+    received, sent, responses = [], [], []
+    app = make_client(received).app
+    chunks = [b'--x\r\nContent-Disposition: form-data; name="file"; filename="a.gpx"\r\n\r\n']
+    chunks += [b"x" * 1_000] * 100
+
+    async def receive():
+        sent.append(len(chunks[len(sent)]))
+        return {"type": "http.request", "body": chunks[len(sent) - 1], "more_body": len(sent) < len(chunks)}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            responses.append(message["status"])
+
+    scope = {
+        "type": "http", "method": "POST", "path": "/upload", "raw_path": b"/upload", "query_string": b"",
+        "headers": [(b"content-type", b"multipart/form-data; boundary=x")],  # sem Content-Length
+        "http_version": "1.1", "scheme": "http", "server": ("test", 80), "client": ("test", 1), "root_path": "",
+    }
+    asyncio.run(app(scope, receive, send))
+
+    assert responses == [413]
+    assert received == []
+    # A leitura parou logo depois do limite, sem consumir o resto do corpo
+    assert sum(sent) <= LIMIT + 1_000
+
+
+def test_other_paths_are_not_limited():
+    response = make_client([]).post("/other", files={"file": ("a.gpx", b"x" * (LIMIT * 2))})
+    assert response.status_code == 200
@@ -0,0 +1,57 @@
+"""
+Número de consultas por endpoint de usuário: constante, independente de
+quantos usuários e treinos existem, com e sem include=workouts.
+"""
+import pytest
+
+WORKOUTS_PER_USER = 3
+
+
+@pytest.fixture(scope="module")
+def users(client, sign_up):
+    """Um superusuário e alguns atletas com treinos; retorna (id, cabeçalhos) de cada um."""
+    accounts = [sign_up("admin@example.com", superuser=True)]
+    accounts += [sign_up(f"athlete{index}@example.com") for index in range(3)]
+    for _, headers in accounts:
+        for day in range(1, WORKOUTS_PER_USER + 1):
+            response = client.post("/api/v1/workouts/", headers=headers, json={
+                "workout_type": "running", "workout_date": f"2024-01-0{day}T07:00:00",
+                "duration_minutes": 30, "distance_km": 5,
+            })
+            assert response.status_code == 201, response.text
+        # Aquece o cache de usuários autenticados: a autenticação não deve contar
+        assert client.get("/api/v1/users/me/", headers=headers).status_code == 200
+    return accounts
+
+
+@pytest.mark.parametrize(
+    ("path", "expected_queries"),
+    [
+        ("/api/v1/users/", 1),
+        ("/api/v1/users/?include=workouts", 2),
+        ("/api/v1/users/{user_id}", 1),
+        ("/api/v1/users/{user_id}?include=workouts", 2),
+        ("/api/v1/users/me/", 1),
+        # Inclui o validador de cache (ETag/Last-Modified) dos treinos
+        ("/api/v1/users/me/?include=workouts", 3),
+    ],
+)
+def test_query_count(client, users, queries, path, expected_queries):
+    (_, admin_headers), (athlete_id, _) = users[0], users[1]
+    response = client.get(path.format(user_id=athlete_id), headers=admin_headers)
+    assert response.status_code == 200, response.text
+    assert len(queries) == expected_queries, queries
+
+
+@pytest.mark.parametrize("path", ["/api/v1/users/", "/api/v1/users/{user_id}", "/api/v1/users/me/"])
+def test_workouts_only_with_include(client, users, path):
+    (_, admin_headers), (athlete_id, _) = users[0], users[1]
+    body = client.get(path.format(user_id=athlete_id), headers=admin_headers).json()
+    user = body["items"][0] if "items" in body else body
+    assert "workouts" not in user
+
+    body = client.get(path.format(user_id=athlete_id) + "?include=workouts", headers=admin_headers).json()
+    # A listagem traz também os usuários criados por outros testes
+    ids = {user_id for user_id, _ in users}
+    listed = [user for user in body["items"] if user["id"] in ids] if "items" in body else [body]
+    assert listed and all(len(user["workouts"]) == WORKOUTS_PER_USER for user in listed)
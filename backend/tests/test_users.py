@@ -0,0 +1,19 @@
+"""Endpoints de usuário com o snapshot do usuário autenticado vindo do cache."""
+from sqlalchemy import text
+
+
+def test_deleted_user_with_cached_principal(client, sign_up):
+    import database
+
+    user_id, headers = sign_up("deleted@example.com")
+    # Aquece o cache de principais e remove a linha por fora da API
+    assert client.get("/api/v1/users/me/", headers=headers).status_code == 200
+    with database.engine.begin() as connection:
+        connection.execute(text("DELETE FROM workouts WHERE owner_id = :id"), {"id": user_id})
+        connection.execute(text("DELETE FROM users WHERE id = :id"), {"id": user_id})
+
+    profile = {"full_name": "X", "age": 30, "weight_kg": 70, "height_cm": 175, "training_days_per_week": 3}
+    assert client.put("/api/v1/users/me/profile", headers=headers, json=profile).status_code == 401
+    assert client.get("/api/v1/users/me/", headers=headers).status_code == 401
+    # O snapshot foi descartado: a autenticação volta a consultar o banco
+    assert client.get("/api/v1/users/me/?include=workouts", headers=headers).status_code == 401
@@ -0,0 +1,270 @@
+"""
+Leitura de arquivos de atividade (GPX e TCX) exportados por outros apps.
+
+Os arquivos são lidos em streaming com iterparse: cada ponto da trilha é
+processado e descartado assim que termina, sem montar a árvore (DOM) do
+documento inteiro. Dos pontos são derivados a data, a duração, a distância e
+o ganho de elevação do treino, e as coordenadas são acumuladas em arrays
+compactos de floats, que viram a trilha gravada em workout_tracks.
+
+FIT (formato binário da Garmin) não é suportado: exigiria um decodificador
+dedicado, e os mesmos dados costumam poder ser exportados em TCX ou GPX.
+"""
+import datetime
+import math
+import xml.etree.ElementTree as ET
+from array import array
+from typing import IO, Optional
+
+from track_codec import Track, fill_gaps
+from workout_types import WorkoutType
+
+SUPPORTED_EXTENSIONS = (".gpx", ".tcx")
+
+# Variações de elevação menores que isto (em metros) são tratadas como ruído do GPS
+ELEVATION_NOISE_M = 2.0
+
+EARTH_RADIUS_M = 6371008.8
+
+# Nome do esporte no arquivo (GPX <type>, TCX Sport="...") -> tipo de treino
+SPORT_TYPES = {
+    "running": WorkoutType.RUNNING,
+    "run": WorkoutType.RUNNING,
+    "trail_running": WorkoutType.RUNNING,
+    "biking": WorkoutType.CYCLING,
+    "cycling": WorkoutType.CYCLING,
+    "ride": WorkoutType.CYCLING,
+    "swimming": WorkoutType.SWIMMING,
+    "swim": WorkoutType.SWIMMING,
+}
+
+
+class TrackImportError(ValueError):
+    """Arquivo que não pôde ser lido como uma atividade."""
+
+
+def _local_name(tag: str) -> str:
+    """Nome do elemento sem o namespace ('{http://...}trkpt' -> 'trkpt')."""
+    return tag.rpartition("}")[2]
+
+
+def _child_text(element: ET.Element, *path: str) -> Optional[str]:
+    """Texto do descendente pelo caminho de nomes locais, ignorando namespaces."""
+    for name in path:
+        element = next((child for child in element if _local_name(child.tag) == name), None)
+        if element is None:
+            return None
+    return element.text.strip() if element.text else None
+
+
+def _parse_time(value: Optional[str]) -> Optional[datetime.datetime]:
+    if not value:
+        return None
+    try:
+        parsed = datetime.datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=datetime.timezone.utc)
+    return parsed
+
+
+def _parse_float(value: Optional[str]) -> Optional[float]:
+    try:
+        return float(value) if value else None
+    except ValueError:
+        return None
+
+
+def haversine_m(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Distância em metros entre dois pontos (latitude/longitude em graus)."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    a = (math.sin((phi2 - phi1) / 2) ** 2
+         + math.cos(phi1) * math.cos(phi2) * math.sin(math.radians(lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_M * math.asin(math.sqrt(a))
+
+
+class _TrackSummary:
+    """
+    Acumula os totais da trilha ponto a ponto e as grandezas dos pontos com
+    posição, em arrays de floats (NaN quando o ponto não tem o valor).
+    """
+
+    def __init__(self):
+        self.start: Optional[datetime.datetime] = None
+        self.end: Optional[datetime.datetime] = None
+        self.distance_m = 0.0
+        self.elevation_gain_m = 0.0
+        self.points = 0
+        self._last_position: Optional[tuple[float, float]] = None
+        self._elevation_reference: Optional[float] = None
+        self._columns = {name: array("d") for name in ("latitudes", "longitudes", "elevations", "times", "heart_rates")}
+
+    def add_point(self, time, latitude, longitude, elevation, heart_rate=None):
+        self.points += 1
+        if time is not None:
+            self.start = time if self.start is None else min(self.start, time)
+            self.end = time if self.end is None else max(self.end, time)
+        if latitude is not None and longitude is not None:
+            if self._last_position is not None:
+                self.distance_m += haversine_m(*self._last_position, latitude, longitude)
+            self._last_position = (latitude, longitude)
+            for name, value in (
+                ("latitudes", latitude), ("longitudes", longitude), ("elevations", elevation),
+                ("times", time.timestamp() if time is not None else None), ("heart_rates", heart_rate),
+            ):
+                self._columns[name].append(math.nan if value is None else value)
+        if elevation is not None:
+            # Histerese: só subidas acumuladas acima do ruído contam como ganho
+            if self._elevation_reference is None:
+                self._elevation_reference = elevation
+            elif elevation - self._elevation_reference >= ELEVATION_NOISE_M:
+                self.elevation_gain_m += elevation - self._elevation_reference
+                self._elevation_reference = elevation
+            elif self._elevation_reference - elevation >= ELEVATION_NOISE_M:
+                self._elevation_reference = elevation
+
+    def track(self) -> Optional[Track]:
+        """A trilha dos pontos com posição, ou None se não houver nenhum."""
+        if not self._columns["latitudes"]:
+            return None
+        return Track(
+            latitudes=fill_gaps(self._columns["latitudes"]),
+            longitudes=fill_gaps(self._columns["longitudes"]),
+            elevations=fill_gaps(self._columns["elevations"]),
+            times=fill_gaps(self._columns["times"]),
+            heart_rates=fill_gaps(self._columns["heart_rates"]),
+        )
+
+
+def _iter_elements(source: IO[bytes], point_tag: str):
+    """
+    Percorre o documento produzindo (nome local, elemento) ao fim de cada
+    elemento. Os pontos (`point_tag`) são removidos do elemento pai depois de
+    processados, para que a árvore parcial não cresça.
+    """
+    stack = []
+    try:
+        for event, element in ET.iterparse(source, events=("start", "end")):
+            if event == "start":
+                stack.append(element)
+                continue
+            stack.pop()
+            name = _local_name(element.tag)
+            yield name, element
+            if name == point_tag and stack:
+                stack[-1].remove(element)
+    except ET.ParseError as e:
+        raise TrackImportError(f"XML inválido: {e}") from e
+
+
+def _workout_values(workout_type, start, duration_seconds, distance_m, elevation_gain_m) -> dict:
+    """Valores do treino no formato de schemas.WorkoutCreate."""
+    if start is None:
+        raise TrackImportError("Atividade sem data/hora.")
+    details = {}
+    if workout_type in (WorkoutType.RUNNING, WorkoutType.CYCLING):
+        details["elevation_level"] = round(elevation_gain_m)
+    return {
+        "workout_type": workout_type,
+        "workout_date": start,
+        "duration_minutes": round(duration_seconds / 60) if duration_seconds else None,
+        "distance_km": round(distance_m / 1000, 3) if distance_m else None,
+        "details": details,
+    }
+
+
+def parse_gpx(source: IO[bytes], workout_type: Optional[WorkoutType] = None) -> tuple[dict, Optional[Track]]:
+    """
+    Lê um GPX 1.0/1.1: os pontos <trkpt> de todas as trilhas viram um treino.
+    A frequência cardíaca vem da extensão TrackPointExtension (Garmin).
+    """
+    summary = _TrackSummary()
+    sport = metadata_time = None
+    for name, element in _iter_elements(source, "trkpt"):
+        if name == "trkpt":
+            summary.add_point(
+                _parse_time(_child_text(element, "time")),
+                _parse_float(element.get("lat")),
+                _parse_float(element.get("lon")),
+                _parse_float(_child_text(element, "ele")),
+                _parse_float(_child_text(element, "extensions", "TrackPointExtension", "hr")),
+            )
+        elif name == "type" and sport is None and element.text:
+            sport = element.text.strip().lower()
+        elif name == "metadata":
+            metadata_time = _parse_time(_child_text(element, "time"))
+    if not summary.points:
+        raise TrackImportError("GPX sem pontos de trilha.")
+
+    duration_seconds = (summary.end - summary.start).total_seconds() if summary.start else None
+    values = _workout_values(
+        workout_type or SPORT_TYPES.get(sport, WorkoutType.RUNNING),
+        summary.start or metadata_time,
+        duration_seconds,
+        summary.distance_m,
+        summary.elevation_gain_m,
+    )
+    return values, summary.track()
+
+
+def parse_tcx(source: IO[bytes], workout_type: Optional[WorkoutType] = None) -> tuple[dict, Optional[Track]]:
+    """
+    Lê um TCX (Garmin Training Center). Duração e distância vêm dos totais das
+    voltas (<Lap>) quando presentes; senão, dos próprios pontos.
+    """
+    summary = _TrackSummary()
+    sport = None
+    lap_start = None
+    lap_seconds = lap_distance_m = 0.0
+    last_point_distance_m = None
+    for name, element in _iter_elements(source, "Trackpoint"):
+        if name == "Trackpoint":
+            summary.add_point(
+                _parse_time(_child_text(element, "Time")),
+                _parse_float(_child_text(element, "Position", "LatitudeDegrees")),
+                _parse_float(_child_text(element, "Position", "LongitudeDegrees")),
+                _parse_float(_child_text(element, "AltitudeMeters")),
+                _parse_float(_child_text(element, "HeartRateBpm", "Value")),
+            )
+            last_point_distance_m = _parse_float(_child_text(element, "DistanceMeters")) or last_point_distance_m
+        elif name == "Lap":
+            start = _parse_time(element.get("StartTime"))
+            lap_start = start if lap_start is None or (start and start < lap_start) else lap_start
+            lap_seconds += _parse_float(_child_text(element, "TotalTimeSeconds")) or 0.0
+            lap_distance_m += _parse_float(_child_text(element, "DistanceMeters")) or 0.0
+        elif name == "Activity" and sport is None:
+            sport = (element.get("Sport") or "").lower()
+    if not summary.points and not lap_seconds:
+        raise TrackImportError("TCX sem voltas ou pontos de trilha.")
+
+    if not lap_seconds and summary.start:
+        lap_seconds = (summary.end - summary.start).total_seconds()
+    distance_m = lap_distance_m or last_point_distance_m or summary.distance_m
+    values = _workout_values(
+        workout_type or SPORT_TYPES.get(sport, WorkoutType.RUNNING),
+        lap_start or summary.start,
+        lap_seconds,
+        distance_m,
+        summary.elevation_gain_m,
+    )
+    return values, summary.track()
+
+
+def parse_activity(
+    filename: str, source: IO[bytes], workout_type: Optional[WorkoutType] = None
+) -> tuple[dict, Optional[Track]]:
+    """
+    Lê um arquivo de atividade pela extensão do nome. Retorna os valores do
+    treino (formato de schemas.WorkoutCreate) e a trilha, se houver pontos com
+    posição. `workout_type`, se informado, substitui o esporte do arquivo.
+    Levanta TrackImportError para formatos não suportados ou arquivos inválidos.
+    """
+    extension = filename.lower().rpartition(".")[2]
+    if extension == "gpx":
+        return parse_gpx(source, workout_type)
+    if extension == "tcx":
+        return parse_tcx(source, workout_type)
+    if extension == "fit":
+        raise TrackImportError("Arquivos FIT não são suportados; exporte a atividade em TCX ou GPX.")
+    raise TrackImportError(f"Formato não suportado: '{filename}'.")
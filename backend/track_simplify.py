@@ -0,0 +1,85 @@
+"""
+Simplificação das trilhas GPS em níveis de detalhe (LOD) para os mapas.
+
+Usa o Ramer–Douglas–Peucker em ordem de importância: em vez de uma
+tolerância fixa, o segmento cujo ponto mais distante é o maior desvio da
+trilha é dividido primeiro. A ordem em que os pontos entram é uma
+classificação por importância, e cada nível é só um prefixo dela. Assim,
+uma única passada produz todos os níveis, cada um com um número fixo de
+pontos, e o custo de desenhar a rota independe da duração do treino.
+
+As distâncias de cada segmento são calculadas de forma vetorizada (NumPy);
+o laço em Python roda uma vez por ponto mantido, não por ponto da trilha.
+"""
+import heapq
+
+import numpy as np
+
+from track_codec import Track, encode_track
+
+EARTH_RADIUS_M = 6371008.8
+
+# Nível de detalhe -> número máximo de pontos
+TRACK_LEVELS = {
+    "low": 100,
+    "medium": 500,
+    "high": 2000,
+}
+
+
+def project(latitudes: np.ndarray, longitudes: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Projeção equirretangular local, em metros: adequada à escala de um treino."""
+    latitudes = np.radians(latitudes)
+    reference = np.cos(latitudes.mean()) if len(latitudes) else 1.0
+    return EARTH_RADIUS_M * np.radians(longitudes) * reference, EARTH_RADIUS_M * latitudes
+
+
+def _farthest(x: np.ndarray, y: np.ndarray, start: int, end: int) -> tuple[int, float]:
+    """Ponto entre start e end mais distante da reta start-end, e a distância."""
+    px, py = x[start + 1:end], y[start + 1:end]
+    dx, dy = x[end] - x[start], y[end] - y[start]
+    length = np.hypot(dx, dy)
+    if length == 0:
+        # Segmento degenerado (ex.: percurso circular): distância ao ponto inicial
+        distances = np.hypot(px - x[start], py - y[start])
+    else:
+        distances = np.abs(dx * (y[start] - py) - dy * (x[start] - px)) / length
+    position = int(np.argmax(distances))
+    return start + 1 + position, float(distances[position])
+
+
+def importance_order(x: np.ndarray, y: np.ndarray, max_points: int) -> np.ndarray:
+    """
+    Índices dos pontos em ordem de importância (as extremidades primeiro), até
+    `max_points`. Os `n` primeiros, ordenados, são a simplificação com n pontos.
+    """
+    count = len(x)
+    if count <= 2:
+        return np.arange(count)
+    order = [0, count - 1]
+    pending = []
+
+    def split(start: int, end: int):
+        if end - start >= 2:
+            index, distance = _farthest(x, y, start, end)
+            heapq.heappush(pending, (-distance, start, end, index))
+
+    split(0, count - 1)
+    while pending and len(order) < max_points:
+        _, start, end, index = heapq.heappop(pending)
+        order.append(index)
+        split(start, index)
+        split(index, end)
+    return np.array(order)
+
+
+def simplify_levels(track: Track) -> dict[int, Track]:
+    """Trilha simplificada de cada nível de TRACK_LEVELS, pelo número de pontos."""
+    x, y = project(track.latitudes, track.longitudes)
+    order = importance_order(x, y, max(TRACK_LEVELS.values()))
+    return {max_points: track.take(np.sort(order[:max_points])) for max_points in TRACK_LEVELS.values()}
+
+
+def encode_track_levels(track: Track) -> dict[int, dict]:
+    """Colunas de models.WorkoutTrackLevel de cada nível, pelo número de pontos."""
+    return {max_points: encode_track(level) for max_points, level in simplify_levels(track).items()}
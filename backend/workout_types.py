@@ -23,3 +23,7 @@ class WorkoutType(str, _CaseInsensitiveEnum):
     WEIGHTLIFTING = "weightlifting"
     STAIRS = "stairs"
 
+
+# Bit de cada tipo nas máscaras do calendário (/workouts/calendar), na ordem
+# de declaração. Novos tipos devem ser adicionados ao final para não mudar os bits.
+WORKOUT_TYPE_BITS = {workout_type: 1 << position for position, workout_type in enumerate(WorkoutType)}
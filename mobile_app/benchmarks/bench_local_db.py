@@ -0,0 +1,143 @@
+"""
+Benchmark do banco local do app (consultas do calendário e da lista do dia).
+
+Executa, a partir da pasta mobile_app:
+    python -m benchmarks.bench_local_db [--workouts 5000] [--runs 200]
+
+Cria um banco temporário com o histórico de treinos de um usuário e compara:
+- antes: uma conexão nova por operação (sqlite3.connect a cada chamada,
+  journal padrão e synchronous=FULL), como as funções antigas do main.py;
+- depois: local_db.LocalDatabase (conexão única, WAL, synchronous=NORMAL,
+  instruções preparadas em cache e filtros em workout_day pelo índice
+  ix_workouts_user_day, no lugar de date(workout_date) e LIKE).
+Mede o mês do calendário, a lista de um dia e o salvamento de um treino.
+"""
+import argparse
+import datetime
+import json
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+
+from local_db import LocalDatabase
+
+USER_EMAIL = "bench@evorun.local"
+WORKOUT_TYPES = ("running", "cycling", "swimming", "weightlifting", "stairs")
+
+
+def seed(db: LocalDatabase, workouts: int) -> list[datetime.date]:
+    """Insere `workouts` treinos (um por dia, a partir de 2015) e retorna os dias."""
+    rng = random.Random(42)
+    first_day = datetime.date(2015, 1, 1)
+    days = [first_day + datetime.timedelta(days=offset) for offset in range(workouts)]
+    db.upsert_workouts_from_api(USER_EMAIL, [
+        {
+            "id": index + 1, "workout_type": rng.choice(WORKOUT_TYPES),
+            "workout_date": f"{day.isoformat()}T07:30:00", "duration_minutes": rng.randint(20, 120),
+            "distance_km": round(rng.uniform(3, 40), 2), "details": {"elevation_level": rng.randint(0, 500)},
+        }
+        for index, day in enumerate(days)
+    ])
+    return days
+
+
+# --- Caminho anterior: conexão nova a cada operação ---
+
+def month_before(path: str, start: str, end: str) -> list:
+    with sqlite3.connect(path) as con:
+        con.row_factory = sqlite3.Row
+        cur = con.cursor()
+        cur.execute("SELECT * FROM workouts WHERE user_email=? AND to_be_deleted=0 AND date(workout_date) BETWEEN date(?) AND date(?) ORDER BY workout_date",
+                    (USER_EMAIL, start, end))
+        return [dict(row) for row in cur.fetchall()]
+
+
+def day_before(path: str, day: str) -> list:
+    with sqlite3.connect(path) as con:
+        con.row_factory = sqlite3.Row
+        cur = con.cursor()
+        cur.execute("SELECT * FROM workouts WHERE user_email=? AND to_be_deleted=0 AND workout_date LIKE ? ORDER BY workout_date DESC",
+                    (USER_EMAIL, f"{day}%"))
+        return [dict(row) for row in cur.fetchall()]
+
+
+def save_before(path: str, workout: dict):
+    with sqlite3.connect(path) as con:
+        cur = con.cursor()
+        cur.execute("INSERT INTO workouts (user_email, workout_type, workout_date, duration_minutes, distance_km, details, synced) VALUES (?, ?, ?, ?, ?, ?, 0)",
+                    (USER_EMAIL, workout['workout_type'], workout['workout_date'], workout['duration_minutes'], workout['distance_km'], workout['details']))
+        con.commit()
+
+
+def timed(runs: int, call) -> list[float]:
+    call()  # aquecimento
+    durations = []
+    for _ in range(runs):
+        started_at = time.perf_counter()
+        call()
+        durations.append((time.perf_counter() - started_at) * 1000)
+    return sorted(durations)
+
+
+def report(label: str, before: list[float], after: list[float]):
+    median_before, median_after = statistics.median(before), statistics.median(after)
+    print(f"{label:<18} antes {median_before:8.3f} ms   depois {median_after:8.3f} ms   ({median_before / median_after:5.1f}x)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workouts", type=int, default=5000)
+    parser.add_argument("--runs", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        # Bancos separados: o WAL é persistente e mudaria o journal do caminho anterior
+        before_path = os.path.join(directory, "before.db")
+        seed_db = LocalDatabase(before_path)
+        seed_db.init_schema()
+        days = seed(seed_db, args.workouts)
+        seed_db.connection.execute("PRAGMA journal_mode=DELETE")
+        seed_db.close()
+
+        db = LocalDatabase(os.path.join(directory, "after.db"))
+        db.init_schema()
+        seed(db, args.workouts)
+        print(f"{args.workouts} treinos, {args.runs} execuções\n")
+
+        rng = random.Random(7)
+        months = [(day.replace(day=1), (day.replace(day=28) + datetime.timedelta(days=4)).replace(day=1) - datetime.timedelta(days=1))
+                  for day in rng.sample(days, 50)]
+        sample_days = [day.isoformat() for day in rng.sample(days, 50)]
+        workout = {
+            "workout_type": "running", "workout_date": "2030-01-01T07:00:00", "duration_minutes": 40,
+            "distance_km": 8.0, "details": json.dumps({"elevation_level": 0}),
+        }
+
+        def each(values):
+            iterator = iter(values * (args.runs // len(values) + 2))
+            return lambda: next(iterator)
+
+        next_month, next_day = each(months), each(sample_days)
+        month_runs_before = timed(args.runs, lambda: month_before(before_path, *map(str, next_month())))
+        next_month = each(months)
+        month_runs_after = timed(args.runs, lambda: db.month_workouts(USER_EMAIL, *map(str, next_month())))
+        report("mês (calendário)", month_runs_before, month_runs_after)
+
+        day_runs_before = timed(args.runs, lambda: day_before(before_path, next_day()))
+        next_day = each(sample_days)
+        day_runs_after = timed(args.runs, lambda: db.day_workouts(USER_EMAIL, next_day()))
+        report("lista do dia", day_runs_before, day_runs_after)
+
+        report(
+            "salvar treino",
+            timed(args.runs, lambda: save_before(before_path, workout)),
+            timed(args.runs, lambda: db.insert_workout(USER_EMAIL, workout)),
+        )
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
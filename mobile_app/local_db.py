@@ -0,0 +1,383 @@
+"""
+Banco SQLite local do app: perfil, cores, treinos (modo offline) e o estado
+da sincronização com o backend.
+
+Todo o SQL do app fica aqui. Uma única conexão é aberta (na primeira
+consulta) e reaproveitada, em vez de uma conexão nova por operação:
+- WAL: leituras não esperam as escritas, e cada commit só acrescenta ao log;
+- synchronous=NORMAL: com WAL, não sincroniza o disco a cada commit (uma queda
+  de energia pode perder os últimos commits, nunca corromper o banco — e os
+  treinos não sincronizados continuam marcados para o próximo envio);
+- as instruções são constantes deste módulo, então o cache de instruções
+  preparadas do sqlite3 (cached_statements) as compila uma única vez.
+
+O app usa o banco pela AsyncLocalDatabase: as consultas rodam em uma thread
+dedicada, fora do event loop do Flet, e a interface não congela durante a
+sincronização.
+"""
+import asyncio
+import json
+import os
+import shutil
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+
+DB_FILENAME = "evorun_local.db"
+
+# Instruções preparadas mantidas em cache pela conexão (o padrão do sqlite3 é 128)
+CACHED_STATEMENTS = 64
+# Treinos gravados por transação nas operações longas (ex.: ressincronização completa)
+WRITE_CHUNK_SIZE = 200
+
+# Migrações do esquema, em ordem: o banco guarda em PRAGMA user_version
+# quantas já foram aplicadas, e cada uma roda em uma transação
+_MIGRATIONS = (
+    # 1: tabelas iniciais (bancos criados antes do versionamento já as têm)
+    (
+        """
+        CREATE TABLE IF NOT EXISTS workouts (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, api_id INTEGER UNIQUE, user_email TEXT NOT NULL,
+            workout_type TEXT NOT NULL, workout_date TEXT NOT NULL, duration_minutes INTEGER,
+            distance_km REAL, details TEXT, synced INTEGER DEFAULT 0, to_be_deleted INTEGER DEFAULT 0
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS user_profile (
+            email TEXT PRIMARY KEY, full_name TEXT, age INTEGER, weight_kg INTEGER,
+            height_cm INTEGER, training_days_per_week INTEGER, synced INTEGER DEFAULT 1
+        )
+        """,
+        # Cores escolhidas pelo usuário para cada tipo de treino
+        """
+        CREATE TABLE IF NOT EXISTS workout_colors (
+            user_email TEXT NOT NULL,
+            workout_type TEXT NOT NULL,
+            color TEXT NOT NULL,
+            PRIMARY KEY (user_email, workout_type)
+        )
+        """,
+        # Token da última sincronização incremental de treinos, por usuário
+        """
+        CREATE TABLE IF NOT EXISTS sync_state (
+            user_email TEXT PRIMARY KEY,
+            workouts_token TEXT
+        )
+        """,
+    ),
+    # 2: dia do treino (YYYY-MM-DD, o prefixo de workout_date) em coluna própria,
+    # para o calendário e a lista do dia usarem o índice em vez de varrer a tabela
+    (
+        "ALTER TABLE workouts ADD COLUMN workout_day TEXT",
+        "UPDATE workouts SET workout_day = substr(workout_date, 1, 10)",
+        "CREATE INDEX IF NOT EXISTS ix_workouts_user_day ON workouts (user_email, to_be_deleted, workout_day)",
+    ),
+)
+
+_SAVE_COLOR = "INSERT OR REPLACE INTO workout_colors (user_email, workout_type, color) VALUES (?, ?, ?)"
+_LOAD_COLORS = "SELECT workout_type, color FROM workout_colors WHERE user_email = ?"
+
+_SAVE_PROFILE = """
+    INSERT OR REPLACE INTO user_profile (email, full_name, age, weight_kg, height_cm, training_days_per_week, synced)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+_LOAD_PROFILE = "SELECT * FROM user_profile WHERE email = ?"
+_LOAD_UNSYNCED_PROFILE = "SELECT * FROM user_profile WHERE email = ? AND synced = 0"
+
+_LOAD_SYNC_TOKEN = "SELECT workouts_token FROM sync_state WHERE user_email = ?"
+_SAVE_SYNC_TOKEN = "INSERT OR REPLACE INTO sync_state (user_email, workouts_token) VALUES (?, ?)"
+
+_UPSERT_API_WORKOUT = """
+    INSERT INTO workouts (api_id, user_email, workout_type, workout_date, workout_day, duration_minutes, distance_km, details, synced)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, 1)
+    ON CONFLICT(api_id) DO UPDATE SET
+        workout_type=excluded.workout_type, workout_date=excluded.workout_date, workout_day=excluded.workout_day,
+        duration_minutes=excluded.duration_minutes, distance_km=excluded.distance_km,
+        details=excluded.details, synced=1
+"""
+_DELETE_API_WORKOUT = "DELETE FROM workouts WHERE user_email = ? AND api_id = ?"
+_API_WORKOUT_DAY = "SELECT workout_day FROM workouts WHERE api_id = ?"
+_USER_API_WORKOUT_DAY = "SELECT workout_day FROM workouts WHERE user_email = ? AND api_id = ?"
+
+_INSERT_WORKOUT = """
+    INSERT INTO workouts (user_email, workout_type, workout_date, workout_day, duration_minutes, distance_km, details, synced)
+    VALUES (?, ?, ?, ?, ?, ?, ?, 0)
+"""
+_UPDATE_WORKOUT = """
+    UPDATE workouts SET workout_type = ?, workout_date = ?, workout_day = ?, duration_minutes = ?, distance_km = ?, details = ?,
+        synced = 0
+    WHERE id = ?
+"""
+_WORKOUT_API_ID = "SELECT api_id FROM workouts WHERE id = ?"
+_MARK_WORKOUT_SYNCED = "UPDATE workouts SET synced = 1, api_id = ? WHERE id = ?"
+_MARK_WORKOUT_DELETED = "UPDATE workouts SET to_be_deleted = 1, synced = 0 WHERE id = ?"
+_DELETE_WORKOUT = "DELETE FROM workouts WHERE id = ?"
+_PENDING_WORKOUTS = "SELECT * FROM workouts WHERE user_email = ? AND (synced = 0 OR to_be_deleted = 1)"
+
+# Calendário e lista do dia: filtros por faixa/igualdade em workout_day, resolvidos
+# pelo índice ix_workouts_user_day
+_MONTH_WORKOUTS = """
+    SELECT workout_day, workout_type FROM workouts
+    WHERE user_email = ? AND to_be_deleted = 0 AND workout_day BETWEEN ? AND ?
+    ORDER BY workout_day
+"""
+_DAY_WORKOUTS = """
+    SELECT * FROM workouts
+    WHERE user_email = ? AND to_be_deleted = 0 AND workout_day = ?
+    ORDER BY workout_date DESC
+"""
+
+
+def workout_day(workout_date: str) -> str:
+    """Dia do treino (YYYY-MM-DD) a partir da data ISO, como na migração 2."""
+    return workout_date[:10]
+
+
+def _move_legacy_db(legacy_path: str, path: str) -> str:
+    """
+    Move o banco de `legacy_path` (e os arquivos -wal/-shm, se houver) para
+    `path`, antes da primeira conexão. Retorna o caminho a usar: o novo ou,
+    se algum arquivo não puder ser movido, o antigo, intacto.
+    """
+    moved = []
+    try:
+        # Os arquivos auxiliares primeiro: sem o banco, eles não são abertos
+        for suffix in ("-wal", "-shm", ""):
+            if os.path.exists(legacy_path + suffix):
+                shutil.move(legacy_path + suffix, path + suffix)
+                moved.append(suffix)
+    except OSError:
+        for suffix in moved:
+            shutil.move(path + suffix, legacy_path + suffix)
+        return legacy_path
+    return path
+
+
+def default_db_path() -> str:
+    """
+    Caminho do banco: a pasta de dados do app fornecida pelo Flet (no celular)
+    ou, fora dele, a pasta deste módulo — e não o diretório de trabalho atual.
+    Um banco das versões anteriores, no diretório de trabalho, é movido para
+    o novo caminho se ainda não houver banco lá.
+    """
+    directory = os.getenv("FLET_APP_STORAGE_DATA") or os.path.dirname(os.path.abspath(__file__))
+    path = os.path.join(directory, DB_FILENAME)
+    legacy_path = os.path.abspath(DB_FILENAME)
+    if legacy_path != path and os.path.exists(legacy_path) and not os.path.exists(path):
+        return _move_legacy_db(legacy_path, path)
+    return path
+
+
+class LocalDatabase:
+    """Dono da conexão com o banco local; cada método é uma operação do app."""
+
+    def __init__(self, path: str | None = None, cached_statements: int = CACHED_STATEMENTS):
+        self.path = path or default_db_path()
+        self.cached_statements = cached_statements
+        self._con: sqlite3.Connection | None = None
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        """A conexão, aberta e configurada no primeiro uso."""
+        if self._con is None:
+            con = sqlite3.connect(self.path, cached_statements=self.cached_statements)
+            con.row_factory = sqlite3.Row
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute("PRAGMA synchronous=NORMAL")
+            self._con = con
+        return self._con
+
+    def close(self):
+        if self._con is not None:
+            self._con.close()
+            self._con = None
+
+    def init_schema(self):
+        """Aplica as migrações que faltam (ver _MIGRATIONS)."""
+        con = self.connection
+        version = con.execute("PRAGMA user_version").fetchone()[0]
+        for target, statements in enumerate(_MIGRATIONS[version:], start=version + 1):
+            with con:
+                con.execute("BEGIN")
+                for statement in statements:
+                    con.execute(statement)
+                con.execute(f"PRAGMA user_version = {target}")
+
+    # --- Cores ---
+
+    def save_workout_color(self, user_email: str, workout_type: str, color: str):
+        with self.connection as con:
+            con.execute(_SAVE_COLOR, (user_email, workout_type, color))
+
+    def load_workout_colors(self, user_email: str) -> dict:
+        """Cores customizadas do usuário, por tipo de treino."""
+        return dict(self.connection.execute(_LOAD_COLORS, (user_email,)).fetchall())
+
+    # --- Perfil ---
+
+    def save_profile(self, profile_data: dict, synced: int):
+        """Salva ou atualiza o perfil do usuário."""
+        with self.connection as con:
+            con.execute(_SAVE_PROFILE, (
+                profile_data.get('email'), profile_data.get('full_name'), profile_data.get('age'),
+                profile_data.get('weight_kg'), profile_data.get('height_cm'),
+                profile_data.get('training_days_per_week'), synced,
+            ))
+
+    def load_profile(self, email: str) -> dict | None:
+        row = self.connection.execute(_LOAD_PROFILE, (email,)).fetchone()
+        return dict(row) if row else None
+
+    def load_unsynced_profile(self, email: str) -> dict | None:
+        """O perfil, se tiver alterações locais ainda não enviadas ao backend."""
+        row = self.connection.execute(_LOAD_UNSYNCED_PROFILE, (email,)).fetchone()
+        return dict(row) if row else None
+
+    # --- Sincronização com o backend ---
+
+    def load_sync_token(self, user_email: str) -> str | None:
+        """Token da última sincronização incremental de treinos do usuário."""
+        row = self.connection.execute(_LOAD_SYNC_TOKEN, (user_email,)).fetchone()
+        return row[0] if row else None
+
+    def save_sync_token(self, user_email: str, token: str):
+        with self.connection as con:
+            con.execute(_SAVE_SYNC_TOKEN, (user_email, token))
+
+    def upsert_workouts_from_api(self, user_email: str, workouts: list) -> set[str]:
+        """
+        Grava (insere ou atualiza pelo api_id) os treinos recebidos do backend.
+        Retorna os dias (YYYY-MM-DD) que os treinos já existentes tinham antes
+        da gravação, para invalidar também os meses de onde eles saíram.
+        """
+        with self.connection as con:
+            previous_days = self._api_workout_days(con, _API_WORKOUT_DAY, [(workout['id'],) for workout in workouts])
+            con.executemany(_UPSERT_API_WORKOUT, [
+                (
+                    workout['id'], user_email, workout['workout_type'], workout['workout_date'],
+                    workout_day(workout['workout_date']), workout.get('duration_minutes'), workout.get('distance_km'),
+                    json.dumps(workout.get('details')),
+                )
+                for workout in workouts
+            ])
+        return previous_days
+
+    def delete_workouts_by_api_id(self, user_email: str, api_ids: list) -> set[str]:
+        """Remove os treinos excluídos no backend (tombstones); retorna os dias deles."""
+        with self.connection as con:
+            days = self._api_workout_days(con, _USER_API_WORKOUT_DAY, [(user_email, api_id) for api_id in api_ids])
+            con.executemany(_DELETE_API_WORKOUT, [(user_email, api_id) for api_id in api_ids])
+        return days
+
+    @staticmethod
+    def _api_workout_days(con: sqlite3.Connection, query: str, params: list) -> set[str]:
+        """Dias dos treinos locais encontrados por `query` (pelo índice único de api_id)."""
+        days = set()
+        for values in params:
+            row = con.execute(query, values).fetchone()
+            if row is not None:
+                days.add(row[0])
+        return days
+
+    def pending_workouts(self, user_email: str) -> list[dict]:
+        """Treinos criados, alterados ou excluídos localmente e ainda não enviados."""
+        return [dict(row) for row in self.connection.execute(_PENDING_WORKOUTS, (user_email,)).fetchall()]
+
+    def mark_workouts_synced(self, synced: list[tuple[int, int]]):
+        """Marca como sincronizados os treinos de (id local, api_id)."""
+        with self.connection as con:
+            con.executemany(_MARK_WORKOUT_SYNCED, [(api_id, local_id) for local_id, api_id in synced])
+
+    def delete_workouts(self, local_ids: list[int]):
+        """Exclui permanentemente os treinos pelos ids locais."""
+        with self.connection as con:
+            con.executemany(_DELETE_WORKOUT, [(local_id,) for local_id in local_ids])
+
+    # --- Treinos ---
+
+    def insert_workout(self, user_email: str, workout: dict) -> int:
+        """Insere um treino ainda não sincronizado; retorna o id local."""
+        with self.connection as con:
+            cursor = con.execute(_INSERT_WORKOUT, (
+                user_email, workout['workout_type'], workout['workout_date'], workout_day(workout['workout_date']),
+                workout['duration_minutes'], workout['distance_km'], workout['details'],
+            ))
+        return cursor.lastrowid
+
+    def update_workout(self, local_id: int, workout: dict) -> int | None:
+        """Atualiza um treino (marcando-o como não sincronizado); retorna o api_id dele."""
+        with self.connection as con:
+            row = con.execute(_WORKOUT_API_ID, (local_id,)).fetchone()
+            con.execute(_UPDATE_WORKOUT, (
+                workout['workout_type'], workout['workout_date'], workout_day(workout['workout_date']),
+                workout['duration_minutes'], workout['distance_km'], workout['details'], local_id,
+            ))
+        return row[0] if row else None
+
+    def mark_workout_deleted(self, local_id: int):
+        """Marca o treino para exclusão na próxima sincronização."""
+        with self.connection as con:
+            con.execute(_MARK_WORKOUT_DELETED, (local_id,))
+
+    def month_workouts(self, user_email: str, start: str, end: str) -> list[sqlite3.Row]:
+        """(workout_day, workout_type) dos treinos entre as datas ISO start e end (inclusivas)."""
+        return self.connection.execute(_MONTH_WORKOUTS, (user_email, start, end)).fetchall()
+
+    def day_workouts(self, user_email: str, day: str) -> list[dict]:
+        """Treinos do dia (data ISO), do mais recente ao mais antigo."""
+        return [dict(row) for row in self.connection.execute(_DAY_WORKOUTS, (user_email, day)).fetchall()]
+
+
+class AsyncLocalDatabase:
+    """
+    Fachada assíncrona da LocalDatabase: cada método da LocalDatabase vira
+    uma corrotina que executa a operação em uma única thread dedicada. A
+    conexão é aberta e usada só nessa thread, e as operações são executadas
+    na ordem em que foram pedidas.
+    """
+
+    def __init__(self, path: str | None = None):
+        self.db = LocalDatabase(path)
+        self._executor: ThreadPoolExecutor | None = None
+
+    async def run(self, function, *args, **kwargs):
+        """Executa `function(*args, **kwargs)` na thread do banco (criada no primeiro uso)."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="local-db")
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, lambda: function(*args, **kwargs))
+
+    def __getattr__(self, name: str):
+        method = getattr(self.db, name)
+        if not callable(method) or name.startswith("_"):
+            raise AttributeError(name)
+
+        async def call(*args, **kwargs):
+            return await self.run(method, *args, **kwargs)
+        call.__name__ = name
+        call.__doc__ = method.__doc__
+        return call
+
+    async def upsert_workouts_from_api(self, user_email: str, workouts: list) -> set[str]:
+        """
+        Grava os treinos recebidos em lotes de WRITE_CHUNK_SIZE, um por
+        transação: entre os lotes, as consultas da interface que estiverem na
+        fila são atendidas e o event loop volta a desenhar a tela.
+        """
+        previous_days = set()
+        for start in range(0, len(workouts), WRITE_CHUNK_SIZE):
+            previous_days |= await self.run(
+                self.db.upsert_workouts_from_api, user_email, workouts[start:start + WRITE_CHUNK_SIZE]
+            )
+            await asyncio.sleep(0)
+        return previous_days
+
+    async def close(self):
+        """
+        Fecha a conexão, na thread do banco, e encerra a thread. Uma nova
+        chamada cria outra thread e reabre a conexão.
+        """
+        if self._executor is None:
+            return
+        await self.run(self.db.close)
+        executor, self._executor = self._executor, None
+        executor.shutdown(wait=True)
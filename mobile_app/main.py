@@ -1,11 +1,13 @@
 import flet as ft
 import httpx
-import sqlite3
 import datetime
 import calendar
 import json
 from functools import partial
 
+from local_db import AsyncLocalDatabase
+from month_cache import MonthCache, add_months
+
 # # --- IMPORTS DO GRÁFICO (TEMPORARIAMENTE DESATIVADOS PARA O BUILD) ---
 # import matplotlib
 # import matplotlib.pyplot as plt
@@ -17,6 +19,17 @@ from functools import partial
 # ATENÇÃO: Use 127.0.0.1 para testes locais no PC. Use o IP da rede para builds no telemóvel.
 API_URL = "http://192.168.15.120:8000" # Exemplo para build: "http://192.168.1.5:8000"
 APPBAR_BGCOLOR = ft.Colors.BLUE_800
+# Máximo de operações por requisição ao endpoint /workouts/batch
+SYNC_BATCH_SIZE = 500
+# Cliente HTTP compartilhado: timeouts padrão (por chamada, podem ser sobrescritos)
+# e limites do pool de conexões mantidas abertas (keep-alive) com o backend
+HTTP_TIMEOUT = httpx.Timeout(10.0, connect=5.0)
+HTTP_LIMITS = httpx.Limits(max_connections=10, max_keepalive_connections=5, keepalive_expiry=60.0)
+try:
+    import h2  # noqa: F401 (extra "http2" do httpx)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
 
 # Dicionário central para a aparência dos treinos na UI.
 # Adicionadas chaves para cores da UI, que também podem ser personalizadas.
@@ -45,100 +58,17 @@ COLORS_MAP = {
 
 # --- Lógica do Banco de Dados Local ---
 
-def init_local_db():
-    """Inicializa o banco de dados SQLite local com as tabelas necessárias."""
-    with sqlite3.connect("evorun_local.db") as con:
-        cur = con.cursor()
-        cur.execute("""
-            CREATE TABLE IF NOT EXISTS workouts (
-                id INTEGER PRIMARY KEY AUTOINCREMENT, api_id INTEGER UNIQUE, user_email TEXT NOT NULL,
-                workout_type TEXT NOT NULL, workout_date TEXT NOT NULL, duration_minutes INTEGER,
-                distance_km REAL, details TEXT, synced INTEGER DEFAULT 0, to_be_deleted INTEGER DEFAULT 0
-            )
-        """)
-        cur.execute("""
-            CREATE TABLE IF NOT EXISTS user_profile (
-                email TEXT PRIMARY KEY, full_name TEXT, age INTEGER, weight_kg INTEGER,
-                height_cm INTEGER, training_days_per_week INTEGER, synced INTEGER DEFAULT 1
-            )
-        """)
-        # Nova tabela para salvar as configurações de cores
-        cur.execute("""
-            CREATE TABLE IF NOT EXISTS workout_colors (
-                user_email TEXT NOT NULL,
-                workout_type TEXT NOT NULL,
-                color TEXT NOT NULL,
-                PRIMARY KEY (user_email, workout_type)
-            )
-        """)
-        con.commit()
-
-def save_workout_color_locally(user_email: str, workout_type: str, color: str):
-    """Salva a cor escolhida para um tipo de treino no banco local."""
-    with sqlite3.connect("evorun_local.db") as con:
-        cur = con.cursor()
-        cur.execute("""
-            INSERT OR REPLACE INTO workout_colors (user_email, workout_type, color)
-            VALUES (?, ?, ?)
-        """, (user_email, workout_type, color))
-        con.commit()
-
-def load_workout_colors_locally(user_email: str):
+# Conexão única com o banco local (todo o SQL está em local_db), usada em uma
+# thread própria: as chamadas são aguardadas sem bloquear o event loop do Flet
+local_db = AsyncLocalDatabase()
+
+async def load_workout_colors_locally(user_email: str):
     """Carrega as cores customizadas do usuário e atualiza o dicionário WORKOUT_VISUALS."""
     if not user_email: return
-    with sqlite3.connect("evorun_local.db") as con:
-        cur = con.cursor()
-        cur.execute("SELECT workout_type, color FROM workout_colors WHERE user_email = ?", (user_email,))
-        rows = cur.fetchall()
-        for workout_type, color in rows:
-            if workout_type in WORKOUT_VISUALS:
-                WORKOUT_VISUALS[workout_type]['color'] = color
-        print("Cores customizadas carregadas.")
-
-
-def save_profile_locally(profile_data: dict, synced: int):
-    """Salva ou atualiza os dados de um perfil de usuário no banco local."""
-    with sqlite3.connect("evorun_local.db") as con:
-        cur = con.cursor()
-        cur.execute("""
-            INSERT OR REPLACE INTO user_profile (email, full_name, age, weight_kg, height_cm, training_days_per_week, synced)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        """, (
-            profile_data.get('email'), profile_data.get('full_name'), profile_data.get('age'),
-            profile_data.get('weight_kg'), profile_data.get('height_cm'),
-            profile_data.get('training_days_per_week'), synced
-        ))
-        con.commit()
-
-def load_profile_locally(email: str):
-    """Carrega os dados de um perfil de usuário específico do banco local."""
-    if not email: return None
-    with sqlite3.connect("evorun_local.db") as con:
-        con.row_factory = sqlite3.Row
-        cur = con.cursor()
-        cur.execute("SELECT * FROM user_profile WHERE email = ?", (email,))
-        row = cur.fetchone()
-        return dict(row) if row else None
-
-def sync_workouts_from_api(user_email: str, workouts_from_api: list):
-    """Sincroniza os treinos da API com o banco de dados local."""
-    with sqlite3.connect("evorun_local.db") as con:
-        cur = con.cursor()
-        for workout in workouts_from_api:
-            cur.execute("""
-                INSERT INTO workouts (api_id, user_email, workout_type, workout_date, duration_minutes, distance_km, details, synced)
-                VALUES (?, ?, ?, ?, ?, ?, ?, 1)
-                ON CONFLICT(api_id) DO UPDATE SET
-                    workout_type=excluded.workout_type, workout_date=excluded.workout_date,
-                    duration_minutes=excluded.duration_minutes, distance_km=excluded.distance_km,
-                    details=excluded.details, synced=1
-            """, (
-                workout['id'], user_email, workout['workout_type'], workout['workout_date'],
-                workout.get('duration_minutes'), workout.get('distance_km'),
-                json.dumps(workout.get('details')),
-            ))
-        con.commit()
-    print(f"{len(workouts_from_api)} treinos sincronizados do backend para o local.")
+    for workout_type, color in (await local_db.load_workout_colors(user_email)).items():
+        if workout_type in WORKOUT_VISUALS:
+            WORKOUT_VISUALS[workout_type]['color'] = color
+    print("Cores customizadas carregadas.")
 
 # --- Estado da Aplicação ---
 
@@ -149,9 +79,29 @@ class AppState:
         self.user_profile: dict = {}
         self.editing_workout_id: int | None = None
         self.current_calendar_date: datetime.date = datetime.date.today()
+        # Respostas GET com ETag, por endpoint: revalidadas com If-None-Match (304 = sem corpo)
+        self.etag_cache: dict = {}
+        # Cliente HTTP único: reaproveita as conexões (TCP/TLS) entre as chamadas
+        self.http_client: httpx.AsyncClient | None = None
+        # Tipos de treino por dia dos meses já vistos (ou pré-carregados) no calendário
+        self.month_cache = MonthCache()
         # CORREÇÃO: O diálogo de cores foi removido do estado global
         # para ser criado dinamicamente, evitando problemas de estado.
 
+    def get_http_client(self) -> httpx.AsyncClient:
+        """Retorna o cliente HTTP compartilhado, criando-o na primeira chamada."""
+        if self.http_client is None or self.http_client.is_closed:
+            self.http_client = httpx.AsyncClient(
+                base_url=API_URL, http2=HTTP2_AVAILABLE, timeout=HTTP_TIMEOUT, limits=HTTP_LIMITS
+            )
+        return self.http_client
+
+    async def close_http_client(self):
+        """Fecha o cliente HTTP e as conexões abertas (logout ou saída do app)."""
+        if self.http_client is not None:
+            await self.http_client.aclose()
+            self.http_client = None
+
 
 # --- Função Principal da Aplicação ---
 
@@ -191,93 +141,104 @@ async def main(page: ft.Page):
 
         show_loading()
         try:
-            with sqlite3.connect("evorun_local.db") as con:
-                con.row_factory = sqlite3.Row
-                cur = con.cursor()
-                cur.execute("SELECT * FROM user_profile WHERE email = ? AND synced = 0", (app_state.user_profile['email'],))
-                unsynced_profile = cur.fetchone()
-                if unsynced_profile:
-                    profile_data = dict(unsynced_profile)
-                    print("Enviando perfil não sincronizado...")
-                    payload = {k: v for k, v in profile_data.items() if k not in ['email', 'synced']}
-                    response = await api_call("PUT", "/api/v1/users/me/profile", json=payload)
-                    if response and response.status_code == 200:
-                        save_profile_locally(response.json(), synced=1)
-                        print("Perfil sincronizado com sucesso.")
-
-                cur.execute("SELECT * FROM workouts WHERE user_email = ? AND synced = 0 AND to_be_deleted = 0", (app_state.user_profile['email'],))
-                unsynced_workouts = cur.fetchall()
-                if unsynced_workouts:
-                    print(f"Enviando {len(unsynced_workouts)} treinos não sincronizados...")
-                    for workout_row in unsynced_workouts:
-                        workout = dict(workout_row)
-                        workout_data = {
-                            "workout_type": workout['workout_type'], "workout_date": workout['workout_date'],
-                            "duration_minutes": workout.get('duration_minutes'), "distance_km": workout.get('distance_km'),
-                            "details": json.loads(workout['details']) if workout.get('details') else {}
-                        }
-                        endpoint = f"/api/v1/workouts/{workout['api_id']}" if workout.get('api_id') else "/api/v1/workouts/"
-                        method = "PUT" if workout.get('api_id') else "POST"
-                        response = await api_call(method, endpoint, json=workout_data)
-                        if response and response.status_code in [200, 201]:
-                            api_id = response.json().get("id")
-                            cur.execute("UPDATE workouts SET synced = 1, api_id = ? WHERE id = ?", (api_id, workout['id']))
-                            con.commit()
-                            print(f"Treino local ID {workout['id']} sincronizado.")
-                        elif response is None:
-                            print("Não foi possível sincronizar treinos. Backend offline.")
-                            break
+            user_email = app_state.user_profile['email']
+            unsynced_profile = await local_db.load_unsynced_profile(user_email)
+            if unsynced_profile:
+                print("Enviando perfil não sincronizado...")
+                payload = {k: v for k, v in unsynced_profile.items() if k not in ['email', 'synced']}
+                response = await api_call("PUT", "/api/v1/users/me/profile", json=payload)
+                if response and response.status_code == 200:
+                    await local_db.save_profile(response.json(), synced=1)
+                    print("Perfil sincronizado com sucesso.")
 
-                cur.execute("SELECT * FROM workouts WHERE user_email = ? AND to_be_deleted = 1", (app_state.user_profile['email'],))
-                workouts_to_delete = cur.fetchall()
-                if workouts_to_delete:
-                    print(f"Enviando {len(workouts_to_delete)} exclusões de treinos...")
-                    for workout_row in workouts_to_delete:
-                        workout = dict(workout_row)
-                        if workout.get('api_id'):
-                            response = await api_call("DELETE", f"/api/v1/workouts/{workout['api_id']}")
-                            if response and response.status_code in [200, 204, 404]:
-                                cur.execute("DELETE FROM workouts WHERE id = ?", (workout['id'],))
-                                con.commit()
-                                print(f"Treino ID {workout['id']} excluído permanentemente.")
-                            elif response is None:
-                                print("Não foi possível sincronizar exclusões. Backend offline.")
-                                break
-                        else:
-                            cur.execute("DELETE FROM workouts WHERE id = ?", (workout['id'],))
-                            con.commit()
-                            print(f"Treino local ID {workout['id']} (nunca sincronizado) excluído permanentemente.")
+            # Treinos novos/alterados e exclusões vão juntos, em lotes, para /workouts/batch
+            operations, never_synced = [], []
+            for workout in await local_db.pending_workouts(user_email):
+                if workout['to_be_deleted']:
+                    if workout.get('api_id'):
+                        operations.append({"op": "delete", "client_id": workout['id'], "id": workout['api_id']})
+                    else:
+                        never_synced.append(workout['id'])
+                    continue
+                workout_data = {
+                    "workout_type": workout['workout_type'], "workout_date": workout['workout_date'],
+                    "duration_minutes": workout.get('duration_minutes'), "distance_km": workout.get('distance_km'),
+                    "details": json.loads(workout['details']) if workout.get('details') else {}
+                }
+                if workout.get('api_id'):
+                    operations.append({"op": "update", "client_id": workout['id'], "id": workout['api_id'], "data": workout_data})
+                else:
+                    operations.append({"op": "create", "client_id": workout['id'], "data": workout_data})
+            if never_synced:
+                await local_db.delete_workouts(never_synced)
+                print(f"{len(never_synced)} treinos locais (nunca sincronizados) excluídos permanentemente.")
+
+            if operations:
+                print(f"Enviando {len(operations)} alterações de treinos...")
+            for start in range(0, len(operations), SYNC_BATCH_SIZE):
+                response = await api_call("POST", "/api/v1/workouts/batch", json={"operations": operations[start:start + SYNC_BATCH_SIZE]})
+                if response is None:
+                    print("Não foi possível sincronizar treinos. Backend offline.")
+                    break
+                if response.status_code != 200:
+                    print(f"Erro ao sincronizar treinos: {response.status_code}")
+                    break
+                results = response.json()["results"]
+                synced, deleted = [], []
+                for result in results:
+                    if result['status'] in ("created", "updated"):
+                        synced.append((result['client_id'], result['id']))
+                    elif result['op'] == "delete" and result['status'] in ("deleted", "not_found"):
+                        # not_found: o treino já não existe no servidor
+                        deleted.append(result['client_id'])
+                    else:
+                        print(f"Treino local ID {result['client_id']} não sincronizado ({result['status']}): {result['errors']}")
+                await local_db.mark_workouts_synced(synced)
+                await local_db.delete_workouts(deleted)
+                print(f"{len(results)} alterações de treinos enviadas.")
         finally:
             hide_loading()
 
     # --- Funções Auxiliares de UI e API ---
-    async def api_call(method, endpoint, data=None, json=None, headers=None):
-        """Função central para fazer chamadas à API do backend."""
+    async def api_call(method, endpoint, data=None, json=None, headers=None, timeout=None):
+        """
+        Função central para fazer chamadas à API do backend, pelo cliente HTTP
+        compartilhado. `timeout` (segundos ou httpx.Timeout) substitui o padrão
+        HTTP_TIMEOUT nesta chamada.
+        """
         auth_headers = {}
         if app_state.token:
             auth_headers["Authorization"] = f"Bearer {app_state.token}"
         if headers:
             auth_headers.update(headers)
-        
+        cached_response = app_state.etag_cache.get(endpoint) if method == "GET" else None
+        if cached_response is not None:
+            auth_headers["If-None-Match"] = cached_response.headers["etag"]
+
+        client = app_state.get_http_client()
         try:
-            async with httpx.AsyncClient(timeout=5.0) as client:
-                if method == "POST": return await client.post(f"{API_URL}{endpoint}", data=data, json=json, headers=auth_headers)
-                elif method == "GET": return await client.get(f"{API_URL}{endpoint}", headers=auth_headers)
-                elif method == "PUT": return await client.put(f"{API_URL}{endpoint}", json=json, headers=auth_headers)
-                elif method == "DELETE": return await client.delete(f"{API_URL}{endpoint}", headers=auth_headers)
+            response = await client.request(
+                method, endpoint, data=data, json=json, headers=auth_headers,
+                timeout=timeout if timeout is not None else httpx.USE_CLIENT_DEFAULT,
+            )
         except httpx.RequestError as e:
             print(f"Erro de conexão com a API: {e}")
             return None
 
+        if method == "GET":
+            if response.status_code == 304 and cached_response is not None:
+                return cached_response
+            if response.status_code == 200 and "etag" in response.headers:
+                app_state.etag_cache[endpoint] = response
+        return response
+
     async def delete_workout_confirmed(e):
         """Marca um treino para exclusão no banco local e atualiza a UI."""
         show_loading()
         try:
             local_id_to_delete = delete_bs.data.get("local_id")
-            with sqlite3.connect("evorun_local.db") as con:
-                cur = con.cursor()
-                cur.execute("UPDATE workouts SET to_be_deleted = 1, synced = 0 WHERE id = ?", (local_id_to_delete,))
-                con.commit()
+            await local_db.mark_workout_deleted(local_id_to_delete)
+            app_state.month_cache.invalidate(app_state.user_profile['email'], delete_bs.data["workout_date"])
             print(f"Treino local ID {local_id_to_delete} marcado para exclusão.")
             close_bs()
             await show_view(workouts_container)
@@ -310,12 +271,12 @@ async def main(page: ft.Page):
 
             if response is None:
                 print("Conexão falhou. Tentando login offline com base no perfil local.")
-                local_profile = load_profile_locally(email)
+                local_profile = await local_db.load_profile(email)
                 if local_profile:
                     print("Perfil local encontrado. Concedendo acesso offline.")
                     app_state.user_profile = local_profile
                     app_state.token = "offline-token" 
-                    load_workout_colors_locally(email)
+                    await load_workout_colors_locally(email)
                     await show_view(dashboard_container)
                 else:
                     print("Nenhum perfil local encontrado para login offline.")
@@ -327,17 +288,35 @@ async def main(page: ft.Page):
                 
                 if user_response and user_response.status_code == 200:
                     app_state.user_profile = user_response.json()
-                    load_workout_colors_locally(email)
+                    await load_workout_colors_locally(email)
                     
                     await sync_local_changes_to_backend()
                     final_user_response = await api_call("GET", "/api/v1/users/me/")
                     if final_user_response:
                         app_state.user_profile = final_user_response.json()
                     
-                    save_profile_locally(app_state.user_profile, synced=1)
-                    workouts_response = await api_call("GET", "/api/v1/workouts/")
-                    if workouts_response and workouts_response.status_code == 200:
-                        sync_workouts_from_api(app_state.user_profile['email'], workouts_response.json())
+                    await local_db.save_profile(app_state.user_profile, synced=1)
+                    # Sincronização incremental: só o que mudou desde o último token
+                    user_email = app_state.user_profile['email']
+                    sync_token = await local_db.load_sync_token(user_email)
+                    while True:
+                        endpoint = "/api/v1/workouts/changes?limit=500" + (f"&since={sync_token}" if sync_token else "")
+                        changes_response = await api_call("GET", endpoint)
+                        if not changes_response or changes_response.status_code != 200:
+                            break
+                        changes = changes_response.json()
+                        previous_days = await local_db.upsert_workouts_from_api(user_email, changes['items'])
+                        deleted_days = await local_db.delete_workouts_by_api_id(user_email, changes['deleted_ids'])
+                        # Meses novos e anteriores (o treino pode ter mudado de mês) e os dos excluídos
+                        changed_dates = previous_days | deleted_days | {workout['workout_date'] for workout in changes['items']}
+                        for workout_date in changed_dates:
+                            app_state.month_cache.invalidate(user_email, workout_date)
+                        print(f"{len(changes['items'])} treinos sincronizados do backend para o local, {len(changes['deleted_ids'])} removidos.")
+                        # O token só é salvo depois que a página foi aplicada localmente
+                        sync_token = changes['next_token']
+                        await local_db.save_sync_token(user_email, sync_token)
+                        if not changes['has_more']:
+                            break
                     
                     if remember_me_checkbox.value:
                         await page.client_storage.set_async("remembered_email", email)
@@ -366,8 +345,11 @@ async def main(page: ft.Page):
 
     async def logout(e=None):
         """Limpa o estado da aplicação e retorna para a tela de login."""
+        app_state.month_cache.clear(app_state.user_profile.get('email'))
         app_state.token = None
         app_state.user_profile = {}
+        app_state.etag_cache.clear()
+        await app_state.close_http_client()
         await show_view(login_container)
 
     # --- Containers de Tela (Views) ---
@@ -461,7 +443,7 @@ async def main(page: ft.Page):
             except (StopIteration, ValueError):
                 start_index = 0
 
-            def on_picker_change(e_picker):
+            async def on_picker_change(e_picker):
                 """
                 Chamado sempre que o usuário rola o seletor de cores.
                 """
@@ -470,7 +452,7 @@ async def main(page: ft.Page):
                 selected_color_value = COLORS_MAP[selected_color_name]
 
                 WORKOUT_VISUALS[workout_type]['color'] = selected_color_value
-                save_workout_color_locally(app_state.user_profile['email'], workout_type, selected_color_value)
+                await local_db.save_workout_color(app_state.user_profile['email'], workout_type, selected_color_value)
                 color_button_ref.bgcolor = selected_color_value
                 page.update()
 
@@ -577,12 +559,12 @@ async def main(page: ft.Page):
                     return
                 
                 app_state.user_profile.update(profile_data)
-                save_profile_locally(app_state.user_profile, synced=0)
+                await local_db.save_profile(app_state.user_profile, synced=0)
                 
                 response = await api_call("PUT", "/api/v1/users/me/profile", json=profile_data)
                 if response and response.status_code == 200:
                     app_state.user_profile = response.json()
-                    save_profile_locally(app_state.user_profile, synced=1)
+                    await local_db.save_profile(app_state.user_profile, synced=1)
                 elif response is not None:
                     error_text_onboarding.value = f"Ocorreu um erro no servidor ({response.status_code})."
                     page.update()
@@ -618,12 +600,12 @@ async def main(page: ft.Page):
                     "training_days_per_week": int(days_edit_field.value)
                 }
                 app_state.user_profile.update(updated_data)
-                save_profile_locally(app_state.user_profile, synced=0)
+                await local_db.save_profile(app_state.user_profile, synced=0)
                 
                 response = await api_call("PUT", "/api/v1/users/me/profile", json=updated_data)
                 if response and response.status_code == 200:
                     app_state.user_profile = response.json()
-                    save_profile_locally(app_state.user_profile, synced=1)
+                    await local_db.save_profile(app_state.user_profile, synced=1)
                     print("Perfil sincronizado com sucesso.")
                 elif response is None:
                     print("Backend offline. Perfil atualizado localmente.")
@@ -731,21 +713,15 @@ async def main(page: ft.Page):
                 }
                 local_payload = {**api_payload, 'user_email': app_state.user_profile['email'], 'details': json.dumps(details_payload)}
 
-                local_id, api_id_before_save = None, None
-                with sqlite3.connect("evorun_local.db") as con:
-                    cur = con.cursor()
-                    if is_editing:
-                        local_id = app_state.editing_workout_id
-                        cur.execute("SELECT api_id FROM workouts WHERE id = ?", (local_id,))
-                        result = cur.fetchone()
-                        api_id_before_save = result[0] if result else None
-                        cur.execute("UPDATE workouts SET workout_type=?, workout_date=?, duration_minutes=?, distance_km=?, details=?, synced=0 WHERE id=?",
-                                    (local_payload['workout_type'], local_payload['workout_date'], local_payload['duration_minutes'], local_payload['distance_km'], local_payload['details'], local_id))
-                    else:
-                        cur.execute("INSERT INTO workouts (user_email, workout_type, workout_date, duration_minutes, distance_km, details, synced) VALUES (?, ?, ?, ?, ?, ?, 0)",
-                                    (local_payload['user_email'], local_payload['workout_type'], local_payload['workout_date'], local_payload['duration_minutes'], local_payload['distance_km'], local_payload['details']))
-                        local_id = cur.lastrowid
-                    con.commit()
+                if is_editing:
+                    local_id = app_state.editing_workout_id
+                    api_id_before_save = await local_db.update_workout(local_id, local_payload)
+                    # O treino pode ter mudado de mês
+                    app_state.month_cache.invalidate(local_payload['user_email'], initial_date.isoformat())
+                else:
+                    local_id = await local_db.insert_workout(local_payload['user_email'], local_payload)
+                    api_id_before_save = None
+                app_state.month_cache.invalidate(local_payload['user_email'], local_payload['workout_date'])
 
                 endpoint = f"/api/v1/workouts/{api_id_before_save}" if is_editing and api_id_before_save else "/api/v1/workouts/"
                 method = "PUT" if is_editing and api_id_before_save else "POST"
@@ -753,10 +729,7 @@ async def main(page: ft.Page):
 
                 if response and response.status_code in [200, 201]:
                     api_id = response.json().get("id")
-                    with sqlite3.connect("evorun_local.db") as con:
-                        cur = con.cursor()
-                        cur.execute("UPDATE workouts SET synced = 1, api_id = ? WHERE id = ?", (api_id, local_id))
-                        con.commit()
+                    await local_db.mark_workouts_synced([(local_id, api_id)])
                 elif response is None: print("Backend offline. Treino salvo localmente.")
                 else: print(f"Falha ao sincronizar treino. Status: {response.status_code}, Resposta: {response.text}")
                 
@@ -784,19 +757,33 @@ async def main(page: ft.Page):
         calendar_grid = ft.GridView(expand=False, runs_count=7, spacing=5, run_spacing=5)
         workouts_list = ft.ListView(expand=True, spacing=10)
         monthly_colors = {}
-        async def _get_workout_colors_by_day(year: int, month: int) -> dict:
+        user_email = app_state.user_profile['email']
+        async def _load_month_types(year: int, month: int) -> dict:
             start, end = datetime.date(year, month, 1), datetime.date(year, month, calendar.monthrange(year, month)[1])
+            types_by_day = {}
+            for workout_day, workout_type in await local_db.month_workouts(user_email, start.isoformat(), end.isoformat()):
+                day_types = types_by_day.setdefault(datetime.date.fromisoformat(workout_day).day, [])
+                if workout_type not in day_types: day_types.append(workout_type)
+            return types_by_day
+        async def _get_workout_colors_by_day(year: int, month: int) -> dict:
+            # As cores são aplicadas na hora: o cache guarda só os tipos de treino
+            types_by_day = await app_state.month_cache.get_or_load(user_email, year, month, _load_month_types)
             colors_map = {}
-            with sqlite3.connect("evorun_local.db") as con:
-                con.row_factory = sqlite3.Row; cur = con.cursor()
-                cur.execute("SELECT * FROM workouts WHERE user_email=? AND to_be_deleted=0 AND date(workout_date) BETWEEN date(?) AND date(?) ORDER BY workout_date",
-                            (app_state.user_profile['email'], start.isoformat(), end.isoformat()))
-                for row in cur.fetchall():
-                    w = dict(row); day_num = datetime.datetime.fromisoformat(w['workout_date']).day
-                    color = WORKOUT_VISUALS[w['workout_type']]['color']
-                    if day_num not in colors_map: colors_map[day_num] = []
+            for day_num, day_types in types_by_day.items():
+                colors_map[day_num] = []
+                for workout_type in day_types:
+                    color = WORKOUT_VISUALS[workout_type]['color']
                     if color not in colors_map[day_num]: colors_map[day_num].append(color)
             return colors_map
+        async def prefetch_adjacent_months(year: int, month: int):
+            """Carrega em segundo plano o mês anterior e o seguinte, para a troca de mês ser instantânea."""
+            for delta in (-1, 1):
+                await app_state.month_cache.get_or_load(user_email, *add_months(year, month, delta), _load_month_types)
+        async def show_month(year: int, month: int):
+            nonlocal monthly_colors
+            monthly_colors = await _get_workout_colors_by_day(year, month)
+            update_calendar(year, month, monthly_colors); await update_workouts_list_for_date()
+            page.run_task(prefetch_adjacent_months, year, month)
         def update_calendar(year, month, workout_colors: dict):
             month_label.value = f"{calendar.month_name[month]} {year}"
             calendar_grid.controls.clear()
@@ -809,7 +796,7 @@ async def main(page: ft.Page):
 
             for day in range(1, num_days + 1):
                 is_selected = datetime.date(year, month, day) == app_state.current_calendar_date
-                day_container = ft.Container(content=ft.Text(str(day), text_align=ft.TextAlign.CENTER), border_radius=100, ink=True, on_click=lambda e, d=day: select_date(d), alignment=ft.alignment.center)
+                day_container = ft.Container(content=ft.Text(str(day), text_align=ft.TextAlign.CENTER), border_radius=100, ink=True, on_click=on_day_click, data=day, alignment=ft.alignment.center)
                 colors_for_day = workout_colors.get(day, [])
                 if is_selected: day_container.bgcolor = WORKOUT_VISUALS['selected_day']['color']
                 elif not colors_for_day: day_container.bgcolor = WORKOUT_VISUALS['no_workout']['color']
@@ -817,13 +804,9 @@ async def main(page: ft.Page):
                 else: day_container.gradient = ft.LinearGradient(begin=ft.alignment.top_left, end=ft.alignment.bottom_right, colors=list(set(colors_for_day)))
                 calendar_grid.controls.append(day_container)
             page.update()
-        def update_workouts_list_for_date():
+        async def update_workouts_list_for_date():
+            workouts_for_day = await local_db.day_workouts(app_state.user_profile['email'], app_state.current_calendar_date.isoformat())
             workouts_list.controls.clear()
-            with sqlite3.connect("evorun_local.db") as con:
-                con.row_factory = sqlite3.Row; cur = con.cursor()
-                cur.execute("SELECT * FROM workouts WHERE user_email=? AND to_be_deleted=0 AND workout_date LIKE ? ORDER BY workout_date DESC",
-                            (app_state.user_profile['email'], f"{app_state.current_calendar_date.isoformat()}%"))
-                workouts_for_day = [dict(row) for row in cur.fetchall()]
             if not workouts_for_day: workouts_list.controls.append(ft.Text("Nenhum treino registrado para este dia.", italic=True))
             else:
                 for w in workouts_for_day:
@@ -842,16 +825,16 @@ async def main(page: ft.Page):
                     async def go_to_edit(e): await show_view(edit_workout_container, workout_data=e.control.data)
                     def open_delete_dialog(workout_data):
                         delete_bs.content = ft.Container(padding=20, content=ft.Column([ft.Text("Confirmar Exclusão", size=20, weight=ft.FontWeight.BOLD), ft.Text(f"Tem certeza que deseja excluir o treino de {visuals['name']}?"), ft.Row([ft.ElevatedButton("Cancelar", on_click=close_bs), ft.ElevatedButton("Excluir", on_click=delete_workout_confirmed, color="white", bgcolor="red")], alignment=ft.MainAxisAlignment.END)]))
-                        delete_bs.data = {"local_id": workout_data["id"]}; delete_bs.open = True; page.update()
+                        delete_bs.data = {"local_id": workout_data["id"], "workout_date": workout_data["workout_date"]}; delete_bs.open = True; page.update()
                     workouts_list.controls.append(ft.Card(content=ft.ListTile(leading=ft.Icon(visuals['icon'], color=visuals['color']), title=ft.Text(visuals['name'], weight=ft.FontWeight.BOLD, color=visuals['color']), subtitle=ft.Text(description), trailing=ft.PopupMenuButton(icon=ft.Icons.MORE_VERT, items=[ft.PopupMenuItem(text="Editar", icon=ft.Icons.EDIT, on_click=go_to_edit, data=w), ft.PopupMenuItem(text="Excluir", icon=ft.Icons.DELETE_FOREVER, on_click=lambda _, wd=w: open_delete_dialog(wd))]))))
             page.update()
-        def select_date(day: int):
+        async def select_date(day: int):
             current = app_state.current_calendar_date
             app_state.current_calendar_date = datetime.date(current.year, current.month, day)
-            update_calendar(current.year, current.month, monthly_colors); update_workouts_list_for_date()
+            update_calendar(current.year, current.month, monthly_colors); await update_workouts_list_for_date()
+        async def on_day_click(e): await select_date(e.control.data)
         
         async def change_month(delta: int):
-            nonlocal monthly_colors
             current = app_state.current_calendar_date
             
             # Lógica aprimorada para adicionar/subtrair meses
@@ -869,15 +852,11 @@ async def main(page: ft.Page):
             new_day = min(current.day, last_day_of_new_month)
             
             app_state.current_calendar_date = datetime.date(new_year, new_month, new_day)
-            
-            monthly_colors = await _get_workout_colors_by_day(new_year, new_month)
-            update_calendar(new_year, new_month, monthly_colors)
-            update_workouts_list_for_date()
+            await show_month(new_year, new_month)
 
         async def go_to_today(e):
-            nonlocal monthly_colors; today = datetime.date.today(); app_state.current_calendar_date = today
-            monthly_colors = await _get_workout_colors_by_day(today.year, today.month)
-            update_calendar(today.year, today.month, monthly_colors); update_workouts_list_for_date()
+            today = datetime.date.today(); app_state.current_calendar_date = today
+            await show_month(today.year, today.month)
         
         async def change_month_plus(e):
             await change_month(1)
@@ -889,8 +868,7 @@ async def main(page: ft.Page):
         workouts_container.controls = [ft.Row([ft.IconButton(ft.Icons.TODAY, on_click=go_to_today, tooltip="Hoje"), ft.Container(content=month_label, expand=True, alignment=ft.alignment.center), ft.IconButton(ft.Icons.CHEVRON_LEFT, on_click=change_month_minus), ft.IconButton(ft.Icons.CHEVRON_RIGHT, on_click=change_month_plus)], alignment=ft.MainAxisAlignment.CENTER), calendar_grid, ft.Divider(), ft.Row([ft.Text("Treinos do Dia", weight=ft.FontWeight.BOLD, expand=True), ft.FloatingActionButton(icon=ft.Icons.ADD, on_click=go_to_add_workout, tooltip="Adicionar treino")]), workouts_list]
         
         today = app_state.current_calendar_date
-        monthly_colors = await _get_workout_colors_by_day(today.year, today.month)
-        update_calendar(today.year, today.month, monthly_colors); update_workouts_list_for_date()
+        await show_month(today.year, today.month)
 
     # --- Gerenciador de Views ---
     async def show_view(view_to_show, workout_data=None):
@@ -933,7 +911,14 @@ async def main(page: ft.Page):
     )
     
     # --- Lógica de Inicialização ---
-    init_local_db()
+    await local_db.init_schema()
+
+    async def on_page_close(e):
+        """Fecha as conexões HTTP e o banco local quando a sessão do app termina."""
+        await app_state.close_http_client()
+        await local_db.close()
+
+    page.on_close = on_page_close
     
     page.add(
         ft.AppBar(title=ft.Text("EvoRun"), bgcolor=APPBAR_BGCOLOR, center_title=True),
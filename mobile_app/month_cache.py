@@ -0,0 +1,86 @@
+"""
+Cache dos meses do calendário: para cada usuário, os tipos de treino de cada
+dia de um mês, com descarte do mês menos usado (LRU).
+
+Guarda os tipos, e não as cores: trocar a cor de um tipo não invalida nada.
+Um mês só é invalidado quando um treino dele é salvo ou excluído; para que
+uma leitura em andamento (ex.: a pré-carga dos meses vizinhos) não grave
+dados anteriores a uma invalidação, cada mês tem um número de versão.
+"""
+import datetime
+from collections import OrderedDict
+
+# Meses mantidos por usuário
+MAX_MONTHS = 24
+
+
+def month_of(workout_date: str) -> tuple[int, int]:
+    """(ano, mês) de uma data ISO (YYYY-MM-DD...)."""
+    day = datetime.date.fromisoformat(workout_date[:10])
+    return day.year, day.month
+
+
+def add_months(year: int, month: int, delta: int) -> tuple[int, int]:
+    index = year * 12 + month - 1 + delta
+    return index // 12, index % 12 + 1
+
+
+class MonthCache:
+    """(ano, mês) -> {dia: [tipos de treino]}, por usuário."""
+
+    def __init__(self, max_months: int = MAX_MONTHS):
+        self.max_months = max_months
+        self._months: dict[str, OrderedDict] = {}
+        # Versões por mês e por usuário (clear), incrementadas a cada invalidação
+        self._versions: dict[tuple[str, int, int], int] = {}
+        self._generations: dict[str, int] = {}
+        self._generation = 0
+
+    def _version(self, user_email: str, year: int, month: int) -> tuple[int, int, int]:
+        return self._generation, self._generations.get(user_email, 0), self._versions.get((user_email, year, month), 0)
+
+    def get(self, user_email: str, year: int, month: int) -> dict | None:
+        months = self._months.get(user_email)
+        if months is None or (year, month) not in months:
+            return None
+        months.move_to_end((year, month))
+        return months[(year, month)]
+
+    def put(self, user_email: str, year: int, month: int, days: dict):
+        months = self._months.setdefault(user_email, OrderedDict())
+        months[(year, month)] = days
+        months.move_to_end((year, month))
+        while len(months) > self.max_months:
+            months.popitem(last=False)
+
+    async def get_or_load(self, user_email: str, year: int, month: int, load) -> dict:
+        """
+        O mês do cache ou, se ausente, o resultado de `await load(year, month)`,
+        que é guardado se o mês não tiver sido invalidado durante a leitura.
+        """
+        days = self.get(user_email, year, month)
+        if days is not None:
+            return days
+        version = self._version(user_email, year, month)
+        days = await load(year, month)
+        if self._version(user_email, year, month) == version:
+            self.put(user_email, year, month, days)
+        return days
+
+    def invalidate(self, user_email: str, workout_date: str):
+        """Descarta o mês da data ISO de um treino salvo ou excluído."""
+        year, month = month_of(workout_date)
+        key = (user_email, year, month)
+        self._versions[key] = self._versions.get(key, 0) + 1
+        months = self._months.get(user_email)
+        if months is not None:
+            months.pop((year, month), None)
+
+    def clear(self, user_email: str | None = None):
+        """Descarta os meses de um usuário (ou de todos)."""
+        if user_email is None:
+            self._months.clear()
+            self._generation += 1
+        else:
+            self._months.pop(user_email, None)
+            self._generations[user_email] = self._generations.get(user_email, 0) + 1
@@ -0,0 +1,29 @@
+"""Banco local do app (local_db)."""
+import asyncio
+import threading
+
+from local_db import AsyncLocalDatabase
+
+
+def local_db_threads() -> list[threading.Thread]:
+    return [thread for thread in threading.enumerate() if thread.name.startswith("local-db")]
+
+
+def test_close_stops_the_database_thread(tmp_path):
+    async def scenario():
+        db = AsyncLocalDatabase(str(tmp_path / "evorun_local.db"))
+        await db.init_schema()
+        await db.save_sync_token("a@x.com", "token-1")
+        assert local_db_threads()
+
+        await db.close()
+        assert not local_db_threads()
+        await db.close()  # fechar de novo não faz nada
+
+        # Depois de fechado, o banco volta a funcionar em uma thread nova
+        assert await db.load_sync_token("a@x.com") == "token-1"
+        await db.close()
+        assert not local_db_threads()
+
+    asyncio.run(scenario())
+
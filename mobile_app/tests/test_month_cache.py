@@ -0,0 +1,103 @@
+"""Cache dos meses do calendário (month_cache)."""
+import asyncio
+
+from month_cache import MonthCache, add_months, month_of
+
+
+class PausedLoad:
+    """Função `load` que só termina quando `release()` é chamado."""
+
+    def __init__(self, days: dict):
+        self.days = days
+        self.calls = 0
+        self.started = asyncio.Event()
+        self._released = asyncio.Event()
+
+    async def __call__(self, year: int, month: int) -> dict:
+        self.calls += 1
+        self.started.set()
+        await self._released.wait()
+        return self.days
+
+    def release(self):
+        self._released.set()
+
+
+async def load_while(cache: MonthCache, user_email: str, load: PausedLoad, during) -> dict:
+    """Executa get_or_load de março/2024, chamando `during()` enquanto load espera."""
+    task = asyncio.create_task(cache.get_or_load(user_email, 2024, 3, load))
+    await load.started.wait()
+    during()
+    load.release()
+    return await task
+
+
+def test_month_helpers():
+    assert month_of("2024-03-31T23:30:00-03:00") == (2024, 3)
+    assert add_months(2024, 1, -1) == (2023, 12)
+    assert add_months(2024, 12, 1) == (2025, 1)
+    assert add_months(2024, 3, 24) == (2026, 3)
+
+
+def test_loaded_month_is_cached():
+    async def scenario():
+        cache, load = MonthCache(), PausedLoad({1: ["running"]})
+        load.release()
+        assert await cache.get_or_load("a@x.com", 2024, 3, load) == {1: ["running"]}
+        assert await cache.get_or_load("a@x.com", 2024, 3, load) == {1: ["running"]}
+        assert load.calls == 1
+
+    asyncio.run(scenario())
+
+
+def test_invalidation_during_load_is_not_cached():
+    async def scenario():
+        cache, load = MonthCache(), PausedLoad({1: ["running"]})
+        days = await load_while(cache, "a@x.com", load, lambda: cache.invalidate("a@x.com", "2024-03-15T07:00:00"))
+        # A leitura antiga é devolvida a quem pediu, mas não fica no cache
+        assert days == {1: ["running"]}
+        assert cache.get("a@x.com", 2024, 3) is None
+
+    asyncio.run(scenario())
+
+
+def test_invalidating_another_month_keeps_the_load():
+    async def scenario():
+        cache, load = MonthCache(), PausedLoad({1: ["running"]})
+        await load_while(cache, "a@x.com", load, lambda: cache.invalidate("a@x.com", "2024-04-01T07:00:00"))
+        assert cache.get("a@x.com", 2024, 3) == {1: ["running"]}
+
+    asyncio.run(scenario())
+
+
+def test_clear_only_discards_that_user():
+    async def scenario():
+        cache = MonthCache()
+        load_a, load_b = PausedLoad({1: ["running"]}), PausedLoad({2: ["cycling"]})
+        task_b = asyncio.create_task(cache.get_or_load("b@x.com", 2024, 3, load_b))
+        await load_while(cache, "a@x.com", load_a, lambda: cache.clear("a@x.com"))
+        load_b.release()
+        await task_b
+        assert cache.get("a@x.com", 2024, 3) is None
+        assert cache.get("b@x.com", 2024, 3) == {2: ["cycling"]}
+
+        # clear() sem usuário descarta todos, inclusive leituras em andamento
+        load_c = PausedLoad({3: ["swimming"]})
+        await load_while(cache, "c@x.com", load_c, cache.clear)
+        assert cache.get("c@x.com", 2024, 3) is None
+        assert cache.get("b@x.com", 2024, 3) is None
+
+    asyncio.run(scenario())
+
+
+def test_least_recently_used_month_is_evicted():
+    cache = MonthCache(max_months=2)
+    cache.put("a@x.com", 2024, 1, {})
+    cache.put("a@x.com", 2024, 2, {})
+    cache.get("a@x.com", 2024, 1)
+    cache.put("a@x.com", 2024, 3, {})
+    assert cache.get("a@x.com", 2024, 2) is None
+    assert cache.get("a@x.com", 2024, 1) == {} and cache.get("a@x.com", 2024, 3) == {}
+    # O limite é por usuário
+    cache.put("b@x.com", 2024, 1, {})
+    assert cache.get("a@x.com", 2024, 1) == {}